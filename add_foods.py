@@ -1,10 +1,7 @@
 """
 Besin Veritabanına Besin Ekleme Scripti
 """
-import sqlite3
-from datetime import datetime
-
-DB_NAME = 'diyet_takip.db'
+from app import init_db, get_db, import_foods, FOOD_IMPORT_COLUMNS
 
 # Kapsamlı besin listesi - Türk mutfağı ve yaygın besinler
 FOODS = [
@@ -182,34 +179,21 @@ FOODS = [
 ]
 
 def add_foods():
-    """Besinleri veritabanına ekle"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Mevcut besinleri kontrol et
-    cursor.execute('SELECT COUNT(*) FROM foods')
-    existing_count = cursor.fetchone()[0]
-    
-    print(f"Mevcut {existing_count} besin var. Besinler guncelleniyor...")
-    
-    # Tüm besinleri sil ve yeniden ekle (kategori bilgisi için)
-    cursor.execute('DELETE FROM foods')
-    print("Eski besinler silindi.")
-    
-    added_count = 0
-    for food in FOODS:
-        name, calories, protein, carbs, fat, serving_size, barcode, category = food
-        
-        cursor.execute('''
-            INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (name, calories, protein, carbs, fat, serving_size, barcode, category, datetime.now().isoformat()))
-        added_count += 1
-    
-    conn.commit()
+    """Besinleri veritabanına ekle (mevcut olanlar isim + porsiyona göre güncellenir)"""
+    # DB_PATH'i app ile aynı şekilde kullanır; tablolar yoksa oluşturulur
+    init_db()
+    conn = get_db()
+    
+    # Eski besinleri silmek yerine upsert: kullanıcı kayıtları ve favorilerdeki food_id'ler korunur
+    records = ((index, dict(zip(FOOD_IMPORT_COLUMNS, food))) for index, food in enumerate(FOODS, start=1))
+    result = import_foods(conn, records)
     conn.close()
-    print(f"OK: {added_count} besin eklendi!")
-    print(f"Toplam besin sayisi: {added_count}")
+    
+    for error in result['errors']:
+        print(f"HATA: {error['line']}. besin: {error['error']}")
+    print(f"OK: {result['inserted']} besin eklendi, {result['updated']} besin guncellendi!")
+    if result['duplicates']:
+        print(f"Listede tekrar eden {result['duplicates']} besin atlandi")
 
 if __name__ == '__main__':
     add_foods()
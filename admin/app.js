@@ -12,6 +12,7 @@ const getApiBaseUrl = () => {
 const API_BASE_URL = getApiBaseUrl();
 let authToken = localStorage.getItem('adminToken');
 let activityChart = null;
+let recalculationTimer = null;
 
 // Sayfa yüklendiğinde
 document.addEventListener('DOMContentLoaded', function() {
@@ -105,6 +106,8 @@ function showSection(section) {
         loadFoods(1);
     } else if (section === 'logs') {
         loadLogs(1);
+    } else if (section === 'slowQueries') {
+        loadSlowQueries();
     }
 }
 
@@ -184,6 +187,7 @@ function handleLogin(e) {
 
 // Dashboard yükle
 function loadDashboard() {
+    loadRecalculationStatus();
     fetch(`${API_BASE_URL}/admin/stats`, {
         headers: {
             'Authorization': `Bearer ${authToken}`
@@ -208,6 +212,116 @@ function loadDashboard() {
     });
 }
 
+// Hedef yeniden hesaplama işi
+const RECALCULATION_STATUS_LABELS = {
+    running: ['Çalışıyor', 'bg-primary'],
+    cancelling: ['Durduruluyor', 'bg-warning'],
+    cancelled: ['Durduruldu', 'bg-secondary'],
+    completed: ['Tamamlandı', 'bg-success'],
+    failed: ['Hata', 'bg-danger']
+};
+
+function loadRecalculationStatus() {
+    fetch(`${API_BASE_URL}/admin/jobs/recalculate-targets`, {
+        headers: {
+            'Authorization': `Bearer ${authToken}`
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            if (data.error === 'Yetkisiz erişim') {
+                logout();
+            }
+            return;
+        }
+        displayRecalculationStatus(data.job);
+    })
+    .catch(error => {
+        console.error('Yeniden hesaplama durumu yükleme hatası:', error);
+    });
+}
+
+function displayRecalculationStatus(job) {
+    const container = document.getElementById('recalculationStatus');
+    clearTimeout(recalculationTimer);
+    if (!job) {
+        container.innerHTML = '<div class="alert alert-info mb-0">Henüz yeniden hesaplama yapılmadı.</div>';
+        return;
+    }
+    const [label, badgeClass] = job.stale
+        ? ['Yarım kaldı (devam ettirilebilir)', 'bg-warning']
+        : (RECALCULATION_STATUS_LABELS[job.status] || [job.status, 'bg-secondary']);
+    container.innerHTML = `
+        <div class="mb-2">
+            <span class="badge ${badgeClass}">${escapeHtml(label)}</span>
+            <small class="text-muted ms-2">İş #${job.id} &middot; ${new Date(job.created_at).toLocaleString('tr-TR')}</small>
+        </div>
+        <div class="progress mb-2">
+            <div class="progress-bar" role="progressbar" style="width: ${job.progress}%">%${job.progress}</div>
+        </div>
+        <small>İşlenen: ${job.processed} / ${job.total} &middot; Güncellenen: ${job.updated} &middot; Atlanan: ${job.skipped}</small>
+        ${job.error ? `<div class="alert alert-danger mt-2 mb-0">${escapeHtml(job.error)}</div>` : ''}
+    `;
+    // Çalışırken ilerlemeyi takip et
+    if ((job.status === 'running' || job.status === 'cancelling') && !job.stale) {
+        recalculationTimer = setTimeout(loadRecalculationStatus, 2000);
+    }
+}
+
+function startRecalculation(restart) {
+    if (restart && !confirm('Yarım kalan iş yok sayılıp tüm kullanıcılar baştan hesaplansın mı?')) {
+        return;
+    }
+    fetch(`${API_BASE_URL}/admin/jobs/recalculate-targets`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${authToken}`
+        },
+        body: JSON.stringify({ restart: restart })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            if (data.error === 'Yetkisiz erişim') {
+                logout();
+                return;
+            }
+            alert('Hata: ' + data.error);
+        }
+        loadRecalculationStatus();
+    })
+    .catch(error => {
+        console.error('Yeniden hesaplama başlatma hatası:', error);
+        alert('Yeniden hesaplama başlatılırken hata oluştu.');
+    });
+}
+
+function stopRecalculation() {
+    fetch(`${API_BASE_URL}/admin/jobs/recalculate-targets`, {
+        method: 'DELETE',
+        headers: {
+            'Authorization': `Bearer ${authToken}`
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            if (data.error === 'Yetkisiz erişim') {
+                logout();
+                return;
+            }
+            alert('Hata: ' + data.error);
+        }
+        loadRecalculationStatus();
+    })
+    .catch(error => {
+        console.error('Yeniden hesaplama durdurma hatası:', error);
+        alert('Yeniden hesaplama durdurulurken hata oluştu.');
+    });
+}
+
 // Activity chart çiz
 function drawActivityChart(data) {
     const ctx = document.getElementById('activityChart');
@@ -254,9 +368,18 @@ function drawActivityChart(data) {
 }
 
 // Kullanıcıları yükle
+let usersCursors = [null];
+
 function loadUsers(page = 1) {
     const search = document.getElementById('userSearch')?.value || '';
-    const url = `${API_BASE_URL}/admin/users?page=${page}&limit=20${search ? `&search=${encodeURIComponent(search)}` : ''}`;
+    if (page === 1) {
+        usersCursors = [null];
+    }
+    const cursor = usersCursors[page - 1];
+    if (cursor === undefined) {
+        return;
+    }
+    const url = `${API_BASE_URL}/admin/users?limit=20${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}${search ? `&search=${encodeURIComponent(search)}` : ''}`;
     
     document.getElementById('usersTable').innerHTML = '<div class="loading"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Yükleniyor...</span></div></div>';
     
@@ -273,8 +396,12 @@ function loadUsers(page = 1) {
             }
             return;
         }
+        usersCursors = usersCursors.slice(0, page);
+        if (data.has_more) {
+            usersCursors.push(data.next_cursor);
+        }
         displayUsers(data.users || []);
-        displayUsersPagination(data.total || 0, data.page || 1, data.limit || 20);
+        displayCursorPagination('usersPagination', 'loadUsers', page, data.has_more, data.total);
     })
     .catch(error => {
         console.error('Kullanıcı yükleme hatası:', error);
@@ -331,26 +458,6 @@ function displayUsers(users) {
     document.getElementById('usersTable').innerHTML = table;
 }
 
-// Kullanıcı pagination göster
-function displayUsersPagination(total, page, limit) {
-    const totalPages = Math.ceil(total / limit);
-    const pagination = document.getElementById('usersPagination');
-    
-    if (totalPages <= 1) {
-        pagination.innerHTML = '';
-        return;
-    }
-    
-    let html = '<nav><ul class="pagination">';
-    for (let i = 1; i <= totalPages; i++) {
-        html += `<li class="page-item ${i === page ? 'active' : ''}">
-            <a class="page-link" href="#" onclick="loadUsers(${i}); return false;">${i}</a>
-        </li>`;
-    }
-    html += '</ul></nav>';
-    pagination.innerHTML = html;
-}
-
 // Kullanıcı düzenle
 function editUser(userId) {
     fetch(`${API_BASE_URL}/admin/users/${userId}`, {
@@ -570,9 +677,18 @@ function deleteUser(userId) {
 }
 
 // Besinleri yükle
+let foodsCursors = [null];
+
 function loadFoods(page = 1) {
     const search = document.getElementById('foodSearch')?.value || '';
-    const url = `${API_BASE_URL}/admin/foods?page=${page}&limit=50${search ? `&search=${encodeURIComponent(search)}` : ''}`;
+    if (page === 1) {
+        foodsCursors = [null];
+    }
+    const cursor = foodsCursors[page - 1];
+    if (cursor === undefined) {
+        return;
+    }
+    const url = `${API_BASE_URL}/admin/foods?limit=50${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}${search ? `&search=${encodeURIComponent(search)}` : ''}`;
     
     document.getElementById('foodsTable').innerHTML = '<div class="loading"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Yükleniyor...</span></div></div>';
     
@@ -589,8 +705,12 @@ function loadFoods(page = 1) {
             }
             return;
         }
+        foodsCursors = foodsCursors.slice(0, page);
+        if (data.has_more) {
+            foodsCursors.push(data.next_cursor);
+        }
         displayFoods(data.foods || []);
-        displayFoodsPagination(data.total || 0, data.page || 1, data.limit || 50);
+        displayCursorPagination('foodsPagination', 'loadFoods', page, data.has_more, data.total);
     })
     .catch(error => {
         console.error('Besin yükleme hatası:', error);
@@ -644,26 +764,6 @@ function displayFoods(foods) {
     document.getElementById('foodsTable').innerHTML = table;
 }
 
-// Besin pagination göster
-function displayFoodsPagination(total, page, limit) {
-    const totalPages = Math.ceil(total / limit);
-    const pagination = document.getElementById('foodsPagination');
-    
-    if (totalPages <= 1) {
-        pagination.innerHTML = '';
-        return;
-    }
-    
-    let html = '<nav><ul class="pagination">';
-    for (let i = 1; i <= totalPages; i++) {
-        html += `<li class="page-item ${i === page ? 'active' : ''}">
-            <a class="page-link" href="#" onclick="loadFoods(${i}); return false;">${i}</a>
-        </li>`;
-    }
-    html += '</ul></nav>';
-    pagination.innerHTML = html;
-}
-
 // Besin ekle
 function handleAddFood(e) {
     e.preventDefault();
@@ -744,13 +844,26 @@ function deleteFood(foodId) {
     });
 }
 
-// Logları yükle
+// Logları yükle (imleç tabanlı sayfalama: logsCursors[i] = (i+1). sayfanın imleci)
+let logsCursors = [null];
+let logsTotal = null;
+
 function loadLogs(page = 1) {
     const logType = document.getElementById('logTypeFilter')?.value || 'all';
     const dateFrom = document.getElementById('logDateFrom')?.value || null;
     const dateTo = document.getElementById('logDateTo')?.value || null;
     
-    let url = `${API_BASE_URL}/admin/logs?page=${page}&limit=50&type=${logType}`;
+    if (page === 1) {
+        logsCursors = [null];
+    }
+    const cursor = logsCursors[page - 1];
+    if (cursor === undefined) {
+        return;
+    }
+    
+    let url = `${API_BASE_URL}/admin/logs?limit=50&type=${logType}`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+    if (page === 1) url += '&include_total=1';
     if (dateFrom) url += `&date_from=${dateFrom}`;
     if (dateTo) url += `&date_to=${dateTo}`;
     
@@ -769,8 +882,15 @@ function loadLogs(page = 1) {
             }
             return;
         }
+        if (data.total !== undefined) {
+            logsTotal = data.total;
+        }
+        logsCursors = logsCursors.slice(0, page);
+        if (data.has_more) {
+            logsCursors.push(data.next_cursor);
+        }
         displayLogs(data.logs || []);
-        displayLogsPagination(data.total || 0, data.page || 1, data.limit || 50);
+        displayCursorPagination('logsPagination', 'loadLogs', page, data.has_more, logsTotal);
     })
     .catch(error => {
         console.error('Log yükleme hatası:', error);
@@ -855,23 +975,176 @@ function displayLogs(logs) {
     document.getElementById('logsTable').innerHTML = table;
 }
 
-// Log pagination göster
-function displayLogsPagination(total, page, limit) {
-    const totalPages = Math.ceil(total / limit);
-    const pagination = document.getElementById('logsPagination');
+// HTML özel karakterlerini kaçır (SQL metni ve plan satırları için)
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+// Yavaş sorgu kaydını yükle (istek sunucunun hangi worker'ına düşerse onun kaydı gelir)
+function loadSlowQueries() {
+    const loading = '<div class="loading"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Yükleniyor...</span></div></div>';
+    document.getElementById('slowQueryShapesTable').innerHTML = loading;
+    document.getElementById('slowQueryEntriesTable').innerHTML = '';
+    
+    fetch(`${API_BASE_URL}/admin/db/slow-queries?limit=50`, {
+        headers: {
+            'Authorization': `Bearer ${authToken}`
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            if (data.error === 'Yetkisiz erişim') {
+                logout();
+            }
+            return;
+        }
+        document.getElementById('slowQueriesInfo').innerHTML = `
+            <div class="alert alert-info">
+                Eşik: <strong>${data.threshold_ms} ms</strong> &middot;
+                Toplam yavaş sorgu: <strong>${data.total}</strong> &middot;
+                Kayıt boyutu: ${data.size} &middot; Worker PID: ${data.pid}
+            </div>
+        `;
+        displaySlowQueries(data);
+    })
+    .catch(error => {
+        console.error('Yavaş sorgu yükleme hatası:', error);
+        document.getElementById('slowQueryShapesTable').innerHTML = '<div class="alert alert-danger">Yavaş sorgular yüklenirken hata oluştu.</div>';
+    });
+}
+
+// Plan satırlarını göster
+function formatQueryPlan(plan) {
+    if (!plan || plan.length === 0) {
+        return '<small class="text-muted">-</small>';
+    }
+    return `<pre class="mb-0"><small>${plan.map(escapeHtml).join('\n')}</small></pre>`;
+}
+
+// Yavaş sorgu tablolarını göster
+function displaySlowQueries(data) {
+    const shapes = data.shapes || [];
+    const entries = data.entries || [];
+    
+    if (shapes.length === 0) {
+        document.getElementById('slowQueryShapesTable').innerHTML = '<div class="alert alert-info">Yavaş sorgu bulunamadı.</div>';
+    } else {
+        const rows = shapes.map(shape => `
+            <tr>
+                <td><code>${escapeHtml(shape.sql)}</code></td>
+                <td>${shape.count}</td>
+                <td>${shape.total_ms}</td>
+                <td>${shape.avg_ms}</td>
+                <td>${shape.max_ms}</td>
+                <td><small>${escapeHtml(shape.route)}</small></td>
+                <td>${formatQueryPlan(shape.plan)}</td>
+            </tr>
+        `).join('');
+        document.getElementById('slowQueryShapesTable').innerHTML = `
+            <table class="table table-striped table-hover">
+                <thead>
+                    <tr>
+                        <th>SQL</th>
+                        <th>Adet</th>
+                        <th>Toplam (ms)</th>
+                        <th>Ort. (ms)</th>
+                        <th>Maks. (ms)</th>
+                        <th>Son Route</th>
+                        <th>Plan</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    ${rows}
+                </tbody>
+            </table>
+        `;
+    }
+    
+    if (entries.length === 0) {
+        document.getElementById('slowQueryEntriesTable').innerHTML = '<div class="alert alert-info">Kayıt yok.</div>';
+        return;
+    }
+    const rows = entries.map(entry => `
+        <tr>
+            <td><small>${new Date(entry.time).toLocaleString('tr-TR')}</small></td>
+            <td>${entry.duration_ms}</td>
+            <td><small>${escapeHtml(entry.route)}</small></td>
+            <td><code>${escapeHtml(entry.sql)}</code><br><small class="text-muted">Parametreler: ${escapeHtml(entry.parameters)}</small></td>
+            <td>${formatQueryPlan(entry.plan)}</td>
+        </tr>
+    `).join('');
+    document.getElementById('slowQueryEntriesTable').innerHTML = `
+        <table class="table table-striped table-hover">
+            <thead>
+                <tr>
+                    <th>Zaman</th>
+                    <th>Süre (ms)</th>
+                    <th>Route</th>
+                    <th>SQL</th>
+                    <th>Plan</th>
+                </tr>
+            </thead>
+            <tbody>
+                ${rows}
+            </tbody>
+        </table>
+    `;
+}
+
+// Yavaş sorgu kaydını temizle
+function clearSlowQueries() {
+    if (!confirm('Bu worker\'ın yavaş sorgu kaydını temizlemek istediğinizden emin misiniz?')) {
+        return;
+    }
+    fetch(`${API_BASE_URL}/admin/db/slow-queries`, {
+        method: 'DELETE',
+        headers: {
+            'Authorization': `Bearer ${authToken}`
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            if (data.error === 'Yetkisiz erişim') {
+                logout();
+                return;
+            }
+            alert('Hata: ' + data.error);
+            return;
+        }
+        loadSlowQueries();
+    })
+    .catch(error => {
+        console.error('Yavaş sorgu temizleme hatası:', error);
+        alert('Yavaş sorgular temizlenirken hata oluştu.');
+    });
+}
+
+// İmleç tabanlı pagination göster (önceki / sonraki)
+function displayCursorPagination(elementId, loadFunction, page, hasMore, total) {
+    const pagination = document.getElementById(elementId);
     
-    if (totalPages <= 1) {
-        pagination.innerHTML = '';
+    if (page <= 1 && !hasMore) {
+        pagination.innerHTML = total !== null && total !== undefined ? `<small class="text-muted">Toplam: ${total}</small>` : '';
         return;
     }
     
-    let html = '<nav><ul class="pagination">';
-    for (let i = 1; i <= totalPages; i++) {
-        html += `<li class="page-item ${i === page ? 'active' : ''}">
-            <a class="page-link" href="#" onclick="loadLogs(${i}); return false;">${i}</a>
-        </li>`;
+    let html = '<nav class="d-flex align-items-center gap-3"><ul class="pagination mb-0">';
+    html += `<li class="page-item ${page <= 1 ? 'disabled' : ''}">
+        <a class="page-link" href="#" onclick="${loadFunction}(${page - 1}); return false;">&laquo; Önceki</a>
+    </li>`;
+    html += `<li class="page-item active"><span class="page-link">${page}</span></li>`;
+    html += `<li class="page-item ${hasMore ? '' : 'disabled'}">
+        <a class="page-link" href="#" onclick="${loadFunction}(${page + 1}); return false;">Sonraki &raquo;</a>
+    </li>`;
+    html += '</ul>';
+    if (total !== null && total !== undefined) {
+        html += `<small class="text-muted">Toplam: ${total}</small>`;
     }
-    html += '</ul></nav>';
+    html += '</nav>';
     pagination.innerHTML = html;
 }
 
@@ -893,6 +1166,10 @@ window.showSection = showSection;
 window.loadUsers = loadUsers;
 window.loadFoods = loadFoods;
 window.loadLogs = loadLogs;
+window.loadSlowQueries = loadSlowQueries;
+window.clearSlowQueries = clearSlowQueries;
+window.startRecalculation = startRecalculation;
+window.stopRecalculation = stopRecalculation;
 window.editUser = editUser;
 window.saveUserEdit = saveUserEdit;
 window.showChangePasswordModal = showChangePasswordModal;
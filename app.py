@@ -1,14 +1,35 @@
 """
 Diyet Takip Uygulaması - Backend API
 """
-from flask import Flask, request, jsonify, send_from_directory
+from flask import (Flask, request, jsonify, send_from_directory, g, has_app_context, has_request_context,
+                   make_response, stream_with_context)
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 from datetime import datetime, timedelta
+from array import array
+from collections import OrderedDict, deque
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+import base64
+import bisect
 import sqlite3
 import bcrypt
+import csv
+import functools
+import hashlib
+import heapq
+import hmac
+import io
+import itertools
+import json
+import math
+import operator
 import os
+import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Environment variables yükle (varsa)
 try:
@@ -34,7 +55,8 @@ if cors_origins != '*':
     cors_origins = [origin.strip() for origin in cors_origins.split(',')]
 # Mobil uygulamalar için CORS ayarları (tüm origin'lere izin ver)
 CORS(app, origins=cors_origins if isinstance(cors_origins, list) else '*', 
-     allow_headers=['Content-Type', 'Authorization'],
+     allow_headers=['Content-Type', 'Authorization', 'If-None-Match'],
+     expose_headers=['ETag', 'Retry-After'],
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
 
 jwt = JWTManager(app)
@@ -139,7 +161,7 @@ def init_db():
         if not admin_user:
             # Admin kullanıcısı yok, oluştur
             if is_admin_column_exists:
-                admin_password = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                admin_password = hash_password('admin123')
                 cursor.execute('''
                     INSERT INTO users (email, password, name, is_admin, created_at)
                     VALUES (?, ?, ?, ?, ?)
@@ -150,7 +172,7 @@ def init_db():
                     cursor.execute('ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0')
                     conn.commit()
                     is_admin_column_exists = True
-                    admin_password = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    admin_password = hash_password('admin123')
                     cursor.execute('''
                         INSERT INTO users (email, password, name, is_admin, created_at)
                         VALUES (?, ?, ?, ?, ?)
@@ -183,7 +205,7 @@ def init_db():
                 cursor.execute('SELECT id FROM users WHERE email = ?', ('admin@diyettakip.com',))
                 admin_user = cursor.fetchone()
                 if not admin_user:
-                    admin_password = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    admin_password = hash_password('admin123')
                     cursor.execute('''
                         INSERT INTO users (email, password, name, is_admin, created_at)
                         VALUES (?, ?, ?, ?, ?)
@@ -305,44 +327,1709 @@ def init_db():
     ''')
     
     conn.commit()
+
+    # Şema migration'larını uygula (indeksler vb.)
+    apply_migrations(conn)
+
     conn.close()
     print("Veritabani hazir!")
 
+# Kullanıcı başına günlük toplamlar - log yazılırken aynı transaction içinde güncellenir
+DAILY_SUMMARIES_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_summaries (
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        calories REAL NOT NULL DEFAULT 0,
+        protein REAL NOT NULL DEFAULT 0,
+        carbs REAL NOT NULL DEFAULT 0,
+        fat REAL NOT NULL DEFAULT 0,
+        water REAL NOT NULL DEFAULT 0,
+        exercise_calories REAL NOT NULL DEFAULT 0,
+        meal_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date)
+    ) WITHOUT ROWID
+'''
+
+# Ham log tablolarından özetleri yeniden oluştur ({where}: opsiyonel kullanıcı filtresi)
+DAILY_SUMMARIES_REBUILD_SQL = '''
+    INSERT INTO daily_summaries (user_id, date, calories, protein, carbs, fat, water,
+                                 exercise_calories, meal_count)
+    SELECT user_id, date, SUM(calories), SUM(protein), SUM(carbs), SUM(fat), SUM(water),
+           SUM(exercise_calories), SUM(meal_count)
+    FROM (
+        SELECT user_id, date, COALESCE(calories, 0) AS calories, COALESCE(protein, 0) AS protein,
+               COALESCE(carbs, 0) AS carbs, COALESCE(fat, 0) AS fat, 0 AS water,
+               0 AS exercise_calories, 1 AS meal_count
+        FROM daily_logs {where}
+        UNION ALL
+        SELECT user_id, date, 0, 0, 0, 0, COALESCE(amount, 0), 0, 0 FROM water_logs {where}
+        UNION ALL
+        SELECT user_id, date, 0, 0, 0, 0, 0, COALESCE(calories_burned, 0), 0 FROM exercise_logs {where}
+    )
+    GROUP BY user_id, date
+'''
+
+# Barkodlar GTIN olarak saklanır: EAN-13 / UPC-A (başına 0 eklenmiş) 13 hane, EAN-8 8 hane
+def normalize_barcode(code):
+    """EAN-8 / EAN-13 / UPC-A (ve GTIN-14) barkodunu kanonik hale getir, geçersizse None döndür"""
+    digits = re.sub(r'[\s-]', '', str(code))
+    if not (digits.isascii() and digits.isdigit()) or not 8 <= len(digits) <= 14:
+        return None
+    # Okuyucuların eklediği / düşürdüğü baştaki sıfırlar GTIN-14'e tamamlanınca aynı koda döner
+    gtin = digits.zfill(14)
+    total = sum(int(digit) * (3 if index % 2 == 0 else 1) for index, digit in enumerate(gtin[:13]))
+    if (10 - total % 10) % 10 != int(gtin[13]):
+        return None
+    if gtin.startswith('000000'):
+        return gtin[6:]   # EAN-8
+    if gtin[0] == '0':
+        return gtin[1:]   # EAN-13 / UPC-A
+    return gtin
+
+def parse_barcode_field(value):
+    """İstek gövdesindeki barcode alanı - boşsa None, geçersizse ValueError"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    barcode = normalize_barcode(value)
+    if barcode is None:
+        raise ValueError('Geçersiz barkod (EAN-8, EAN-13, UPC-A)')
+    return barcode
+
+def migrate_food_barcodes(cursor):
+    """Mevcut barkodları normalize et, tekrar edenleri ayıkla ve benzersiz (partial) indeksi oluştur"""
+    cursor.execute('SELECT id, barcode FROM foods WHERE barcode IS NOT NULL ORDER BY id')
+    seen = {}
+    updates = []
+    duplicates = []
+    for food_id, barcode in cursor.fetchall():
+        raw = str(barcode).strip()
+        # Geçersiz barkodlar silinmez, olduğu gibi kalır (aramada hiçbir zaman eşleşmez)
+        normalized = (normalize_barcode(raw) or raw) if raw else None
+        if normalized in seen:
+            duplicates.append((food_id, seen[normalized], barcode))
+            normalized = None
+        if normalized is not None:
+            seen[normalized] = food_id
+        if normalized != barcode:
+            updates.append((normalized, food_id))
+    cursor.executemany('UPDATE foods SET barcode = ? WHERE id = ?', updates)
+    if duplicates:
+        # Silinen barkodlar kaybolmasın: operatör her satırı korunan kayıtla karşılaştırıp elle düzeltebilir
+        print(f"UYARI: {len(duplicates)} besinde tekrar eden barkod kaldirildi (ilk kayit korundu):")
+        for food_id, kept_id, barcode in duplicates:
+            print(f"  besin #{food_id}: barkod {barcode!r} kaldirildi (besin #{kept_id} ile ayni)")
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_foods_barcode ON foods (barcode) WHERE barcode IS NOT NULL')
+
+# Delta senkronizasyonda izlenen kullanıcı tabloları: (tablo, kullanıcı kolonu)
+SYNC_CHANGE_TABLES = (
+    ('daily_logs', 'user_id'),
+    ('water_logs', 'user_id'),
+    ('exercise_logs', 'user_id'),
+    ('weight_logs', 'user_id'),
+    ('favorite_foods', 'user_id'),
+    ('users', 'id'),
+)
+
+# Şema migration'ları - PRAGMA user_version ile versiyonlanır, her biri bir kez çalışır
+SCHEMA_MIGRATIONS = [
+    (1, 'Kullanici/tarih ve created_at indeksleri', [
+        # Kullanıcı + tarih filtreleri (SUM sorguları için covering)
+        'CREATE INDEX IF NOT EXISTS idx_daily_logs_user_date ON daily_logs (user_id, date, calories, protein, carbs, fat)',
+        'CREATE INDEX IF NOT EXISTS idx_water_logs_user_date ON water_logs (user_id, date, amount)',
+        'CREATE INDEX IF NOT EXISTS idx_exercise_logs_user_date ON exercise_logs (user_id, date, calories_burned)',
+        'CREATE INDEX IF NOT EXISTS idx_weight_logs_user_date ON weight_logs (user_id, date, weight)',
+        'CREATE INDEX IF NOT EXISTS idx_favorite_foods_food ON favorite_foods (food_id)',
+        # Admin log akışı (ORDER BY created_at DESC)
+        'CREATE INDEX IF NOT EXISTS idx_daily_logs_created ON daily_logs (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_water_logs_created ON water_logs (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_exercise_logs_created ON exercise_logs (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_weight_logs_created ON weight_logs (created_at)',
+        # Admin istatistikleri (aktif kullanıcı / günlük aktivite)
+        'CREATE INDEX IF NOT EXISTS idx_daily_logs_date_user ON daily_logs (date, user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_users_admin_created ON users (is_admin, created_at)',
+        'ANALYZE',
+    ]),
+    (2, 'Gunluk ozet tablosu (daily_summaries)', [
+        DAILY_SUMMARIES_TABLE_SQL,
+        'DELETE FROM daily_summaries',
+        DAILY_SUMMARIES_REBUILD_SQL.format(where=''),
+    ]),
+    (3, 'Besin arama indeksi (FTS5)', [
+        lambda cursor: create_food_search_index(cursor),
+    ]),
+    (4, 'Degisiklik sayaclari (change_counters)', [
+        '''
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        ''',
+        "INSERT OR IGNORE INTO change_counters (name, version) VALUES ('foods', 0)",
+        # foods tablosundaki her değişiklik (script'ler dahil) versiyonu artırır
+        '''
+        CREATE TRIGGER IF NOT EXISTS foods_version_insert AFTER INSERT ON foods BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'foods';
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS foods_version_update AFTER UPDATE ON foods BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'foods';
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS foods_version_delete AFTER DELETE ON foods BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'foods';
+        END
+        ''',
+    ]),
+    (5, 'Tarif ve kullanici bazli degisiklik sayaclari', [
+        "INSERT OR IGNORE INTO change_counters (name, version) VALUES ('recipes', 0)",
+    ] + [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS recipes_version_{event.lower()} AFTER {event} ON recipes BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'recipes';
+        END
+        ''' for event in ('INSERT', 'UPDATE', 'DELETE')
+    ] + [
+        # 'user:<id>' sayacı: profil, kilo geçmişi ve favoriler değişince artar
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_user_version_{event.lower()} AFTER {event} ON {table} BEGIN
+            INSERT INTO change_counters (name, version) VALUES ('user:' || {row}.{column}, 1)
+            ON CONFLICT (name) DO UPDATE SET version = version + 1;
+        END
+        ''' for table, column, events in (
+            ('users', 'id', ('UPDATE', 'DELETE')),
+            ('weight_logs', 'user_id', ('INSERT', 'UPDATE', 'DELETE')),
+            ('favorite_foods', 'user_id', ('INSERT', 'DELETE')),
+        ) for event in events for row in [('old' if event == 'DELETE' else 'new')]
+    ]),
+    (6, 'Toplu senkronizasyon idempotency anahtarlari (sync_requests)', [
+        '''
+        CREATE TABLE IF NOT EXISTS sync_requests (
+            user_id INTEGER NOT NULL,
+            idempotency_key TEXT NOT NULL,
+            entry_type TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, idempotency_key)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (7, 'Delta senkronizasyon degisiklik gunlugu (sync_changes)', [
+        # Satır başına tek kayıt: her değişiklik eski kaydı silip yeni (daha büyük) seq ile ekler
+        '''
+        CREATE TABLE IF NOT EXISTS sync_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            UNIQUE (table_name, row_id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_sync_changes_user_seq ON sync_changes (user_id, seq)',
+    ] + [
+        f'''
+        INSERT OR REPLACE INTO sync_changes (user_id, table_name, row_id, op)
+        SELECT {column}, '{table}', id, 'upsert' FROM {table} ORDER BY id
+        ''' for table, column in SYNC_CHANGE_TABLES
+    ] + [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_{event.lower()} AFTER {event} ON {table} BEGIN
+            INSERT OR REPLACE INTO sync_changes (user_id, table_name, row_id, op)
+            VALUES ({row}.{column}, '{table}', {row}.id, '{op}');
+        END
+        ''' for table, column in SYNC_CHANGE_TABLES
+        for event in ('INSERT', 'UPDATE', 'DELETE')
+        for row, op in [('old', 'delete') if event == 'DELETE' else ('new', 'upsert')]
+    ]),
+    (8, 'Admin listeleri icin keyset indeksleri', [
+        # Besin listesi (ORDER BY name, id) - kullanıcılar için idx_users_admin_created yeterli
+        'CREATE INDEX IF NOT EXISTS idx_foods_name ON foods (name)',
+    ]),
+    (9, 'Barkod normalizasyonu ve benzersiz barkod indeksi', [
+        lambda cursor: migrate_food_barcodes(cursor),
+    ]),
+    (10, 'Hedef yeniden hesaplama isleri (recalculation_jobs)', [
+        '''
+        CREATE TABLE IF NOT EXISTS recalculation_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL,
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            updated INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            chunk_size INTEGER NOT NULL,
+            owner TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            heartbeat_at TEXT NOT NULL,
+            finished_at TEXT
+        )
+        ''',
+    ]),
+    (11, 'Suresi dolan idempotency anahtarlari icin indeks (sync_requests.created_at)', [
+        'CREATE INDEX IF NOT EXISTS idx_sync_requests_created ON sync_requests (created_at)',
+    ]),
+]
+
+def apply_migrations(conn):
+    """Uygulanmamış şema migration'larını sırayla çalıştır"""
+    cursor = conn.cursor()
+    current_version = cursor.execute('PRAGMA user_version').fetchone()[0]
+
+    for version, description, statements in SCHEMA_MIGRATIONS:
+        if version <= current_version:
+            continue
+        try:
+            cursor.execute('BEGIN')
+            for sql in statements:
+                # Basit SQL ifadesi veya cursor alan fonksiyon olabilir
+                if callable(sql):
+                    sql(cursor)
+                else:
+                    cursor.execute(sql)
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+            print(f"Migration {version} uygulandi: {description}")
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Migration {version} hatasi: {e}")
+            raise
+
+    global _food_search_enabled
+    _food_search_enabled = None
+    return cursor.execute('PRAGMA user_version').fetchone()[0]
+
+# Besin arama (FTS5) - Türkçe karakterler katlanarak indekslenir:
+# İ/ı -> i burada, ş/ğ/ç/ö/ü ve büyük/küçük harf unicode61 tokenizer'da
+FOOD_SEARCH_WEIGHTS = (10.0, 2.0)  # bm25 ağırlıkları: name, category
+TR_FOLD_SQL = "replace(replace({}, 'İ', 'i'), 'ı', 'i')"
+TR_FOLD_TABLE = str.maketrans({'İ': 'i', 'ı': 'i'})
+_food_search_enabled = None
+
+def food_search_triggers():
+    """foods -> foods_fts senkron tetikleyicileri (isim: CREATE TRIGGER SQL)"""
+    name_sql = TR_FOLD_SQL.format('new.name')
+    category_sql = TR_FOLD_SQL.format('new.category')
+    return {
+        'foods_fts_insert': f'''
+            CREATE TRIGGER IF NOT EXISTS foods_fts_insert AFTER INSERT ON foods BEGIN
+                INSERT INTO foods_fts (rowid, name, category) VALUES (new.id, {name_sql}, {category_sql});
+            END
+        ''',
+        'foods_fts_delete': '''
+            CREATE TRIGGER IF NOT EXISTS foods_fts_delete AFTER DELETE ON foods BEGIN
+                DELETE FROM foods_fts WHERE rowid = old.id;
+            END
+        ''',
+        'foods_fts_update': f'''
+            CREATE TRIGGER IF NOT EXISTS foods_fts_update AFTER UPDATE OF name, category ON foods BEGIN
+                UPDATE foods_fts SET name = {name_sql}, category = {category_sql} WHERE rowid = old.id;
+            END
+        ''',
+    }
+
+def create_food_search_index(cursor):
+    """foods tablosu için FTS5 indeksini ve senkron tetikleyicilerini oluştur"""
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+                name, category,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite FTS5 olmadan derlenmişse LIKE araması kullanılmaya devam eder
+        print(f"FTS5 kullanilamiyor, LIKE aramasi kullanilacak: {e}")
+        return
+
+    for sql in food_search_triggers().values():
+        cursor.execute(sql)
+    cursor.execute('DELETE FROM foods_fts')
+    cursor.execute(f'''
+        INSERT INTO foods_fts (rowid, name, category)
+        SELECT id, {TR_FOLD_SQL.format('name')}, {TR_FOLD_SQL.format('category')} FROM foods
+    ''')
+
+def food_search_enabled(cursor):
+    """FTS5 indeksi var mı (süreç başına bir kez kontrol edilir)"""
+    global _food_search_enabled
+    if _food_search_enabled is None:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'foods_fts'")
+        _food_search_enabled = cursor.fetchone() is not None
+    return _food_search_enabled
+
+def food_match_query(search):
+    """Arama metnini FTS5 MATCH ifadesine çevir - her kelime önek (type-ahead) olarak aranır"""
+    tokens = re.findall(r'\w+', search.translate(TR_FOLD_TABLE))
+    return ' AND '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+def food_search_clause(cursor, search, category):
+    """Besin listesi için FROM/WHERE parçası, parametreler ve ORDER BY döndür"""
+    params = []
+    match = food_match_query(search) if search else ''
+    if match and food_search_enabled(cursor):
+        sql = 'FROM foods_fts JOIN foods ON foods.id = foods_fts.rowid WHERE foods_fts MATCH ?'
+        params.append(match)
+        order = 'bm25(foods_fts, {}, {}), foods.name'.format(*FOOD_SEARCH_WEIGHTS)
+    else:
+        sql = 'FROM foods WHERE 1=1'
+        if search:
+            sql += ' AND foods.name LIKE ?'
+            params.append(f'%{search}%')
+        order = 'foods.name'
+
+    if category:
+        sql += ' AND foods.category = ?'
+        params.append(category)
+    return sql, params, order
+
+def food_search_query(cursor, search, category, limit, offset=0):
+    """Besin listesi sorgusu - kategori filtresi yoksa sıralama/limit FTS tablosu içinde yapılır"""
+    match = food_match_query(search) if search else ''
+    if match and not category and food_search_enabled(cursor):
+        # bm25 önce sadece FTS tablosunda hesaplanır, foods ile yalnızca sayfadaki satırlar birleştirilir
+        sql = '''
+            SELECT foods.* FROM (
+                SELECT rowid, bm25(foods_fts, {}, {}) AS score FROM foods_fts
+                WHERE foods_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?
+            ) AS ranked
+            JOIN foods ON foods.id = ranked.rowid
+            ORDER BY ranked.score, foods.name
+        '''.format(*FOOD_SEARCH_WEIGHTS)
+        return sql, [match, limit, offset]
+
+    from_sql, params, order = food_search_clause(cursor, search, category)
+    return f'SELECT foods.* {from_sql} ORDER BY {order} LIMIT ? OFFSET ?', params + [limit, offset]
+
+# Sık çalışan sorgular - indekslerin kullanıldığını doğrulamak için (EXPLAIN QUERY PLAN)
+HOT_QUERIES = {
+    'daily_log': ('SELECT * FROM daily_logs WHERE user_id = ? AND date = ?', (1, '2024-01-01')),
+    'exercise_log': ('SELECT * FROM exercise_logs WHERE user_id = ? AND date = ?', (1, '2024-01-01')),
+    'weight_history': ('SELECT date, weight FROM weight_logs WHERE user_id = ? ORDER BY date ASC', (1,)),
+    'favorites': ('''
+        SELECT f.* FROM foods f
+        INNER JOIN favorite_foods ff ON f.id = ff.food_id
+        WHERE ff.user_id = ?
+        ORDER BY f.name
+    ''', (1,)),
+    'daily_summary': ('SELECT * FROM daily_summaries WHERE user_id = ? AND date = ?', (1, '2024-01-01')),
+    'stats_window': ('''
+        SELECT date, calories, protein, carbs, fat, water
+        FROM daily_summaries WHERE user_id = ? AND date >= ? AND date <= ?
+    ''', (1, '2024-01-01', '2024-01-31')),
+    'recent_activities': ('''
+        SELECT date, calories, meal_count FROM daily_summaries
+        WHERE user_id = ? AND meal_count > 0 ORDER BY date DESC LIMIT 7
+    ''', (1,)),
+    'monthly_top_foods': ('''
+        SELECT food_name, SUM(calories) as total_calories, COUNT(*) as count
+        FROM daily_logs
+        WHERE user_id = ? AND date >= ? AND date <= ?
+        GROUP BY food_name
+    ''', (1, '2024-01-01', '2024-01-31')),
+    'food_search': ('''
+        SELECT foods.* FROM foods_fts JOIN foods ON foods.id = foods_fts.rowid
+        WHERE foods_fts MATCH ? ORDER BY bm25(foods_fts, 10.0, 2.0), foods.name LIMIT 200
+    ''', ('"tav"*',)),
+    'admin_daily_feed': ('SELECT * FROM daily_logs ORDER BY created_at DESC LIMIT 50', ()),
+    'admin_water_feed': ('SELECT * FROM water_logs ORDER BY created_at DESC LIMIT 50', ()),
+    'admin_exercise_feed': ('SELECT * FROM exercise_logs ORDER BY created_at DESC LIMIT 50', ()),
+    'admin_weight_feed': ('SELECT * FROM weight_logs ORDER BY created_at DESC LIMIT 50', ()),
+    'admin_active_users': ('''
+        SELECT COUNT(DISTINCT user_id) FROM daily_logs WHERE date >= date('now', '-30 days')
+    ''', ()),
+    'food_barcode': ('SELECT * FROM foods WHERE barcode = ?', ('8690000000011',)),
+    'admin_users_page': ('''
+        SELECT id, email, name, created_at FROM users
+        WHERE is_admin = 0 AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 21
+    ''', ('2024-01-01', 1)),
+    'admin_foods_page': ('''
+        SELECT foods.* FROM foods WHERE 1=1 AND (foods.name, foods.id) > (?, ?) ORDER BY foods.name, foods.id LIMIT 51
+    ''', ('Elma', 1)),
+    'sync_changes': ('''
+        SELECT seq, table_name, row_id, op FROM sync_changes WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT 501
+    ''', (1, 0)),
+}
+
+def explain_hot_queries(conn):
+    """Her sık sorgunun EXPLAIN QUERY PLAN çıktısını döndür, tam tablo taramalarını işaretle"""
+    report = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        plan = [row[3] for row in rows]
+        # "SCAN tablo" (indekssiz) tam tablo taraması demektir
+        full_scans = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+        report[name] = {'plan': plan, 'full_scan': bool(full_scans)}
+    return report
+
 # Veritabanı helper fonksiyonları
+# Bağlantı havuzu ayarları (environment variable ile değiştirilebilir)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 16))            # Aynı anda kullanılabilecek en fazla bağlantı
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))     # Boş bağlantı bekleme süresi (saniye)
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16384))  # Bağlantı başına sayfa önbelleği (KiB)
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 268435456))      # 256 MB memory-mapped I/O
+
+# Her bağlantı açıldığında bir kez uygulanan PRAGMA'lar
+DB_PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    f'PRAGMA cache_size = -{DB_CACHE_SIZE_KB}',
+    f'PRAGMA mmap_size = {DB_MMAP_SIZE}',
+    f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}',
+    'PRAGMA temp_store = MEMORY',
+]
+
+# Yavaş sorgu kaydı - eşiği aşan sorgular SQL şekli, parametre tipleri, sorgu planı ve route ile tutulur
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))           # Bu süreyi aşan sorgular kaydedilir (ms)
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 200))  # Halka tamponundaki son kayıt sayısı
+SLOW_QUERY_MAX_SHAPES = 500                                       # Toplamı tutulan farklı SQL metni sayısı
+
+def describe_parameters(parameters):
+    """Parametre değerleri yerine tipleri (ardışık aynı tipler sayıyla): '(str, int×3)'"""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{name}: {type(value).__name__}' for name, value in parameters.items()) + '}'
+    groups = []
+    for value in parameters:
+        name = type(value).__name__
+        if groups and groups[-1][0] == name:
+            groups[-1][1] += 1
+        else:
+            groups.append([name, 1])
+    return '(' + ', '.join(name if count == 1 else f'{name}×{count}' for name, count in groups) + ')'
+
+class SlowQueryLog:
+    """
+    Eşiği aşan sorgular için halka tamponu (worker başına) + SQL metni bazında toplamlar.
+    Parametre değerleri saklanmaz, yalnızca tipleri. Sorgu planı aynı bağlantıda EXPLAIN QUERY PLAN ile
+    alınır ve SQL metni başına önbelleğe konur (yavaş sorgu tekrarlandıkça plan tekrar çalıştırılmaz).
+    """
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, size=SLOW_QUERY_LOG_SIZE, max_shapes=SLOW_QUERY_MAX_SHAPES):
+        self.threshold = threshold_ms / 1000
+        self.size = size
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+        self._shapes = OrderedDict()  # sql -> {'count', 'total', 'max', 'route', 'last_seen'}
+        self._plans = OrderedDict()   # sql -> plan satırları
+        self.total = 0
+
+    def _plan(self, connection, sql, text, parameters):
+        with self._lock:
+            if text in self._plans:
+                self._plans.move_to_end(text)
+                return self._plans[text]
+        try:
+            # Düz cursor: planı çalıştırmak yeniden kayıt/sayım tetiklemesin
+            rows = sqlite3.Cursor(connection).execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+        except sqlite3.Error:
+            return None
+        depth = {0: -1}
+        plan = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            plan.append('  ' * depth[node_id] + detail)
+        with self._lock:
+            self._plans[text] = plan
+            while len(self._plans) > self.max_shapes:
+                self._plans.popitem(last=False)
+        return plan
+
+    def record(self, cursor, sql, parameters, elapsed, many=False):
+        text = ' '.join(sql.split())
+        # executemany parametreleri tükenmiş olabilir; toplu yazmalarda plan yerine sadece süre tutulur
+        plan = None if many or parameters is None else self._plan(cursor.connection, sql, text, parameters)
+        if has_request_context():
+            route = f"{request.method} {request.url_rule.rule if request.url_rule is not None else request.path}"
+        else:
+            route = 'script'
+        now = datetime.now().isoformat(timespec='seconds')
+        entry = {
+            'time': now,
+            'duration_ms': round(elapsed * 1000, 3),
+            'sql': text,
+            'parameters': 'executemany' if many else describe_parameters(parameters),
+            'plan': plan,
+            'route': route,
+        }
+        with self._lock:
+            self.total += 1
+            self._entries.append(entry)
+            shape = self._shapes.get(text)
+            if shape is None:
+                shape = self._shapes[text] = {'count': 0, 'total': 0.0, 'max': 0.0}
+            self._shapes.move_to_end(text)
+            shape['count'] += 1
+            shape['total'] += elapsed
+            shape['max'] = max(shape['max'], elapsed)
+            shape['route'] = route
+            shape['last_seen'] = now
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._shapes.clear()
+            self.total = 0
+
+    def report(self, limit=50):
+        with self._lock:
+            entries = list(reversed(self._entries))
+            shapes = [{
+                'sql': text,
+                'count': shape['count'],
+                'total_ms': round(shape['total'] * 1000, 3),
+                'avg_ms': round(shape['total'] * 1000 / shape['count'], 3),
+                'max_ms': round(shape['max'] * 1000, 3),
+                'route': shape['route'],
+                'last_seen': shape['last_seen'],
+                'plan': self._plans.get(text),
+            } for text, shape in self._shapes.items()]
+            total = self.total
+        shapes.sort(key=lambda shape: shape['total_ms'], reverse=True)
+        return {
+            'threshold_ms': round(self.threshold * 1000, 3),
+            'size': self.size,
+            'total': total,
+            'shapes': shapes[:limit],
+            'entries': entries,
+        }
+
+slow_query_log = SlowQueryLog()
+
+def record_sql(cursor, sql, parameters, elapsed, many=False):
+    """İstek içindeyse sorgu sayısını ve süresini isteğin metriklerine ekle; eşiği aşarsa yavaş sorgu kaydı"""
+    if has_app_context():
+        stats = g.get('_sql_stats')
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+    if elapsed >= slow_query_log.threshold:
+        slow_query_log.record(cursor, sql, parameters, elapsed, many)
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Sorguları sayan ve süresini ölçen cursor - süre execute içindeki adımlamayı kapsar, sonraki fetch'leri değil"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_sql(self, sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_sql(self, sql, None, time.perf_counter() - start, many=True)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            record_sql(self, sql_script, None, time.perf_counter() - start)
+
+class PooledConnection(sqlite3.Connection):
+    """Havuzdan gelen bağlantı - close() bağlantıyı kapatmaz, havuza bırakır"""
+    pool = None
+    refs = 0
+
+    # Connection.execute* kısayolları cursor()'u çağırmadığı için ayrıca yönlendirilir
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        # Endpoint'ler conn.close() çağırmaya devam edebilir; commit edilmemiş
+        # değişiklikler eskiden olduğu gibi geri alınır, bağlantı açık kalır
+        if self.pool is None:
+            return super().close()
+        self.refs = max(self.refs - 1, 0)
+        if self.refs == 0 and self.in_transaction:
+            self.rollback()
+
+    def really_close(self):
+        super().close()
+
+class ConnectionPool:
+    """Thread başına bir adet hazır (PRAGMA'ları uygulanmış) SQLite bağlantısı tutar"""
+
+    def __init__(self, db_path, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._connections = {}  # thread -> bağlantı; ölen thread'lerinki acquire sırasında kapatılır
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+
+    def _connect(self):
+        # check_same_thread=False: bağlantıyı yalnızca sahibi kullanır, ama thread öldükten sonra
+        # başka bir thread kapatabilmeli
+        conn = sqlite3.connect(self.db_path, factory=PooledConnection, cached_statements=256,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        conn.pool = self
+        return conn
+
+    def _check_fork(self):
+        # Gunicorn --preload ile fork sonrası üst süreçten kalan bağlantıları kullanma
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._slots = threading.BoundedSemaphore(self.size)
+            self._connections = {}
+
+    def _close_connections(self, connections):
+        for conn in connections:
+            try:
+                conn.really_close()
+            except sqlite3.Error:
+                pass
+
+    def _prune_dead_threads(self):
+        """Sonlanmış thread'lerin bağlantılarını havuzdan çıkar (self._lock altında çağrılır)"""
+        dead = [thread for thread in self._connections if not thread.is_alive()]
+        return [self._connections.pop(thread) for thread in dead]
+
+    def acquire(self):
+        """Bu thread'in bağlantısını ver (gerekirse oluştur)"""
+        self._check_fork()
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise sqlite3.OperationalError('Veritabanı bağlantı havuzu dolu')
+        waited = time.perf_counter() - start
+
+        thread = threading.current_thread()
+        conn = self._connections.get(thread)
+        with self._lock:
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+            if waited > 0.001:
+                self.waits += 1
+            if conn is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+            with self._lock:
+                self._connections[thread] = conn
+                dead = self._prune_dead_threads()
+            self._close_connections(dead)
+        return conn
+
+    def release(self, conn):
+        """Bağlantıyı havuza geri bırak (açık transaction varsa geri al)"""
+        conn.refs = 0
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+        finally:
+            self._slots.release()
+
+    def discard(self, conn):
+        """Bozuk bağlantıyı havuzdan çıkar"""
+        with self._lock:
+            for thread, owned in list(self._connections.items()):
+                if owned is conn:
+                    del self._connections[thread]
+        self._close_connections([conn])
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        self._close_connections(connections.values())
+
+    def stats(self):
+        with self._lock:
+            dead = self._prune_dead_threads()
+        self._close_connections(dead)
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': self.size,
+                'open_connections': len(self._connections),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'total_wait_ms': round(self.wait_time * 1000, 3),
+                'avg_wait_ms': round(self.wait_time * 1000 / total, 3) if total else 0,
+                'max_wait_ms': round(self.max_wait_time * 1000, 3),
+            }
+
+db_pool = ConnectionPool(DB_NAME)
+
 def get_db():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
+    """Veritabanı bağlantısı - istek içinde thread'e ait hazır bağlantıyı döndürür"""
+    if not has_app_context():
+        # Script / CLI kullanımı: havuz dışında tek seferlik bağlantı
+        conn = sqlite3.connect(DB_NAME, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    conn = g.get('_db_conn')
+    if conn is None:
+        conn = db_pool.acquire()
+        g._db_conn = conn
+    conn.refs += 1
     return conn
 
+@app.teardown_appcontext
+def release_db(exception=None):
+    """İstek bitince bağlantıyı havuza geri bırak"""
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+# İstek metrikleri (worker başına) - route bazında gecikme ve SQL sorgu sayısı histogramları
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # saniye
+METRICS_SQL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+# /metrics "Authorization: Bearer <METRICS_TOKEN>" veya admin JWT'si ister; METRICS_PUBLIC=true yalnızca
+# uç noktanın dışarıya açık olmadığı özel ağlar içindir (kimlik doğrulaması kapanır)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'False').lower() == 'true'
+METRICS_N_PLUS_ONE_QUERIES = int(os.getenv('METRICS_N_PLUS_ONE_QUERIES', 20))  # İstek başına şüpheli sorgu sayısı
+
+class RouteMetrics:
+    """Tek bir (method, route) için sayaçlar"""
+    __slots__ = ('statuses', 'latency', 'latency_sum', 'sql', 'sql_sum', 'sql_max', 'sql_time', 'bytes')
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = [0] * (len(METRICS_LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.sql = [0] * (len(METRICS_SQL_BUCKETS) + 1)
+        self.sql_sum = 0
+        self.sql_max = 0
+        self.sql_time = 0.0
+        self.bytes = 0
+
+class RequestMetrics:
+    """
+    İstek süresi, istek başına SQL sorgu sayısı / süresi ve yanıt boyutu - route şablonu bazında.
+    Sayaçlar worker sürecine aittir; /metrics her worker'ın kendi değerlerini döndürür (pid etiketi).
+    Akan yanıtlarda (export) yalnızca akış başlayana kadarki süre ve SQL sayılır, boyut sayılmaz.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}  # (method, route) -> RouteMetrics
+        self.started = time.time()
+
+    def observe(self, method, route, status, seconds, sql_count, sql_time, size):
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency[bisect.bisect_left(METRICS_LATENCY_BUCKETS, seconds)] += 1
+            metrics.latency_sum += seconds
+            metrics.sql[bisect.bisect_left(METRICS_SQL_BUCKETS, sql_count)] += 1
+            metrics.sql_sum += sql_count
+            metrics.sql_max = max(metrics.sql_max, sql_count)
+            metrics.sql_time += sql_time
+            metrics.bytes += size
+
+    def _snapshot(self):
+        with self._lock:
+            return {key: (dict(m.statuses), list(m.latency), m.latency_sum, list(m.sql), m.sql_sum, m.sql_max,
+                          m.sql_time, m.bytes) for key, m in self.routes.items()}
+
+    @staticmethod
+    def _histogram(lines, name, labels, buckets, counts, total):
+        cumulative = 0
+        for bound, count in zip(buckets, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative + counts[-1]}')
+        lines.append(f'{name}_sum{{{labels}}} {total}')
+        lines.append(f'{name}_count{{{labels}}} {sum(counts)}')
+
+    def prometheus(self):
+        """Prometheus text exposition formatı (0.0.4)"""
+        routes = self._snapshot()
+        pid = os.getpid()
+        families = {
+            'requests': ['# HELP diyet_http_requests_total HTTP istek sayisi',
+                         '# TYPE diyet_http_requests_total counter'],
+            'latency': ['# HELP diyet_http_request_duration_seconds Istek suresi',
+                        '# TYPE diyet_http_request_duration_seconds histogram'],
+            'sql': ['# HELP diyet_http_request_sql_queries Istek basina SQL sorgu sayisi',
+                    '# TYPE diyet_http_request_sql_queries histogram'],
+            'sql_time': ['# HELP diyet_http_request_sql_seconds_total Isteklerde SQL execute suresi',
+                         '# TYPE diyet_http_request_sql_seconds_total counter'],
+            'bytes': ['# HELP diyet_http_response_bytes_total Serilestirilen yanit boyutu',
+                      '# TYPE diyet_http_response_bytes_total counter'],
+        }
+        for (method, route), (statuses, latency, latency_sum, sql, sql_sum, _, sql_time, size) in sorted(routes.items()):
+            route_label = route.replace('\\', '\\\\').replace('"', '\\"')
+            labels = f'method="{method}",route="{route_label}",pid="{pid}"'
+            for status, count in sorted(statuses.items()):
+                families['requests'].append(f'diyet_http_requests_total{{{labels},status="{status}"}} {count}')
+            self._histogram(families['latency'], 'diyet_http_request_duration_seconds', labels,
+                            METRICS_LATENCY_BUCKETS, latency, round(latency_sum, 6))
+            self._histogram(families['sql'], 'diyet_http_request_sql_queries', labels,
+                            METRICS_SQL_BUCKETS, sql, sql_sum)
+            families['sql_time'].append(f'diyet_http_request_sql_seconds_total{{{labels}}} {round(sql_time, 6)}')
+            families['bytes'].append(f'diyet_http_response_bytes_total{{{labels}}} {size}')
+
+        pool = db_pool.stats()
+        hashing = password_hasher.stats()
+        gauges = [
+            ('diyet_db_pool_open_connections', 'gauge', pool['open_connections']),
+            ('diyet_db_pool_waits_total', 'counter', pool['waits']),
+            ('diyet_db_pool_timeouts_total', 'counter', pool['timeouts']),
+            ('diyet_password_hash_pending', 'gauge', hashing['pending']),
+            ('diyet_password_hash_completed_total', 'counter', hashing['completed']),
+            ('diyet_password_hash_rejected_total', 'counter', hashing['rejected']),
+        ]
+        lines = [line for family in families.values() for line in family]
+        for name, kind, value in gauges:
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name}{{pid="{pid}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _percentile_ms(counts, p):
+        """Histogramdan yüzdelik (kovanın üst sınırı, ms) - son kovadaysa None"""
+        total = sum(counts)
+        if not total:
+            return 0
+        target = total * p
+        cumulative = 0
+        for bound, count in zip(METRICS_LATENCY_BUCKETS, counts):
+            cumulative += count
+            if cumulative >= target:
+                return round(bound * 1000, 1)
+        return None
+
+    def summary(self, limit=None):
+        """Admin paneli için route bazında özet; en çok toplam süre harcayanlar önce"""
+        routes = self._snapshot()
+        items = []
+        for (method, route), (statuses, latency, latency_sum, sql, sql_sum, sql_max, sql_time, size) in routes.items():
+            count = sum(latency)
+            items.append({
+                'method': method,
+                'route': route,
+                'requests': count,
+                'errors': sum(n for status, n in statuses.items() if status >= 500),
+                'total_ms': round(latency_sum * 1000, 1),
+                'avg_ms': round(latency_sum * 1000 / count, 2),
+                'p50_ms': self._percentile_ms(latency, 0.50),
+                'p95_ms': self._percentile_ms(latency, 0.95),
+                'p99_ms': self._percentile_ms(latency, 0.99),
+                'avg_sql_queries': round(sql_sum / count, 2),
+                'max_sql_queries': sql_max,
+                'avg_sql_ms': round(sql_time * 1000 / count, 3),
+                'bytes': size,
+            })
+        items.sort(key=lambda item: item['total_ms'], reverse=True)
+        return {
+            'pid': os.getpid(),
+            'uptime_s': round(time.time() - self.started),
+            'requests': sum(item['requests'] for item in items),
+            'routes': items[:limit] if limit else items,
+            # İstek başına sorgu sayısı eşiği aşan route'lar - döngü içinde sorgu (N+1) adayı
+            'n_plus_one_suspects': [f"{item['method']} {item['route']}" for item in items
+                                    if item['max_sql_queries'] >= METRICS_N_PLUS_ONE_QUERIES],
+        }
+
+request_metrics = RequestMetrics()
+
+@app.before_request
+def start_request_metrics():
+    g._metrics_start = time.perf_counter()
+    g._sql_stats = [0, 0.0]
+
+@app.after_request
+def finish_request_metrics(response):
+    # Durum ve boyut burada, süre ve SQL sayaçları teardown'da (hata durumları dahil) kaydedilir
+    g._metrics_response = (response.status_code, 0 if response.is_streamed else (response.content_length or 0))
+    return response
+
+@app.teardown_request
+def record_request_metrics(exception=None):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return
+    sql_count, sql_time = g.pop('_sql_stats', (0, 0.0))
+    status, size = g.pop('_metrics_response', (500, 0))
+    route = request.url_rule.rule if request.url_rule is not None else '<eslesmeyen>'
+    request_metrics.observe(request.method, route, status, time.perf_counter() - start, sql_count, sql_time, size)
+
+# Günlük özet helper fonksiyonları
+SUMMARY_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'water', 'exercise_calories', 'meal_count')
+
+DAILY_SUMMARY_UPSERT_SQL = '''
+    INSERT INTO daily_summaries (user_id, date, calories, protein, carbs, fat, water,
+                                 exercise_calories, meal_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        calories = calories + excluded.calories,
+        protein = protein + excluded.protein,
+        carbs = carbs + excluded.carbs,
+        fat = fat + excluded.fat,
+        water = water + excluded.water,
+        exercise_calories = exercise_calories + excluded.exercise_calories,
+        meal_count = meal_count + excluded.meal_count
+'''
+
+def bump_daily_summary(cursor, user_id, date, **deltas):
+    """Günlük özete ekleme yap (commit çağıran tarafta, log INSERT'i ile aynı transaction)"""
+    values = [deltas.get(field) or 0 for field in SUMMARY_FIELDS]
+    cursor.execute(DAILY_SUMMARY_UPSERT_SQL, [user_id, date] + values)
+
+def get_daily_summary(cursor, user_id, date):
+    """Bir günün özetini döndür (kayıt yoksa sıfırlar)"""
+    cursor.execute('SELECT * FROM daily_summaries WHERE user_id = ? AND date = ?', (user_id, date))
+    row = cursor.fetchone()
+    if not row:
+        return {field: 0 for field in SUMMARY_FIELDS}
+    return {field: row[field] for field in SUMMARY_FIELDS}
+
+def rebuild_daily_summaries(conn, user_id=None):
+    """Özetleri ham log tablolarından yeniden oluştur (tüm kullanıcılar veya tek kullanıcı)"""
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        if user_id is None:
+            cursor.execute('DELETE FROM daily_summaries')
+            cursor.execute(DAILY_SUMMARIES_REBUILD_SQL.format(where=''))
+        else:
+            cursor.execute('DELETE FROM daily_summaries WHERE user_id = ?', (user_id,))
+            cursor.execute(DAILY_SUMMARIES_REBUILD_SQL.format(where='WHERE user_id = ?'),
+                           (user_id, user_id, user_id))
+        cursor.execute('SELECT COUNT(*) FROM daily_summaries')
+        total = cursor.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return total
+
+# Değişiklik sayaçları - worker'lar arası önbellek geçersiz kılma için
+def get_change_version(cursor, name):
+    """Bir sayacın güncel versiyonu (PK araması, tabloyu taramaz)"""
+    cursor.execute('SELECT version FROM change_counters WHERE name = ?', (name,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def get_change_versions(cursor, names):
+    """Birden fazla sayacı tek sorguda oku (isim sırasıyla)"""
+    if not names:
+        return []
+    placeholders = ','.join('?' * len(names))
+    cursor.execute(f'SELECT name, version FROM change_counters WHERE name IN ({placeholders})', list(names))
+    versions = dict(cursor.fetchall())
+    return [versions.get(name, 0) for name in names]
+
+def bump_change_version(cursor, name):
+    """Sayacı artır (commit çağıran tarafta)"""
+    cursor.execute('''
+        INSERT INTO change_counters (name, version) VALUES (?, 1)
+        ON CONFLICT (name) DO UPDATE SET version = version + 1
+    ''', (name,))
+
+# Koşullu GET (ETag) - yanıt, sayaç versiyonları + istek parametreleriyle belirlenir
+def compute_etag(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+def conditional_get(scope, counters):
+    """
+    GET endpoint'leri için ETag / If-None-Match desteği.
+    scope: 'public' (herkes için aynı katalog) veya 'user' (kullanıcıya özel yanıt)
+    counters: (user_id, **view_kwargs) -> yanıtın bağlı olduğu change_counters isimleri
+    Versiyonlar sorgudan önce okunur; eşleşirse endpoint hiç çalışmadan 304 döner.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity() if scope == 'user' else None
+            names = counters(user_id, **kwargs)
+
+            conn = get_db()
+            versions = get_change_versions(conn.cursor(), names)
+            conn.close()
+            # Aynı istekteki önbellekler (UserCache) sayaçları tekrar okumadan doğrulayabilsin
+            g.change_versions = dict(zip(names, versions))
+
+            etag = compute_etag(request.path, sorted(request.args.items(multi=True)), user_id,
+                                names, versions)
+            cache_control = 'private, no-cache' if scope == 'user' else 'public, no-cache'
+
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            if scope == 'user':
+                response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
+
+def user_counter(user_id):
+    return f'user:{user_id}'
+
+# Kimliği doğrulanmış kullanıcı önbelleği (worker başına) - profil ve rol, 'user:<id>' sayacıyla geçerli
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 30))  # Sayaç kontrol edilmeden güvenilen süre (saniye)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 4096))
+USER_CACHE_COLUMNS = ('id', 'email', 'name', 'age', 'gender', 'height', 'weight', 'target_weight',
+                      'activity_level', 'goal', 'bmr', 'tdee', 'daily_calories', 'daily_protein',
+                      'daily_carbs', 'daily_fat', 'is_admin', 'created_at')
+
+class UserCache:
+    """
+    users satırlarının (şifre hariç) LRU kopyası - dönen dict salt okunur kullanılmalı.
+    TTL içinde DB'ye hiç gidilmez (JWT rol kontrolü sıfır okuma). TTL dolunca yalnızca 'user:<id>' sayacı
+    okunur, satır ancak sayaç değiştiyse yeniden yüklenir. Aynı worker'daki yazmalar invalidate() ile
+    anında, diğer worker'lardakiler en geç TTL sonunda görünür. conditional_get sayacı bu istekte zaten
+    okuduysa TTL beklenmeden o versiyonla doğrulanır; böylece ETag ile yanıt gövdesi tutarlı kalır.
+    """
+
+    def __init__(self, ttl=USER_CACHE_TTL, size=USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (sayaç versiyonu, kontrol zamanı, satır veya None)
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def get(self, user_id, cursor=None):
+        """Kullanıcı satırı (dict) ya da kullanıcı yoksa None"""
+        key = str(user_id)
+        counter = user_counter(key)
+        known = g.get('change_versions', {}).get(counter) if has_app_context() else None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] == known if known is not None else now - entry[1] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+        conn = get_db() if cursor is None else None
+        if conn is not None:
+            cursor = conn.cursor()
+        try:
+            # Önce versiyon, sonra satır: arada yazma olursa sonraki kontrol farkı görüp yeniden yükler
+            version = known if known is not None else get_change_version(cursor, counter)
+            if entry is not None and entry[0] == version:
+                user = entry[2]
+                revalidated = True
+            else:
+                cursor.execute(f'SELECT {", ".join(USER_CACHE_COLUMNS)} FROM users WHERE id = ?', (key,))
+                row = cursor.fetchone()
+                user = dict(row) if row else None
+                revalidated = False
+        finally:
+            if conn is not None:
+                conn.close()
+
+        with self._lock:
+            if revalidated:
+                self.revalidations += 1
+            else:
+                self.misses += 1
+            self._entries[key] = (version, now, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        """Bu worker'daki kopyayı at (commit'ten sonra çağrılır)"""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.revalidations + self.misses
+            return {
+                'entries': len(self._entries),
+                'size': self.size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'revalidations': self.revalidations,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.revalidations) / total, 4) if total else 0,
+            }
+
+user_cache = UserCache()
+
+# Besin kataloğu önbelleği (worker başına)
+CATALOG_CACHE_MAX_FOODS = int(os.getenv('CATALOG_CACHE_MAX_FOODS', 20000))  # Üstünde liste DB'den okunur
+CATALOG_CACHE_MAX_SEARCHES = int(os.getenv('CATALOG_CACHE_MAX_SEARCHES', 512))
+
+class FoodCatalogCache:
+    """Besin listesi, kategoriler ve arama sonuçları - change_counters['foods'] versiyonuyla geçerli"""
+
+    def __init__(self, max_foods=CATALOG_CACHE_MAX_FOODS, max_searches=CATALOG_CACHE_MAX_SEARCHES):
+        self.max_foods = max_foods
+        self.max_searches = max_searches
+        self._lock = threading.Lock()
+        self.version = None
+        self.foods = None        # İsme göre sıralı (katalog çok büyükse None)
+        self.by_category = {}
+        self.categories = []
+        self._searches = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def invalidate(self):
+        """Bu worker'daki önbelleği düşür (diğer worker'lar versiyon sayacından fark eder)"""
+        with self._lock:
+            self.version = None
+            self._searches.clear()
+
+    def sync(self, cursor):
+        """DB versiyonu değiştiyse kataloğu yeniden yükle"""
+        version = get_change_version(cursor, 'foods')
+        if version == self.version:
+            return self
+        with self._lock:
+            if version == self.version:
+                return self
+            cursor.execute('SELECT COUNT(*) FROM foods')
+            count = cursor.fetchone()[0]
+            foods = None
+            by_category = {}
+            if count <= self.max_foods:
+                cursor.execute('SELECT * FROM foods ORDER BY name')
+                foods = [dict(row) for row in cursor.fetchall()]
+                for food in foods:
+                    by_category.setdefault(food['category'], []).append(food)
+            cursor.execute('SELECT DISTINCT category FROM foods WHERE category IS NOT NULL ORDER BY category')
+            self.categories = [row[0] for row in cursor.fetchall()]
+            self.foods = foods
+            self.by_category = by_category
+            self._searches.clear()
+            self.version = version
+            self.reloads += 1
+        return self
+
+    def list_foods(self, cursor, category, limit):
+        """Aramasız liste (isme göre sıralı)"""
+        if self.foods is None:
+            query, params = food_search_query(cursor, '', category, limit)
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+        foods = self.by_category.get(category, []) if category else self.foods
+        return foods[:limit]
+
+    def search(self, cursor, search, category, limit):
+        """Arama sonuçları - aynı sorgu (type-ahead tekrarları) önbellekten döner"""
+        key = (search.strip().translate(TR_FOLD_TABLE).lower(), category, limit)
+        with self._lock:
+            foods = self._searches.get(key)
+            if foods is not None:
+                self._searches.move_to_end(key)
+                self.hits += 1
+                return foods
+            self.misses += 1
+            version = self.version
+
+        query, params = food_search_query(cursor, search, category, limit)
+        cursor.execute(query, params)
+        foods = [dict(row) for row in cursor.fetchall()]
+
+        with self._lock:
+            # Yükleme sırasında katalog değiştiyse eski sonucu saklama
+            if version == self.version:
+                self._searches[key] = foods
+                if len(self._searches) > self.max_searches:
+                    self._searches.popitem(last=False)
+        return foods
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self.version,
+                'foods': len(self.foods) if self.foods is not None else None,
+                'categories': len(self.categories),
+                'cached_searches': len(self._searches),
+                'search_hits': self.hits,
+                'search_misses': self.misses,
+                'reloads': self.reloads,
+            }
+
+food_catalog = FoodCatalogCache()
+
+# Barkod araması - okuyucu arayüzleri aynı kodu art arda sorgular
+BARCODE_CACHE_SIZE = int(os.getenv('BARCODE_CACHE_SIZE', 4096))
+
+class BarcodeCache:
+    """Barkod -> besin LRU'su (bulunamayan kodlar da saklanır) - besin versiyonu değişince boşaltılır"""
+
+    def __init__(self, size=BARCODE_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, cursor, barcode):
+        """Normalize edilmiş barkodun besini (yoksa None)"""
+        version = get_change_version(cursor, 'foods')
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            if barcode in self._entries:
+                self._entries.move_to_end(barcode)
+                self.hits += 1
+                return self._entries[barcode]
+            self.misses += 1
+
+        # idx_foods_barcode (benzersiz, partial) üzerinden tek satır araması
+        cursor.execute('SELECT * FROM foods WHERE barcode = ?', (barcode,))
+        row = cursor.fetchone()
+        food = dict(row) if row else None
+
+        with self._lock:
+            if version == self.version:
+                self._entries[barcode] = food
+                if len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return food
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0,
+            }
+
+barcode_cache = BarcodeCache()
+
+# Akıllı öneri motoru - besin kataloğunun sütun bazlı (dizi) kopyası üzerinde çalışır
+FILTER_OPS = {'>': operator.gt, '<': operator.lt, '<=': operator.le}
+
+def _to_float(value):
+    """Sayısal değer, NULL/geçersiz ise NaN (karşılaştırmalar SQL'deki gibi False döner)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _sort_key(value, descending):
+    # SQL sıralaması: NULL en küçük değerdir
+    if value != value:
+        return math.inf if descending else -math.inf
+    return -value if descending else value
+
+# Sıralı dizide filtrenin [başlangıç, bitiş) sınırı: (op, azalan) -> (sınır, bisect)
+# Sıralama anahtarları hep artandır (azalan sütunlar ters işaretle tutulur)
+SORTED_BOUNDS = {
+    ('>', False): ('start', bisect.bisect_right),
+    ('<', False): ('end', bisect.bisect_left),
+    ('<=', False): ('end', bisect.bisect_right),
+    ('>', True): ('end', bisect.bisect_left),
+    ('<', True): ('start', bisect.bisect_right),
+    ('<=', True): ('start', bisect.bisect_left),
+}
+
+class NutrientMatrix:
+    """
+    id + kalori/protein/karbonhidrat/yağ dizileri - katalog versiyonu değişince yeniden kurulur.
+    Her sıralama için satır indeksleri bir kez sıralanır (SQL indeksi gibi); kovalar bu sırada
+    yalnızca k eşleşme bulunana kadar yürür.
+    """
+    COLUMNS = ('calories', 'protein', 'carbs', 'fat')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.ids = array('q')
+        self.columns = {name: array('d') for name in self.COLUMNS}
+        self.rows = None  # Katalog önbellekteyse satır sözlükleri (aynı sırada)
+        self.orders = {}  # sıralama -> sıralı satır indeksleri
+        self._order_lock = threading.RLock()  # Aynı sıralamayı eşzamanlı istekler tekrar tekrar kurmasın
+        self.keys = {}    # (sütun, azalan) -> satır başına sıralama anahtarı
+
+    def sync(self, cursor):
+        catalog = food_catalog.sync(cursor)
+        version, foods = catalog.version, catalog.foods
+        if version == self.version:
+            return self
+        with self._lock:
+            if version == self.version:
+                return self
+            if foods is None:
+                cursor.execute('SELECT id, calories, protein, carbs, fat FROM foods')
+                source = cursor.fetchall()
+            else:
+                source = foods
+            ids = array('q', (row['id'] for row in source))
+            columns = {name: array('d', (_to_float(row[name]) for row in source)) for name in self.COLUMNS}
+            self.ids, self.columns, self.rows, self.orders, self.keys = ids, columns, foods, {}, {}
+            self.version = version
+        return self
+
+    @staticmethod
+    def _sort_keys(columns, keys, column, descending):
+        values = keys.get((column, descending))
+        if values is None:
+            source = columns[column]
+            values = array('d', map(operator.neg, source)) if descending else array('d', source)
+            # NULL (NaN) değerler SQL'deki gibi en küçük sayılır
+            for i in itertools.compress(range(len(source)), map(math.isnan, source)):
+                values[i] = _sort_key(source[i], descending)
+            keys[(column, descending)] = values
+        return values
+
+    def _permutation(self, ids, columns, orders, keys, order):
+        """Sıralamaya göre (eşitlikte id) satır indeksleri - kalan sıralama önbellekten, üstüne tek kararlı sıralama"""
+        permutation = orders.get(order)
+        if permutation is not None:
+            return permutation
+        with self._order_lock:
+            permutation = orders.get(order)
+            if permutation is None:
+                if order:
+                    column, direction = order[0]
+                    rest = self._permutation(ids, columns, orders, keys, order[1:])
+                    sort_keys = self._sort_keys(columns, keys, column, direction == 'desc')
+                    permutation = array('q', sorted(rest, key=sort_keys.__getitem__))
+                elif all(map(operator.lt, ids, itertools.islice(ids, 1, None))):
+                    permutation = array('q', range(len(ids)))
+                else:
+                    permutation = array('q', sorted(range(len(ids)), key=ids.__getitem__))
+                orders[order] = permutation
+        return permutation
+
+    def _filter_range(self, columns, keys, permutation, column, descending, filters):
+        """column'a göre sıralı permutation'da column filtrelerini sağlayan [başlangıç, bitiş) aralığı"""
+        sort_keys = self._sort_keys(columns, keys, column, descending)
+        start, end = 0, len(permutation)
+        for filter_column, op, value in filters:
+            if filter_column == column:
+                bound, search = SORTED_BOUNDS[(op, descending)]
+                position = search(permutation, -value if descending else value, key=sort_keys.__getitem__)
+                if bound == 'start':
+                    start = max(start, position)
+                else:
+                    end = min(end, position)
+        return start, max(start, end)
+
+    def top_k(self, cursor, buckets, k=5):
+        """
+        buckets: [(isim, [(sütun, op, değer), ...], [(sütun, 'asc'|'desc'), ...])]
+        Her kova kendi sıralamasında, ilk sütundaki filtrelerle bisect edilen aralıkta k eşleşme bulunana
+        kadar yürür. Başka bir sütundaki filtre daha dar bir aralık veriyorsa (ör. gün sonunda kalori <= 40)
+        yürüyüş o aralığın boyuyla sınırlanır; dolmazsa o aralıktaki adaylardan en iyi k seçilir.
+        Eşitlikte id sırası kullanılır. Dönüş: {isim: [besin sözlüğü, ...]}
+        """
+        ids, columns, rows, orders, keys = self.ids, self.columns, self.rows, self.orders, self.keys
+        selected = {}
+        for name, filters, order in buckets:
+            order = tuple(order)
+            checks = [(columns[column], FILTER_OPS[op], value) for column, op, value in filters]
+
+            def matches(i):
+                for column, op, value in checks:
+                    if not op(column[i], value):
+                        return False
+                return True
+
+            lead_column, lead_direction = order[0]
+            permutation = self._permutation(ids, columns, orders, keys, order)
+            start, end = self._filter_range(columns, keys, permutation, lead_column, lead_direction == 'desc', filters)
+
+            # En dar alternatif aralık: diğer filtre sütunlarının kendi sıralamasında (kurulmuş yön tercih edilir)
+            narrowest = None
+            for column in dict.fromkeys(column for column, _, _ in filters if column != lead_column):
+                direction = 'desc' if ((column, 'desc'),) in orders else 'asc'
+                candidates = self._permutation(ids, columns, orders, keys, ((column, direction),))
+                low, high = self._filter_range(columns, keys, candidates, column, direction == 'desc', filters)
+                if narrowest is None or high - low < narrowest[2] - narrowest[1]:
+                    narrowest = (candidates, low, high)
+
+            limit = end if narrowest is None else min(end, start + narrowest[2] - narrowest[1])
+            indexes = list(itertools.islice(filter(matches, map(permutation.__getitem__, range(start, limit))), k))
+            if len(indexes) < k and limit < end:
+                candidates, low, high = narrowest
+                order_keys = [self._sort_keys(columns, keys, column, direction == 'desc') for column, direction in order]
+                indexes = heapq.nsmallest(k, filter(matches, map(candidates.__getitem__, range(low, high))),
+                                          key=lambda i: tuple(values[i] for values in order_keys) + (ids[i],))
+            selected[name] = indexes
+
+        if rows is not None:
+            return {name: [rows[i] for i in indexes] for name, indexes in selected.items()}
+
+        # Katalog önbellekte değilse seçilen satırları tek sorguda getir
+        wanted = sorted({ids[i] for indexes in selected.values() for i in indexes})
+        by_id = {}
+        if wanted:
+            cursor.execute(f'SELECT * FROM foods WHERE id IN ({",".join("?" * len(wanted))})', wanted)
+            by_id = {row['id']: dict(row) for row in cursor.fetchall()}
+        return {name: [by_id[ids[i]] for i in indexes if ids[i] in by_id] for name, indexes in selected.items()}
+
+recommendation_engine = NutrientMatrix()
+
+# Öğün planı optimizasyonu - kalan kalori/makroları besin ve tarif porsiyonlarıyla doldurur
+MEAL_PLAN_BUDGET_MS = float(os.getenv('MEAL_PLAN_BUDGET_MS', 40))
+MEAL_PLAN_PORTIONS = (0.5, 1.0, 1.5, 2.0)
+MEAL_PLAN_PER_MACRO = 40   # Her makro yoğunluğu için aday sayısı
+MEAL_PLAN_GRID = 10        # Makro dağılımı ızgarası (%10'luk hücreler)
+MACRO_KCAL = (('protein', 4), ('carbs', 4), ('fat', 9))
+
+class MealPlanCandidates:
+    """
+    Optimizasyonun tarayacağı küçük aday havuzu - besin/tarif versiyonu değişince yeniden hesaplanır.
+    Havuz: her makro için kalori başına en yoğun adaylar + her makro dağılımı hücresinden
+    tipik porsiyona (~250 kcal) en yakın aday. Böylece 10k+ katalogda da birkaç yüz aday kalır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.versions = None
+        self.pool = []
+
+    def sync(self, cursor):
+        catalog = food_catalog.sync(cursor)
+        versions = (catalog.version, get_change_version(cursor, 'recipes'))
+        if versions == self.versions:
+            return self.pool
+        with self._lock:
+            if versions == self.versions:
+                return self.pool
+            items = []
+            if catalog.foods is not None:
+                source = catalog.foods
+            else:
+                cursor.execute('SELECT id, name, calories, protein, carbs, fat, serving_size FROM foods')
+                source = cursor.fetchall()
+            for row in source:
+                items.append(('food', row['id'], row['name'], row['serving_size'],
+                              row['calories'], row['protein'], row['carbs'], row['fat']))
+            cursor.execute('SELECT id, name, calories, protein, carbs, fat FROM recipes')
+            for row in cursor.fetchall():
+                items.append(('recipe', row['id'], row['name'], '1 porsiyon',
+                              row['calories'], row['protein'], row['carbs'], row['fat']))
+            self.pool = self._build_pool(items)
+            self.versions = versions
+        return self.pool
+
+    @staticmethod
+    def _build_pool(items):
+        valid = []
+        for kind, item_id, name, serving_size, calories, protein, carbs, fat in items:
+            values = [_to_float(v) for v in (calories, protein, carbs, fat)]
+            if any(v != v or v < 0 for v in values) or values[0] <= 0:
+                continue
+            valid.append((kind, item_id, name, serving_size, tuple(values)))
+
+        selected = {}
+        for index, (_, kcal) in enumerate(MACRO_KCAL, start=1):
+            for item in heapq.nlargest(MEAL_PLAN_PER_MACRO, valid, key=lambda it: it[4][index] * kcal / it[4][0]):
+                selected[(item[0], item[1])] = item
+
+        cells = {}
+        for item in valid:
+            calories = item[4][0]
+            cell = tuple(min(MEAL_PLAN_GRID, int(item[4][i] * kcal / calories * MEAL_PLAN_GRID))
+                         for i, (_, kcal) in enumerate(MACRO_KCAL, start=1))
+            best = cells.get(cell)
+            if best is None or abs(calories - 250) < abs(best[4][0] - 250):
+                cells[cell] = item
+        for item in cells.values():
+            selected[(item[0], item[1])] = item
+        return list(selected.values())
+
+meal_plan_candidates = MealPlanCandidates()
+
+def _plan_error(totals, target, scales):
+    return sum(((t - x) / s) ** 2 for x, t, s in zip(totals, target, scales))
+
+def optimize_meal_plan(pool, target, tolerance=0.1, max_items=6, budget_ms=MEAL_PLAN_BUDGET_MS):
+    """
+    Sınırlı sırt çantası: her aday en fazla bir kez, MEAL_PLAN_PORTIONS porsiyonlarından biriyle.
+    Önce açgözlü ekleme, kalan süre bütçesinde porsiyon değiştirme / aday değiştirme ile iyileştirme.
+    target: (kalori, protein, karbonhidrat, yağ) - negatif değerler 0 kabul edilir
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    target = tuple(max(0.0, float(v)) for v in target)
+    scales = (max(target[0], 100.0),) + tuple(max(v, 10.0) for v in target[1:])
+    chosen = []  # [(havuz indeksi, porsiyon)]
+    totals = [0.0, 0.0, 0.0, 0.0]
+    error = _plan_error(totals, target, scales)
+
+    def within_tolerance(values):
+        return all(abs(t - x) <= max(t * tolerance, 1.0) for x, t in zip(values, target))
+
+    def best_move(exclude, base):
+        best = None
+        for index, item in enumerate(pool):
+            if index in exclude:
+                continue
+            values = item[4]
+            for portion in MEAL_PLAN_PORTIONS:
+                candidate = [b + v * portion for b, v in zip(base, values)]
+                # Kalori hedefini %tolerans'tan fazla aşan kombinasyonları atla
+                if candidate[0] > target[0] * (1 + tolerance) + 1:
+                    continue
+                candidate_error = _plan_error(candidate, target, scales)
+                if best is None or candidate_error < best[0]:
+                    best = (candidate_error, index, portion, candidate)
+        return best
+
+    # 1) Açgözlü ekleme
+    if target[0] > 0:
+        while len(chosen) < max_items and not within_tolerance(totals) and time.perf_counter() < deadline:
+            move = best_move({index for index, _ in chosen}, totals)
+            if move is None or move[0] >= error:
+                break
+            error, index, portion, totals = move
+            chosen.append((index, portion))
+
+    # 2) Yerel iyileştirme: her seçimi çıkarıp yerine en iyi aday/porsiyonu koy
+    improved = True
+    while improved and chosen and not within_tolerance(totals) and time.perf_counter() < deadline:
+        improved = False
+        for position, (index, portion) in enumerate(list(chosen)):
+            if time.perf_counter() >= deadline:
+                break
+            values = pool[index][4]
+            base = [t - v * portion for t, v in zip(totals, values)]
+            exclude = {i for i, _ in chosen if i != index}
+            move = best_move(exclude, base)
+            if move is not None and move[0] < error - 1e-9:
+                error, new_index, new_portion, totals = move
+                chosen[position] = (new_index, new_portion)
+                improved = True
+
+    items = []
+    for index, portion in chosen:
+        kind, item_id, name, serving_size, values = pool[index]
+        items.append({
+            'type': kind,
+            'id': item_id,
+            'name': name,
+            'serving_size': serving_size,
+            'servings': portion,
+            'calories': round(values[0] * portion, 2),
+            'protein': round(values[1] * portion, 2),
+            'carbs': round(values[2] * portion, 2),
+            'fat': round(values[3] * portion, 2),
+        })
+    keys = ('calories', 'protein', 'carbs', 'fat')
+    return {
+        'items': items,
+        'totals': {key: round(value, 2) for key, value in zip(keys, totals)},
+        'deviation': {key: round(value - t, 2) for key, value, t in zip(keys, totals, target)},
+        'within_tolerance': within_tolerance(totals),
+        'timed_out': time.perf_counter() >= deadline,
+    }
+
+def get_remaining_targets(cursor, user_id, date):
+    """Kullanıcının hedefi ve o gün için kalan kalori/makroları (kullanıcı yoksa None)"""
+    user = user_cache.get(user_id, cursor)
+    if not user:
+        return None
+    
+    goal = user['goal'].lower() if user['goal'] else 'kilo koruma'
+    daily_calories = user['daily_calories'] or 2000
+    daily_protein = user['daily_protein'] or 150
+    daily_carbs = user['daily_carbs'] or 250
+    daily_fat = user['daily_fat'] or 65
+    
+    # Bugünkü tüketimler (günlük özetten)
+    totals = get_daily_summary(cursor, user_id, date)
+    
+    return goal, {
+        'calories': daily_calories - (totals['calories'] or 0),
+        'protein': daily_protein - (totals['protein'] or 0),
+        'carbs': daily_carbs - (totals['carbs'] or 0),
+        'fat': daily_fat - (totals['fat'] or 0),
+    }
+
 # Hesaplama fonksiyonları
+BMR_MALE_GENDERS = ('erkek', 'male')
+BMR_GENDER_OFFSETS = (5, -161)             # (erkek, kadın) - Mifflin-St Jeor sabiti
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,      # Hareketsiz
+    'light': 1.375,        # Az Aktif
+    'moderate': 1.55,      # Aktif
+    'active': 1.725,       # Çok Aktif
+    'very_active': 1.9     # Aşırı Aktif
+}
+DEFAULT_ACTIVITY_MULTIPLIER = 1.2
+GOAL_CALORIE_ADJUSTMENTS = {
+    'kilo verme': -500, 'weight loss': -500,   # Haftalık 0.5kg verme için
+    'kilo alma': 500, 'weight gain': 500,      # Haftalık 0.5kg alma için
+}
+
+def _bmr_gender_offset(gender):
+    return BMR_GENDER_OFFSETS[0] if gender.lower() in BMR_MALE_GENDERS else BMR_GENDER_OFFSETS[1]
+
+def _activity_multiplier(activity_level):
+    return ACTIVITY_MULTIPLIERS.get(activity_level.lower(), DEFAULT_ACTIVITY_MULTIPLIER)
+
+def _goal_adjustment(goal):
+    return GOAL_CALORIE_ADJUSTMENTS.get(goal.lower(), 0)  # 0: Kilo koruma
+
 def calculate_bmr(weight, height, age, gender):
     """Bazal Metabolizma Hızı (BMR) hesapla - Mifflin-St Jeor formülü"""
-    if gender.lower() == 'erkek' or gender.lower() == 'male':
-        bmr = 10 * weight + 6.25 * height - 5 * age + 5
-    else:
-        bmr = 10 * weight + 6.25 * height - 5 * age - 161
+    bmr = 10 * weight + 6.25 * height - 5 * age + _bmr_gender_offset(gender)
     return round(bmr, 2)
 
 def calculate_tdee(bmr, activity_level):
     """Günlük Toplam Enerji Harcaması (TDEE) hesapla"""
-    multipliers = {
-        'sedentary': 1.2,      # Hareketsiz
-        'light': 1.375,        # Az Aktif
-        'moderate': 1.55,      # Aktif
-        'active': 1.725,       # Çok Aktif
-        'very_active': 1.9     # Aşırı Aktif
-    }
-    multiplier = multipliers.get(activity_level.lower(), 1.2)
-    return round(bmr * multiplier, 2)
+    return round(bmr * _activity_multiplier(activity_level), 2)
 
 def calculate_macros(tdee, goal, weight):
     """Makro besin hesapla"""
-    if goal.lower() in ['kilo verme', 'weight loss']:
-        daily_calories = tdee - 500  # Haftalık 0.5kg verme için
-    elif goal.lower() in ['kilo alma', 'weight gain']:
-        daily_calories = tdee + 500  # Haftalık 0.5kg alma için
-    else:  # Kilo koruma
-        daily_calories = tdee
+    adjustment = _goal_adjustment(goal)
+    daily_calories = tdee + adjustment if adjustment else tdee
     
     # Makro dağılımı (önrnek: %30 protein, %40 karbonhidrat, %30 yağ)
     protein = round((daily_calories * 0.30) / 4, 2)  # 1g protein = 4 kalori
@@ -356,6 +2043,175 @@ def calculate_macros(tdee, goal, weight):
         'fat': fat
     }
 
+class _CategoryCache(dict):
+    """Kategorik değer (cinsiyet, aktivite, hedef) -> çözülmüş sabit; her farklı değer için resolve bir kez"""
+
+    def __init__(self, resolve):
+        super().__init__()
+        self.resolve = resolve
+
+    def __missing__(self, value):
+        result = self[value] = self.resolve(value)
+        return result
+
+class _NutritionChainCache(dict):
+    """
+    (ham BMR, aktivite çarpanı, hedef farkı) -> (bmr, tdee, daily_calories, protein, carbs, fat).
+    Zincir calculate_bmr / calculate_tdee / calculate_macros ile aynı işlemleri aynı sırayla yapar;
+    her farklı anahtar için bir kez hesaplanır, tekrarlar map ile C düzeyinde okunur.
+    Ham BMR'ye tam sayı sabit eklendiği için -0.0 olamaz, yani 0.0 / -0.0 anahtar çakışması yoktur;
+    yuvarlanınca -0.0 olan küçük negatif BMR'ler farklı anahtardır (bench_nutrition.py EDGE_CASES).
+    """
+
+    def __missing__(self, key):
+        bmr, multiplier, adjustment = key
+        bmr_rounded = round(bmr, 2)
+        tdee = round(bmr_rounded * multiplier, 2)
+        daily_calories = tdee + adjustment if adjustment else tdee
+        result = self[key] = (bmr_rounded, tdee, round(daily_calories, 2), round((daily_calories * 0.30) / 4, 2),
+                              round((daily_calories * 0.40) / 4, 2), round((daily_calories * 0.30) / 9, 2))
+        return result
+
+NUTRITION_BATCH_FIELDS = ('bmr', 'tdee', 'daily_calories', 'protein', 'carbs', 'fat')
+
+def calculate_nutrition_batch(weights, heights, ages, genders, activity_levels, goals):
+    """
+    Toplu BMR / TDEE / makro hesabı (ör. tüm kullanıcıların yeniden hesaplanması).
+    Girdiler eşit uzunlukta diziler (list veya array); çıktı NUTRITION_BATCH_FIELDS sırasıyla
+    array('d') sözlüğüdür. Her eleman calculate_bmr -> calculate_tdee -> calculate_macros zincirinin
+    sonucuyla bit düzeyinde aynıdır (aynı tablolar, aynı işlem sırası ve operand tipleri).
+    Tüm sütunlar operator / map / zip ile eleman başına bytecode çalıştırmadan akar; kategoriler ve
+    round() içeren zincirin geri kalanı her farklı değer için bir kez çözülür.
+    """
+    count = len(weights)
+    if any(len(values) != count for values in (heights, ages, genders, activity_levels, goals)):
+        raise ValueError('Girdi dizilerinin uzunlukları eşit olmalı')
+
+    offsets = map(_CategoryCache(_bmr_gender_offset).__getitem__, genders)
+    multipliers = map(_CategoryCache(_activity_multiplier).__getitem__, activity_levels)
+    adjustments = map(_CategoryCache(_goal_adjustment).__getitem__, goals)
+    add, sub, mul, repeat = operator.add, operator.sub, operator.mul, itertools.repeat
+
+    # 10 * weight + 6.25 * height - 5 * age + sabit
+    bmr = map(add, map(sub, map(add, map(mul, repeat(10), weights), map(mul, repeat(6.25), heights)),
+                       map(mul, repeat(5), ages)),
+              offsets)
+    rows = list(map(_NutritionChainCache().__getitem__, zip(bmr, multipliers, adjustments)))
+    columns = zip(*rows) if rows else ((),) * len(NUTRITION_BATCH_FIELDS)
+    return {name: array('d', column) for name, column in zip(NUTRITION_BATCH_FIELDS, columns)}
+
+# Şifre hashleme - bcrypt CPU'ya bağlıdır ve çalışırken GIL'i bırakır. Çekirdek sayısıyla sınırlı ayrı
+# bir havuzda çalıştırılır; böylece çok thread'li worker'larda (gthread / ASGI) eşzamanlı girişler
+# CPU'yu paylaşmak yerine sıraya girer ve diğer istekler işlemci bulmaya devam eder.
+# Kuyruk (çalışan + bekleyen) PASSWORD_HASH_MAX_PENDING'i aşarsa istek beklemeden 503 + Retry-After alır.
+# Varsayılan sınır worker'ın istek thread'lerinin yarısıdır: giriş yoğunluğunda thread'lerin en fazla
+# yarısı hash bekler, kalanı sağlık kontrolü ve okuma isteklerine kalır (sync worker'da sınır anlamsızdır).
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))              # bcrypt maliyeti (2^rounds tur)
+PASSWORD_HASH_THREADS = int(os.getenv('PASSWORD_HASH_THREADS', os.cpu_count() or 2))
+WORKER_THREADS = int(os.getenv('THREADS', 4))                    # gunicorn --threads (Procfile / start_hosting.py)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', max(1, WORKER_THREADS // 2)))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', 2))  # saniye
+
+class PasswordHashBusy(Exception):
+    """Hash kuyruğu dolu"""
+
+class PasswordHasher:
+    """Sınırlı bcrypt havuzu - çağıran için senkron, kuyruk derinliği sınırlı, gecikme sayaçlı"""
+
+    def __init__(self, threads=PASSWORD_HASH_THREADS, max_pending=PASSWORD_HASH_MAX_PENDING, rounds=BCRYPT_ROUNDS):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=1024)  # Son hash süreleri (ms) - yüzdelikler için
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_time = 0.0
+        self.max_hash_time = 0.0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashBusy('Şifre doğrulama kuyruğu dolu')
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            return self._executor.submit(self._timed, time.perf_counter(), func, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _timed(self, queued_at, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            waited = start - queued_at
+            with self._lock:
+                self.completed += 1
+                self.hash_time += elapsed
+                self.max_hash_time = max(self.max_hash_time, elapsed)
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+                self._samples.append(elapsed * 1000)
+
+    def hash(self, password):
+        """Şifreyi bcrypt ile hashle"""
+        return self._run(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8'))
+
+    def check(self, password, hashed):
+        """Şifre doğrulama (maliyet hash'in kendisinden okunur)"""
+        return self._run(lambda: bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')))
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            completed = self.completed
+
+            def percentile(p):
+                return round(samples[min(len(samples) - 1, int(len(samples) * p))], 3) if samples else 0
+
+            return {
+                'threads': self.threads,
+                'rounds': self.rounds,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'max_pending_seen': self.max_pending_seen,
+                'completed': completed,
+                'rejected': self.rejected,
+                'avg_hash_ms': round(self.hash_time * 1000 / completed, 3) if completed else 0,
+                'p50_hash_ms': percentile(0.50),
+                'p95_hash_ms': percentile(0.95),
+                'p99_hash_ms': percentile(0.99),
+                'max_hash_ms': round(self.max_hash_time * 1000, 3),
+                'avg_wait_ms': round(self.wait_time * 1000 / completed, 3) if completed else 0,
+                'max_wait_ms': round(self.max_wait_time * 1000, 3),
+            }
+
+password_hasher = PasswordHasher()
+
+def hash_password(password):
+    """Şifreyi bcrypt ile hashle (hash havuzunda)"""
+    return password_hasher.hash(password)
+
+def check_password(password, hashed):
+    """Şifre doğrulama (hash havuzunda)"""
+    return password_hasher.check(password, hashed)
+
+def password_busy_response():
+    """Hash kuyruğu doluyken: istemci Retry-After kadar bekleyip tekrar denemeli"""
+    response = jsonify({'error': 'Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(PASSWORD_HASH_RETRY_AFTER)
+    return response
+
 # API Endpoints
 
 @app.route('/api/health', methods=['GET'])
@@ -363,6 +2219,27 @@ def health():
     """Sağlık kontrolü"""
     return jsonify({'status': 'ok', 'message': 'API çalışıyor'})
 
+def metrics_authorized():
+    """/metrics erişimi: METRICS_PUBLIC, METRICS_TOKEN veya admin JWT'si"""
+    if METRICS_PUBLIC:
+        return True
+    authorization = request.headers.get('Authorization', '')
+    expected = f'Bearer {METRICS_TOKEN}'.encode('utf-8')
+    if METRICS_TOKEN and hmac.compare_digest(authorization.encode('utf-8'), expected):
+        return True
+    try:
+        verify_jwt_in_request()
+    except Exception:
+        return False
+    return is_admin(get_jwt_identity())
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrikleri (bu worker'ın sayaçları)"""
+    if not metrics_authorized():
+        return jsonify({'error': 'Yetkisiz erişim'}), 403
+    return app.response_class(request_metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/register', methods=['POST'])
 def register():
     """Kullanıcı kaydı"""
@@ -392,7 +2269,7 @@ def register():
             return jsonify({'error': 'Bu email zaten kullanılıyor'}), 400
         
         # Şifreyi hashle
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = hash_password(password)
         
         # BMR ve TDEE hesapla
         bmr = calculate_bmr(weight, height, age, gender)
@@ -422,6 +2299,8 @@ def register():
             'user_id': user_id
         }), 201
         
+    except PasswordHashBusy:
+        return password_busy_response()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -448,7 +2327,7 @@ def login():
             return jsonify({'error': 'Email veya şifre hatalı'}), 401
         
         # Şifre kontrolü
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        if not check_password(password, user['password']):
             return jsonify({'error': 'Email veya şifre hatalı'}), 401
         
         # JWT token oluştur
@@ -468,21 +2347,19 @@ def login():
             }
         }), 200
         
+    except PasswordHashBusy:
+        return password_busy_response()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/user/profile', methods=['GET'])
 @jwt_required()
+@conditional_get('user', lambda user_id: [user_counter(user_id)])
 def get_profile():
     """Kullanıcı profili"""
     try:
         user_id = get_jwt_identity()
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        user = user_cache.get(user_id)
         
         if not user:
             return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
@@ -511,6 +2388,7 @@ def get_profile():
 
 @app.route('/api/foods', methods=['GET'])
 @jwt_required()
+@conditional_get('public', lambda user_id: ['foods'])
 def get_foods():
     """Besinleri listele"""
     try:
@@ -519,25 +2397,17 @@ def get_foods():
         conn = get_db()
         cursor = conn.cursor()
         
-        query = 'SELECT * FROM foods WHERE 1=1'
-        params = []
+        # Katalog önbelleği (versiyon değiştiyse yeniden yüklenir)
+        catalog = food_catalog.sync(cursor)
         
+        # Arama varsa FTS5 indeksi (bm25 sıralı), yoksa isme göre liste
         if search:
-            query += ' AND name LIKE ?'
-            params.append(f'%{search}%')
-        
-        if category:
-            query += ' AND category = ?'
-            params.append(category)
-        
-        query += ' ORDER BY name LIMIT 200'
-        
-        cursor.execute(query, params)
-        foods = [dict(row) for row in cursor.fetchall()]
+            foods = catalog.search(cursor, search, category, 200)
+        else:
+            foods = catalog.list_foods(cursor, category, 200)
         
         # Kategorileri de döndür
-        cursor.execute('SELECT DISTINCT category FROM foods WHERE category IS NOT NULL ORDER BY category')
-        categories = [row['category'] for row in cursor.fetchall()]
+        categories = catalog.categories
         
         conn.close()
         
@@ -552,6 +2422,11 @@ def add_food():
     """Yeni besin ekle (kullanıcı özel besin)"""
     try:
         data = request.json
+        try:
+            barcode = parse_barcode_field(data.get('barcode'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         conn = get_db()
         cursor = conn.cursor()
         
@@ -559,15 +2434,40 @@ def add_food():
             INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (data.get('name'), data.get('calories'), data.get('protein'), data.get('carbs'),
-              data.get('fat'), data.get('serving_size'), data.get('barcode'), data.get('category', 'Diğer'), 
+              data.get('fat'), data.get('serving_size'), barcode, data.get('category', 'Diğer'), 
               datetime.now().isoformat()))
         
         food_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        food_catalog.invalidate()
         
         return jsonify({'message': 'Besin eklendi', 'food_id': food_id}), 201
         
+    except sqlite3.IntegrityError:
+        return jsonify({'error': 'Bu barkod başka bir besinde kayıtlı'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/foods/barcode/<code>', methods=['GET'])
+@jwt_required()
+def get_food_by_barcode(code):
+    """Barkodla besin bul (EAN-8, EAN-13, UPC-A - baştaki sıfırlar ve tire/boşluk önemsiz)"""
+    try:
+        barcode = normalize_barcode(code)
+        if barcode is None:
+            return jsonify({'error': 'Geçersiz barkod (EAN-8, EAN-13, UPC-A)'}), 400
+        
+        conn = get_db()
+        cursor = conn.cursor()
+        food = barcode_cache.lookup(cursor, barcode)
+        conn.close()
+        
+        if food is None:
+            return jsonify({'error': 'Besin bulunamadı', 'barcode': barcode}), 404
+        
+        return jsonify({'food': food, 'barcode': barcode}), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -590,6 +2490,8 @@ def add_daily_log():
         ''', (user_id, date, data.get('meal_type'), data.get('food_id'), data.get('food_name'),
               data.get('calories'), data.get('protein'), data.get('carbs'), data.get('fat'),
               data.get('quantity', 1), datetime.now().isoformat()))
+        bump_daily_summary(cursor, user_id, date, calories=data.get('calories'), protein=data.get('protein'),
+                           carbs=data.get('carbs'), fat=data.get('fat'), meal_count=1)
         
         conn.commit()
         conn.close()
@@ -614,25 +2516,14 @@ def get_daily_log(date):
         ''', (user_id, date))
         logs = [dict(row) for row in cursor.fetchall()]
         
-        # Toplam hesapla
-        total_calories = sum(log['calories'] for log in logs)
-        total_protein = sum(log['protein'] or 0 for log in logs)
-        total_carbs = sum(log['carbs'] or 0 for log in logs)
-        total_fat = sum(log['fat'] or 0 for log in logs)
-        
-        # Su kayıtları
-        cursor.execute('''
-            SELECT SUM(amount) as total_water FROM water_logs WHERE user_id = ? AND date = ?
-        ''', (user_id, date))
-        water_result = cursor.fetchone()
-        total_water = water_result['total_water'] or 0
-        
         # Egzersiz kayıtları
         cursor.execute('''
             SELECT * FROM exercise_logs WHERE user_id = ? AND date = ?
         ''', (user_id, date))
         exercises = [dict(row) for row in cursor.fetchall()]
-        total_exercise_calories = sum(ex['calories_burned'] or 0 for ex in exercises)
+        
+        # Toplamlar (günlük özetten)
+        summary = get_daily_summary(cursor, user_id, date)
         
         conn.close()
         
@@ -640,12 +2531,12 @@ def get_daily_log(date):
             'date': date,
             'logs': logs,
             'totals': {
-                'calories': total_calories,
-                'protein': total_protein,
-                'carbs': total_carbs,
-                'fat': total_fat,
-                'water': total_water,
-                'exercise_calories': total_exercise_calories
+                'calories': summary['calories'],
+                'protein': summary['protein'],
+                'carbs': summary['carbs'],
+                'fat': summary['fat'],
+                'water': summary['water'],
+                'exercise_calories': summary['exercise_calories']
             },
             'exercises': exercises
         }), 200
@@ -670,6 +2561,7 @@ def add_water():
             INSERT INTO water_logs (user_id, date, amount, created_at)
             VALUES (?, ?, ?, ?)
         ''', (user_id, date, amount, datetime.now().isoformat()))
+        bump_daily_summary(cursor, user_id, date, water=amount)
         
         conn.commit()
         conn.close()
@@ -696,6 +2588,7 @@ def add_exercise():
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (user_id, date, data.get('exercise_name'), data.get('duration'),
               data.get('calories_burned'), datetime.now().isoformat()))
+        bump_daily_summary(cursor, user_id, date, exercise_calories=data.get('calories_burned'))
         
         conn.commit()
         conn.close()
@@ -728,6 +2621,7 @@ def add_weight():
         
         conn.commit()
         conn.close()
+        user_cache.invalidate(user_id)
         
         return jsonify({'message': 'Kilo kaydı eklendi'}), 201
         
@@ -736,6 +2630,7 @@ def add_weight():
 
 @app.route('/api/weight/history', methods=['GET'])
 @jwt_required()
+@conditional_get('user', lambda user_id: [user_counter(user_id)])
 def get_weight_history():
     """Kilo geçmişi"""
     try:
@@ -754,224 +2649,405 @@ def get_weight_history():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Toplu senkronizasyon - mobil uygulamanın çevrimdışıyken biriktirdiği kayıtlar
+# tek istekte, tek transaction ile yazılır; idempotency anahtarı tekrar denemelerde çift kaydı önler
+# Anahtarlar SYNC_KEY_RETENTION_DAYS gün saklanır, süresi dolanlar her toplu yazımda silinir
+SYNC_BATCH_MAX = int(os.getenv('SYNC_BATCH_MAX', 500))
+SYNC_KEY_MAX_LENGTH = 128
+SYNC_KEY_RETENTION_DAYS = int(os.getenv('SYNC_KEY_RETENTION_DAYS', 30))
+
+SYNC_INSERT_SQL = {
+    'daily_log': '''
+        INSERT INTO daily_logs (user_id, date, meal_type, food_id, food_name, calories,
+                                protein, carbs, fat, quantity, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'water': 'INSERT INTO water_logs (user_id, date, amount, created_at) VALUES (?, ?, ?, ?)',
+    'exercise': '''
+        INSERT INTO exercise_logs (user_id, date, exercise_name, duration, calories_burned, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+    'weight': 'INSERT INTO weight_logs (user_id, date, weight, created_at) VALUES (?, ?, ?, ?)',
+}
+
+def _sync_number(entry, field, required=False, positive=False, default=None):
+    value = entry.get(field, default)
+    if value is None:
+        if required:
+            raise ValueError(f'{field} zorunlu')
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError(f'Geçersiz {field}')
+    if value < 0 or (positive and value == 0):
+        raise ValueError(f'Geçersiz {field}')
+    return value
+
+def _sync_text(entry, field, max_length=200):
+    value = entry.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str) or len(value) > max_length:
+        raise ValueError(f'Geçersiz {field}')
+    return value
+
+def parse_sync_entry(entry):
+    """
+    Tek bir senkronizasyon kaydını doğrula.
+    Döndürür: (tür, tarih, kolon değerleri (user_id/created_at hariç), günlük özet farkları)
+    """
+    entry_type = entry.get('type')
+    if entry_type not in SYNC_INSERT_SQL:
+        raise ValueError('Geçersiz type (daily_log, water, exercise, weight)')
+
+    date = entry.get('date', datetime.now().strftime('%Y-%m-%d'))
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError('Geçersiz tarih formatı (YYYY-MM-DD)')
+
+    if entry_type == 'daily_log':
+        food_id = entry.get('food_id')
+        if food_id is not None and (isinstance(food_id, bool) or not isinstance(food_id, int)):
+            raise ValueError('Geçersiz food_id')
+        food_name = _sync_text(entry, 'food_name')
+        if food_id is None and not food_name:
+            raise ValueError('food_id veya food_name zorunlu')
+        calories = _sync_number(entry, 'calories')
+        protein = _sync_number(entry, 'protein')
+        carbs = _sync_number(entry, 'carbs')
+        fat = _sync_number(entry, 'fat')
+        values = (_sync_text(entry, 'meal_type', 50), food_id, food_name, calories, protein, carbs, fat,
+                  _sync_number(entry, 'quantity', positive=True, default=1))
+        deltas = dict(calories=calories, protein=protein, carbs=carbs, fat=fat, meal_count=1)
+    elif entry_type == 'water':
+        amount = _sync_number(entry, 'amount', positive=True, default=250)  # ml cinsinden
+        values = (amount,)
+        deltas = dict(water=amount)
+    elif entry_type == 'exercise':
+        calories_burned = _sync_number(entry, 'calories_burned')
+        values = (_sync_text(entry, 'exercise_name'), _sync_number(entry, 'duration'), calories_burned)
+        deltas = dict(exercise_calories=calories_burned)
+    else:
+        values = (_sync_number(entry, 'weight', required=True, positive=True),)
+        deltas = None
+
+    return entry_type, date, values, deltas
+
+@app.route('/api/sync/batch', methods=['POST'])
+@jwt_required()
+def sync_batch():
+    """
+    Çevrimdışı kayıtları toplu ekle.
+    Body: {"entries": [{"key": "<istemci anahtarı>", "type": "daily_log|water|exercise|weight", "date": ..., ...}]}
+    Her kayıt için sonuç döner: created / duplicate (anahtar daha önce işlendi) / invalid
+    Anahtarlar key_retention_days gün hatırlanır; bu süreden sonra aynı anahtarla tekrar gönderilen
+    kayıt yeni kayıt olarak eklenir (istemci kuyruğu bu süre içinde boşaltmalı).
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        entries = data.get('entries')
+
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'error': 'entries listesi zorunlu'}), 400
+        if len(entries) > SYNC_BATCH_MAX:
+            return jsonify({'error': f'Bir istekte en fazla {SYNC_BATCH_MAX} kayıt gönderilebilir'}), 413
+
+        results = [None] * len(entries)
+        parsed = []  # (sıra, anahtar, tür, tarih, değerler, özet farkları)
+        batch_keys = set()
+        for position, entry in enumerate(entries):
+            key = entry.get('key') if isinstance(entry, dict) else None
+            if not isinstance(key, str) or not key or len(key) > SYNC_KEY_MAX_LENGTH:
+                results[position] = {'key': key if isinstance(key, str) else None, 'status': 'invalid',
+                                     'error': 'Geçersiz key'}
+                continue
+            if key in batch_keys:
+                results[position] = {'key': key, 'status': 'duplicate'}
+                continue
+            batch_keys.add(key)
+            try:
+                entry_type, date, values, deltas = parse_sync_entry(entry)
+            except ValueError as e:
+                results[position] = {'key': key, 'status': 'invalid', 'error': str(e)}
+                continue
+            parsed.append((position, key, entry_type, date, values, deltas))
+
+        conn = get_db()
+        cursor = conn.cursor()
+        now = datetime.now().isoformat()
+
+        # Anahtar kontrolü ve yazma aynı yazma kilidi altında: eşzamanlı tekrar denemeler çift kayıt üretemez
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            # Süresi dolan anahtarlar (created_at indeksi ile; genellikle hiç satır yoktur)
+            expired_before = (datetime.now() - timedelta(days=SYNC_KEY_RETENTION_DAYS)).isoformat()
+            cursor.execute('DELETE FROM sync_requests WHERE created_at < ?', (expired_before,))
+
+            existing = set()
+            if parsed:
+                keys = [item[1] for item in parsed]
+                placeholders = ','.join('?' * len(keys))
+                cursor.execute(f'''
+                    SELECT idempotency_key FROM sync_requests
+                    WHERE user_id = ? AND idempotency_key IN ({placeholders})
+                ''', [user_id] + keys)
+                existing = {row[0] for row in cursor.fetchall()}
+
+            rows_by_type = {entry_type: [] for entry_type in SYNC_INSERT_SQL}
+            summaries = {}
+            key_rows = []
+            latest_weight = None
+            for position, key, entry_type, date, values, deltas in parsed:
+                if key in existing:
+                    results[position] = {'key': key, 'status': 'duplicate'}
+                    continue
+                rows_by_type[entry_type].append((user_id, date) + values + (now,))
+                key_rows.append((user_id, key, entry_type, now))
+                if deltas:
+                    totals = summaries.setdefault(date, dict.fromkeys(SUMMARY_FIELDS, 0))
+                    for field, value in deltas.items():
+                        totals[field] += value or 0
+                if entry_type == 'weight':
+                    # Tek tek gönderimdeki gibi son kilo kaydı kullanıcının güncel kilosu olur
+                    latest_weight = values[0]
+                results[position] = {'key': key, 'status': 'created', 'type': entry_type}
+
+            for entry_type, rows in rows_by_type.items():
+                if rows:
+                    cursor.executemany(SYNC_INSERT_SQL[entry_type], rows)
+            if summaries:
+                cursor.executemany(DAILY_SUMMARY_UPSERT_SQL, [
+                    [user_id, date] + [totals[field] for field in SUMMARY_FIELDS]
+                    for date, totals in summaries.items()
+                ])
+            if latest_weight is not None:
+                cursor.execute('UPDATE users SET weight = ? WHERE id = ?', (latest_weight, user_id))
+            if key_rows:
+                cursor.executemany('''
+                    INSERT INTO sync_requests (user_id, idempotency_key, entry_type, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', key_rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        conn.close()
+        if latest_weight is not None:
+            user_cache.invalidate(user_id)
+
+        counts = {'created': 0, 'duplicate': 0, 'invalid': 0}
+        for result in results:
+            counts[result['status']] += 1
+
+        return jsonify({'results': results, **counts, 'key_retention_days': SYNC_KEY_RETENTION_DAYS}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Delta senkronizasyon - istemci yalnızca son imlecinden sonraki değişiklikleri çeker
+SYNC_CHANGES_DEFAULT_LIMIT = 500
+SYNC_CHANGES_MAX_LIMIT = 1000
+SYNC_ROW_COLUMNS = {
+    # Şifre ve yetki kolonları istemciye gönderilmez
+    'users': '''id, email, name, age, gender, height, weight, target_weight, activity_level, goal,
+                bmr, tdee, daily_calories, daily_protein, daily_carbs, daily_fat''',
+}
+
+@app.route('/api/sync/changes', methods=['GET'])
+@jwt_required()
+def sync_changes():
+    """
+    since imlecinden sonraki değişiklikler (seq sırasıyla, sayfalı).
+    Her satır için yalnızca son durumu döner: upsert (satırın güncel hali) veya delete (tombstone).
+    Yanıttaki cursor bir sonraki istekte since olarak gönderilir; has_more false olana kadar devam edilir.
+    """
+    try:
+        user_id = get_jwt_identity()
+        try:
+            since = int(request.args.get('since', 0))
+            limit = int(request.args.get('limit', SYNC_CHANGES_DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'Geçersiz since veya limit'}), 400
+        if since < 0:
+            return jsonify({'error': 'Geçersiz since'}), 400
+        if not 1 <= limit <= SYNC_CHANGES_MAX_LIMIT:
+            return jsonify({'error': f'limit 1 ile {SYNC_CHANGES_MAX_LIMIT} arasında olmalı'}), 400
+
+        conn = get_db()
+        cursor = conn.cursor()
+
+        # (user_id, seq) indeksi: maliyet geçmişle değil, imleçten sonraki değişiklik sayısıyla orantılı
+        cursor.execute('''
+            SELECT seq, table_name, row_id, op FROM sync_changes
+            WHERE user_id = ? AND seq > ?
+            ORDER BY seq
+            LIMIT ?
+        ''', (user_id, since, limit + 1))
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        ids_by_table = {}
+        for row in rows:
+            if row['op'] == 'upsert':
+                ids_by_table.setdefault(row['table_name'], []).append(row['row_id'])
+
+        user_columns = dict(SYNC_CHANGE_TABLES)
+        current = {}
+        for table, ids in ids_by_table.items():
+            placeholders = ','.join('?' * len(ids))
+            cursor.execute(f'''
+                SELECT {SYNC_ROW_COLUMNS.get(table, '*')} FROM {table}
+                WHERE id IN ({placeholders}) AND {user_columns[table]} = ?
+            ''', ids + [user_id])
+            for record in cursor.fetchall():
+                current[(table, record['id'])] = dict(record)
+        conn.close()
+
+        changes = []
+        for row in rows:
+            data = current.get((row['table_name'], row['row_id'])) if row['op'] == 'upsert' else None
+            changes.append({
+                'seq': row['seq'],
+                'table': row['table_name'],
+                'id': row['row_id'],
+                # Okuma sırasında silinmiş satır: tombstone olarak gönder (silme kaydı daha sonraki seq ile gelecek)
+                'op': 'upsert' if data is not None else 'delete',
+                'data': data,
+            })
+
+        return jsonify({
+            'changes': changes,
+            'cursor': rows[-1]['seq'] if rows else since,
+            'has_more': has_more,
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Öneri içerikleri - recommendations.json'dan derlenir, değişince yeniden yüklenir
+RECOMMENDATIONS_PATH = os.getenv('RECOMMENDATIONS_PATH',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recommendations.json'))
+RECOMMENDATIONS_CHECK_INTERVAL = float(os.getenv('RECOMMENDATIONS_CHECK_INTERVAL', 2))  # Dosya kontrol aralığı (sn)
+RECOMMENDATION_FIELDS = ('daily_calories', 'target_weight')
+RECOMMENDATION_PLACEHOLDER = re.compile(r'\{(' + '|'.join(RECOMMENDATION_FIELDS) + r')\}')
+
+class RecommendationContent:
+    """
+    Hedef başına öneri yanıtları, önceden serileştirilmiş JSON byte parçaları olarak.
+    Kişiye özel alanlar ({daily_calories}, {target_weight}) parçaların arasında kalır; istek sırasında
+    yalnızca tam sayılar araya eklenir, JSON serileştirme yapılmaz.
+    Dosya (mtime/boyut) değişince yeniden derlenir; hatalı dosyada önceki içerik kullanılmaya devam eder.
+    """
+
+    def __init__(self, path=RECOMMENDATIONS_PATH, check_interval=RECOMMENDATIONS_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._stamp = None
+        self.compiled = None  # (içerik özeti, ((eşleşme kelimeleri, parçalar, alanlar), ...))
+        self.loads = 0
+        self.errors = 0
+        self.last_error = None
+
+    @staticmethod
+    def compile(data):
+        """{'goals': [{'goal', 'match', 'recommendations'}]} -> hedef başına (kelimeler, parçalar, alanlar)"""
+        goals = []
+        for item in data['goals']:
+            body = app.json.dumps({'recommendations': item['recommendations']}, separators=(',', ':')) + '\n'
+            parts = RECOMMENDATION_PLACEHOLDER.split(body)
+            goals.append((tuple(word.lower() for word in item.get('match', [])),
+                          tuple(part.encode('utf-8') for part in parts[0::2]),
+                          tuple(parts[1::2])))
+        if not goals or goals[-1][0]:
+            raise ValueError('Son hedef varsayılan olmalı (boş match listesi)')
+        return tuple(goals)
+
+    def sync(self):
+        """Dosya değiştiyse yeniden derle (en fazla check_interval'de bir stat)"""
+        now = time.monotonic()
+        if self.compiled is not None and now - self._checked_at < self.check_interval:
+            return self.compiled
+        with self._lock:
+            if self.compiled is not None and now - self._checked_at < self.check_interval:
+                return self.compiled
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if stamp != self._stamp:
+                    self._stamp = stamp
+                    with open(self.path, 'rb') as f:
+                        raw = f.read()
+                    self.compiled = (hashlib.sha1(raw).hexdigest()[:16], self.compile(json.loads(raw)))
+                    self.loads += 1
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.errors += 1
+                self.last_error = str(e)
+                if self.compiled is None:
+                    raise
+                print(f"Oneri dosyasi yuklenemedi, onceki icerik kullaniliyor: {e}")
+        return self.compiled
+
+    def render(self, goal, values):
+        """(yanıt gövdesi, ETag) - values: RECOMMENDATION_FIELDS -> sayı"""
+        version, goals = self.sync()
+        goal = goal.lower()
+        for index, (words, chunks, fields) in enumerate(goals):
+            if not words or any(word in goal for word in words):
+                break
+        numbers = {field: str(int(values[field])).encode('ascii') for field in RECOMMENDATION_FIELDS}
+        parts = [chunks[0]]
+        for field, chunk in zip(fields, chunks[1:]):
+            parts.append(numbers[field])
+            parts.append(chunk)
+        return b''.join(parts), compute_etag(version, index, *numbers.values())
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'version': self.compiled[0] if self.compiled else None,
+            'goals': len(self.compiled[1]) if self.compiled else 0,
+            'loads': self.loads,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+recommendation_content = RecommendationContent()
+
 @app.route('/api/recommendations', methods=['GET'])
 @jwt_required()
 def get_recommendations():
     """Kullanıcı hedefine göre öneriler"""
     try:
         user_id = get_jwt_identity()
-        conn = get_db()
-        cursor = conn.cursor()
         
         # Kullanıcı bilgilerini al
-        cursor.execute('SELECT goal, daily_calories, weight, target_weight FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        user = user_cache.get(user_id)
         
         if not user:
             return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
         
-        goal = user['goal'].lower() if user['goal'] else 'kilo koruma'
         daily_calories = user['daily_calories'] or 2000
         weight = user['weight'] or 70
         target_weight = user['target_weight'] or weight
         
-        recommendations = []
-        
-        # Kilo verme önerileri
-        if 'verme' in goal or 'loss' in goal:
-            recommendations = [
-                {
-                    'title': '💧 Bol Su İçin',
-                    'description': 'Günde en az 2-3 litre su içmek metabolizmanızı hızlandırır ve tokluk hissi verir. Yemeklerden önce su içmek daha az yemenize yardımcı olur.',
-                    'icon': '💧'
-                },
-                {
-                    'title': '🥗 Protein Ağırlıklı Beslenin',
-                    'description': 'Protein, kas kütlenizi korurken yağ yakımını destekler. Her öğünde protein içeren besinler tüketin. Tavuk, balık, yumurta ve baklagiller harika seçeneklerdir.',
-                    'icon': '🥗'
-                },
-                {
-                    'title': '🏃 Düzenli Egzersiz Yapın',
-                    'description': 'Haftada 3-4 kez kardiyovasküler egzersiz ve ağırlık antrenmanı yapın. Günde en az 30 dakika yürüyüş yapın. Düzenli egzersiz metabolizmanızı hızlandırır.',
-                    'icon': '🏃'
-                },
-                {
-                    'title': '⏰ Düzenli Uyku',
-                    'description': 'Günde 7-8 saat kaliteli uyku, hormon dengesini korur ve kilo vermeyi kolaylaştırır. Uykusuzluk iştah hormonlarını etkileyebilir.',
-                    'icon': '⏰'
-                },
-                {
-                    'title': '🍎 Sağlıklı Atıştırmalıklar',
-                    'description': 'Açlık hissettiğinizde meyve, kuruyemiş veya yoğurt gibi sağlıklı atıştırmalıklar tercih edin. İşlenmiş gıdalardan kaçının.',
-                    'icon': '🍎'
-                },
-                {
-                    'title': '📊 Kalori Takibi',
-                    'description': f'Günlük {int(daily_calories)} kalori hedefinizi aşmamaya çalışın. Küçük porsiyonlar ve yavaş yeme alışkanlığı edinin. Her lokmayı iyice çiğneyin.',
-                    'icon': '📊'
-                },
-                {
-                    'title': '🥑 Sağlıklı Yağlar',
-                    'description': 'Zeytinyağı, avokado ve kuruyemiş gibi sağlıklı yağlar tüketin. Bu yağlar tokluk hissi verir ve metabolizmayı destekler.',
-                    'icon': '🥑'
-                },
-                {
-                    'title': '🌱 Lifli Besinler',
-                    'description': 'Sebze, meyve ve tam tahıllar gibi lifli besinler tüketin. Lif, sindirimi yavaşlatır ve uzun süre tok kalmanızı sağlar.',
-                    'icon': '🌱'
-                },
-                {
-                    'title': '🚫 İşlenmiş Gıdalardan Kaçının',
-                    'description': 'Hazır gıdalar, şekerli içecekler ve işlenmiş atıştırmalıklar yüksek kalorilidir. Bu gıdalardan mümkün olduğunca kaçının.',
-                    'icon': '🚫'
-                },
-                {
-                    'title': '📱 Uygulamayı Düzenli Kullanın',
-                    'description': 'Besinlerinizi düzenli olarak kaydedin. Bu, farkındalığınızı artırır ve daha sağlıklı seçimler yapmanıza yardımcı olur.',
-                    'icon': '📱'
-                },
-                {
-                    'title': '⏱️ Yavaş Yiyin',
-                    'description': 'Yemekleri yavaş yemek, beyninize tokluk sinyali göndermesi için zaman verir. Her öğünü en az 20 dakikada tamamlayın.',
-                    'icon': '⏱️'
-                },
-                {
-                    'title': '🎯 Gerçekçi Hedefler',
-                    'description': 'Haftalık 0.5-1 kg vermek sağlıklı bir hedeftir. Hızlı kilo verme programlarından kaçının, uzun vadeli sağlıklı alışkanlıklar edinin.',
-                    'icon': '🎯'
-                }
-            ]
-        # Kilo alma önerileri
-        elif 'alma' in goal or 'gain' in goal:
-            recommendations = [
-                {
-                    'title': '🥩 Kalori Yoğun Besinler',
-                    'description': 'Kuruyemiş, avokado, tam tahıllar gibi kalori yoğun ama sağlıklı besinler tüketin. Bu besinler kalori alımınızı artırırken sağlığınızı korur.',
-                    'icon': '🥩'
-                },
-                {
-                    'title': '💪 Ağırlık Antrenmanı',
-                    'description': 'Haftada 3-4 kez ağırlık antrenmanı yaparak kas kütlenizi artırın. Kardiyo egzersizlerini sınırlı tutun. Ağırlık antrenmanı kas yapımını destekler.',
-                    'icon': '💪'
-                },
-                {
-                    'title': '🍽️ Sık Öğünler',
-                    'description': 'Günde 5-6 öğün yiyin. Her öğünde protein, karbonhidrat ve sağlıklı yağ içeren dengeli beslenme yapın. Küçük ama sık öğünler iştahınızı artırır.',
-                    'icon': '🍽️'
-                },
-                {
-                    'title': '🥤 Kalorili İçecekler',
-                    'description': 'Smoothie, süt, meyve suyu gibi besleyici içecekler tüketin. Su yerine bazen protein shake içebilirsiniz. İçecekler kalori alımınızı kolaylaştırır.',
-                    'icon': '🥤'
-                },
-                {
-                    'title': '📈 İlerleme Takibi',
-                    'description': f'Hedefiniz {int(target_weight)} kg. Haftalık kilo takibi yapın ve sabırlı olun. Sağlıklı kilo alma zaman alır. İlerlemenizi düzenli takip edin.',
-                    'icon': '📈'
-                },
-                {
-                    'title': '🌙 İyi Uyku',
-                    'description': 'Kas gelişimi için günde 7-9 saat uyuyun. Uyku, büyüme hormonu salgılanmasını artırır. Kaliteli uyku kas onarımını destekler.',
-                    'icon': '🌙'
-                },
-                {
-                    'title': '🥚 Protein Alımı',
-                    'description': 'Kas yapımı için yeterli protein alın. Günde kilo başına 1.6-2.2 gram protein hedefleyin. Yumurta, et, balık ve baklagiller harika protein kaynaklarıdır.',
-                    'icon': '🥚'
-                },
-                {
-                    'title': '🍞 Karbonhidrat Tüketimi',
-                    'description': 'Antrenman öncesi ve sonrası karbonhidrat tüketin. Karbonhidratlar enerji sağlar ve kas glikojen depolarını doldurur. Tam tahıllar tercih edin.',
-                    'icon': '🍞'
-                },
-                {
-                    'title': '🥑 Sağlıklı Yağlar',
-                    'description': 'Zeytinyağı, avokado, kuruyemiş ve tohumlar gibi sağlıklı yağlar tüketin. Yağlar, kalori alımınızı artırır ve hormon üretimini destekler.',
-                    'icon': '🥑'
-                },
-                {
-                    'title': '📱 Kalori Takibi',
-                    'description': f'Günlük {int(daily_calories)} kalori hedefinizi aşmaya çalışın. Kalori fazlası kilo almanızı sağlar. Besinlerinizi düzenli olarak kaydedin.',
-                    'icon': '📱'
-                },
-                {
-                    'title': '🏋️ Progresif Aşırı Yükleme',
-                    'description': 'Antrenmanlarınızda ağırlıkları kademeli olarak artırın. Progresif aşırı yükleme kas gelişimini tetikler. Her hafta biraz daha fazla ağırlık kaldırın.',
-                    'icon': '🏋️'
-                },
-                {
-                    'title': '🎯 Gerçekçi Hedefler',
-                    'description': 'Haftalık 0.25-0.5 kg almak sağlıklı bir hedeftir. Hızlı kilo alma yağ olarak depolanabilir. Sabırlı olun ve sağlıklı alışkanlıklar edinin.',
-                    'icon': '🎯'
-                }
-            ]
-        # Kilo koruma önerileri
+        # Hedefe göre önceden derlenmiş yanıt - sadece kişiye özel sayılar eklenir
+        body, etag = recommendation_content.render(user['goal'] or 'kilo koruma', {
+            'daily_calories': daily_calories,
+            'target_weight': target_weight,
+        })
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
         else:
-            recommendations = [
-                {
-                    'title': '⚖️ Dengeli Beslenme',
-                    'description': f'Günlük {int(daily_calories)} kalori hedefinizi koruyun. Makro besinlerinizi dengeli tüketin. Protein, karbonhidrat ve yağ oranlarınızı takip edin.',
-                    'icon': '⚖️'
-                },
-                {
-                    'title': '🏋️ Düzenli Egzersiz',
-                    'description': 'Haftada 3-4 kez egzersiz yapın. Kardiyovasküler ve direnç antrenmanlarını kombine edin. Düzenli egzersiz metabolizmanızı aktif tutar.',
-                    'icon': '🏋️'
-                },
-                {
-                    'title': '💧 Su İçmeyi Unutmayın',
-                    'description': 'Günde 2-3 litre su için. Su, metabolizmanızı aktif tutar ve genel sağlığınızı destekler. Susuz kalmak metabolizmanızı yavaşlatabilir.',
-                    'icon': '💧'
-                },
-                {
-                    'title': '🍎 Çeşitli Besinler',
-                    'description': 'Farklı renk ve türde meyve-sebze tüketin. Çeşitlilik, vitamin ve mineral alımınızı artırır. Her renk farklı besin öğeleri sağlar.',
-                    'icon': '🍎'
-                },
-                {
-                    'title': '📊 Düzenli Takip',
-                    'description': 'Kilonuzu ve beslenmenizi düzenli takip edin. Küçük değişiklikleri erken fark edin. Haftalık kilo ölçümü yapın.',
-                    'icon': '📊'
-                },
-                {
-                    'title': '😊 Stres Yönetimi',
-                    'description': 'Stres, kilo alımına neden olabilir. Meditasyon, yoga veya hobilerinizle stresi yönetin. Stres hormonları iştahınızı etkileyebilir.',
-                    'icon': '😊'
-                },
-                {
-                    'title': '⏰ Düzenli Uyku',
-                    'description': 'Günde 7-8 saat kaliteli uyku uyuyun. Uyku, hormon dengesini korur ve metabolizmayı düzenler. Uykusuzluk kilo alımına neden olabilir.',
-                    'icon': '⏰'
-                },
-                {
-                    'title': '🥗 Protein Alımı',
-                    'description': 'Yeterli protein alın. Protein, kas kütlenizi korur ve tokluk hissi verir. Her öğünde protein içeren besinler tüketin.',
-                    'icon': '🥗'
-                },
-                {
-                    'title': '🌱 Lifli Besinler',
-                    'description': 'Sebze, meyve ve tam tahıllar gibi lifli besinler tüketin. Lif, sindirimi yavaşlatır ve uzun süre tok kalmanızı sağlar.',
-                    'icon': '🌱'
-                },
-                {
-                    'title': '🚫 İşlenmiş Gıdalardan Kaçının',
-                    'description': 'Hazır gıdalar, şekerli içecekler ve işlenmiş atıştırmalıklar yüksek kalorilidir. Bu gıdalardan mümkün olduğunca kaçının.',
-                    'icon': '🚫'
-                },
-                {
-                    'title': '📱 Uygulamayı Düzenli Kullanın',
-                    'description': 'Besinlerinizi düzenli olarak kaydedin. Bu, farkındalığınızı artırır ve daha sağlıklı seçimler yapmanıza yardımcı olur.',
-                    'icon': '📱'
-                },
-                {
-                    'title': '🎯 Hedefinizi Koruyun',
-                    'description': f'Hedef kilonuz {int(target_weight)} kg. Kilonuzu bu aralıkta tutmaya çalışın. Küçük değişiklikleri erken fark edin ve düzeltin.',
-                    'icon': '🎯'
-                }
-            ]
-        
-        return jsonify({'recommendations': recommendations}), 200
+            response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -987,179 +3063,86 @@ def get_smart_recommendations():
         conn = get_db()
         cursor = conn.cursor()
         
-        # Kullanıcı bilgilerini al
-        cursor.execute('''
-            SELECT goal, daily_calories, daily_protein, daily_carbs, daily_fat, 
-                   weight, target_weight, activity_level
-            FROM users WHERE id = ?
-        ''', (user_id,))
-        user = cursor.fetchone()
-        
-        if not user:
+        # Kullanıcı hedefi ve günün kalan kalori/makroları
+        result = get_remaining_targets(cursor, user_id, date)
+        if not result:
             conn.close()
             return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
         
-        goal = user['goal'].lower() if user['goal'] else 'kilo koruma'
-        daily_calories = user['daily_calories'] or 2000
-        daily_protein = user['daily_protein'] or 150
-        daily_carbs = user['daily_carbs'] or 250
-        daily_fat = user['daily_fat'] or 65
+        goal, remaining = result
+        remaining_calories = remaining['calories']
+        remaining_protein = remaining['protein']
+        remaining_carbs = remaining['carbs']
+        remaining_fat = remaining['fat']
         
-        # Bugünkü tüketimleri al
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(calories), 0) as total_calories,
-                COALESCE(SUM(protein), 0) as total_protein,
-                COALESCE(SUM(carbs), 0) as total_carbs,
-                COALESCE(SUM(fat), 0) as total_fat
-            FROM daily_logs
-            WHERE user_id = ? AND date = ?
-        ''', (user_id, date))
-        totals = cursor.fetchone()
-        
-        consumed_calories = totals['total_calories'] or 0
-        consumed_protein = totals['total_protein'] or 0
-        consumed_carbs = totals['total_carbs'] or 0
-        consumed_fat = totals['total_fat'] or 0
-        
-        # Kalan miktarlar
-        remaining_calories = daily_calories - consumed_calories
-        remaining_protein = daily_protein - consumed_protein
-        remaining_carbs = daily_carbs - consumed_carbs
-        remaining_fat = daily_fat - consumed_fat
-        
-        # Akıllı öneriler oluştur
-        recommendations = []
+        # Akıllı öneriler oluştur - tüm kovalar bellekteki besin matrisi üzerinde tek geçişte
+        is_gain = 'alma' in goal or 'gain' in goal
+        is_loss = 'verme' in goal or 'loss' in goal
+        buckets = []
         
         # Protein eksikliği
         if remaining_protein > 20:
-            cursor.execute('''
-                SELECT * FROM foods 
-                WHERE protein > 10 AND calories <= ?
-                ORDER BY protein DESC, calories ASC
-                LIMIT 5
-            ''', (min(remaining_calories, 500),))
-            protein_foods = [dict(row) for row in cursor.fetchall()]
-            if protein_foods:
-                recommendations.append({
-                    'type': 'protein',
-                    'title': '🥩 Protein Önerileri',
-                    'description': f'{int(remaining_protein)}g protein hedefiniz var. Protein içeren besinler:',
-                    'foods': protein_foods,
-                    'icon': '🥩'
-                })
+            buckets.append(('protein', [('protein', '>', 10), ('calories', '<=', min(remaining_calories, 500))],
+                            [('protein', 'desc'), ('calories', 'asc')]))
         
         # Karbonhidrat eksikliği
         if remaining_carbs > 30:
-            cursor.execute('''
-                SELECT * FROM foods 
-                WHERE carbs > 15 AND calories <= ?
-                ORDER BY carbs DESC, calories ASC
-                LIMIT 5
-            ''', (min(remaining_calories, 500),))
-            carb_foods = [dict(row) for row in cursor.fetchall()]
-            if carb_foods:
-                recommendations.append({
-                    'type': 'carbs',
-                    'title': '🍞 Karbonhidrat Önerileri',
-                    'description': f'{int(remaining_carbs)}g karbonhidrat hedefiniz var. Karbonhidrat içeren besinler:',
-                    'foods': carb_foods,
-                    'icon': '🍞'
-                })
+            buckets.append(('carbs', [('carbs', '>', 15), ('calories', '<=', min(remaining_calories, 500))],
+                            [('carbs', 'desc'), ('calories', 'asc')]))
         
         # Yağ eksikliği
         if remaining_fat > 10:
-            cursor.execute('''
-                SELECT * FROM foods 
-                WHERE fat > 5 AND calories <= ?
-                ORDER BY fat DESC, calories ASC
-                LIMIT 5
-            ''', (min(remaining_calories, 500),))
-            fat_foods = [dict(row) for row in cursor.fetchall()]
-            if fat_foods:
-                recommendations.append({
-                    'type': 'fat',
-                    'title': '🥑 Yağ Önerileri',
-                    'description': f'{int(remaining_fat)}g yağ hedefiniz var. Sağlıklı yağ içeren besinler:',
-                    'foods': fat_foods,
-                    'icon': '🥑'
-                })
+            buckets.append(('fat', [('fat', '>', 5), ('calories', '<=', min(remaining_calories, 500))],
+                            [('fat', 'desc'), ('calories', 'asc')]))
         
         # Kalori durumuna göre öneriler
         if remaining_calories > 200:
-            # Yüksek kalorili öneriler (kilo alma için)
-            if 'alma' in goal or 'gain' in goal:
-                cursor.execute('''
-                    SELECT * FROM foods 
-                    WHERE calories > 200 AND calories <= ?
-                    ORDER BY calories DESC
-                    LIMIT 5
-                ''', (min(remaining_calories, 800),))
-                high_calorie_foods = [dict(row) for row in cursor.fetchall()]
-                if high_calorie_foods:
-                    recommendations.append({
-                        'type': 'high_calorie',
-                        'title': '🔥 Yüksek Kalorili Besinler',
-                        'description': f'{int(remaining_calories)} kalori hedefiniz var. Kalori yoğun besinler:',
-                        'foods': high_calorie_foods,
-                        'icon': '🔥'
-                    })
-            # Düşük kalorili öneriler (kilo verme için)
-            elif 'verme' in goal or 'loss' in goal:
-                cursor.execute('''
-                    SELECT * FROM foods 
-                    WHERE calories < 150 AND calories <= ?
-                    ORDER BY calories ASC, protein DESC
-                    LIMIT 5
-                ''', (min(remaining_calories, 300),))
-                low_calorie_foods = [dict(row) for row in cursor.fetchall()]
-                if low_calorie_foods:
-                    recommendations.append({
-                        'type': 'low_calorie',
-                        'title': '🥗 Düşük Kalorili Besinler',
-                        'description': f'{int(remaining_calories)} kalori hedefiniz var. Düşük kalorili besinler:',
-                        'foods': low_calorie_foods,
-                        'icon': '🥗'
-                    })
+            if is_gain:
+                # Yüksek kalorili öneriler (kilo alma için)
+                buckets.append(('high_calorie', [('calories', '>', 200), ('calories', '<=', min(remaining_calories, 800))],
+                                [('calories', 'desc')]))
+            elif is_loss:
+                # Düşük kalorili öneriler (kilo verme için)
+                buckets.append(('low_calorie', [('calories', '<', 150), ('calories', '<=', min(remaining_calories, 300))],
+                                [('calories', 'asc'), ('protein', 'desc')]))
         
         # Hedef bazlı öneriler
-        if 'verme' in goal or 'loss' in goal:
+        if is_loss:
             # Düşük kalorili, yüksek protein besinler
-            cursor.execute('''
-                SELECT * FROM foods 
-                WHERE protein > 15 AND calories < 200 AND calories <= ?
-                ORDER BY protein DESC, calories ASC
-                LIMIT 5
-            ''', (min(remaining_calories, 400),))
-            weight_loss_foods = [dict(row) for row in cursor.fetchall()]
-            if weight_loss_foods:
-                recommendations.append({
-                    'type': 'weight_loss',
-                    'title': '💪 Kilo Verme İçin Öneriler',
-                    'description': 'Yüksek protein, düşük kalorili besinler:',
-                    'foods': weight_loss_foods,
-                    'icon': '💪'
-                })
-        elif 'alma' in goal or 'gain' in goal:
+            buckets.append(('weight_loss', [('protein', '>', 15), ('calories', '<', 200),
+                                            ('calories', '<=', min(remaining_calories, 400))],
+                            [('protein', 'desc'), ('calories', 'asc')]))
+        elif is_gain:
             # Yüksek kalorili, yüksek protein besinler
-            cursor.execute('''
-                SELECT * FROM foods 
-                WHERE protein > 10 AND calories > 200 AND calories <= ?
-                ORDER BY calories DESC, protein DESC
-                LIMIT 5
-            ''', (min(remaining_calories, 800),))
-            weight_gain_foods = [dict(row) for row in cursor.fetchall()]
-            if weight_gain_foods:
+            buckets.append(('weight_gain', [('protein', '>', 10), ('calories', '>', 200),
+                                            ('calories', '<=', min(remaining_calories, 800))],
+                            [('calories', 'desc'), ('protein', 'desc')]))
+        
+        top_foods = recommendation_engine.sync(cursor).top_k(cursor, buckets, 5)
+        conn.close()
+        
+        texts = {
+            'protein': ('🥩 Protein Önerileri', f'{int(remaining_protein)}g protein hedefiniz var. Protein içeren besinler:', '🥩'),
+            'carbs': ('🍞 Karbonhidrat Önerileri', f'{int(remaining_carbs)}g karbonhidrat hedefiniz var. Karbonhidrat içeren besinler:', '🍞'),
+            'fat': ('🥑 Yağ Önerileri', f'{int(remaining_fat)}g yağ hedefiniz var. Sağlıklı yağ içeren besinler:', '🥑'),
+            'high_calorie': ('🔥 Yüksek Kalorili Besinler', f'{int(remaining_calories)} kalori hedefiniz var. Kalori yoğun besinler:', '🔥'),
+            'low_calorie': ('🥗 Düşük Kalorili Besinler', f'{int(remaining_calories)} kalori hedefiniz var. Düşük kalorili besinler:', '🥗'),
+            'weight_loss': ('💪 Kilo Verme İçin Öneriler', 'Yüksek protein, düşük kalorili besinler:', '💪'),
+            'weight_gain': ('📈 Kilo Alma İçin Öneriler', 'Yüksek kalorili, protein içeren besinler:', '📈'),
+        }
+        recommendations = []
+        for bucket_type, _, _ in buckets:
+            foods = top_foods[bucket_type]
+            if foods:
+                title, description, icon = texts[bucket_type]
                 recommendations.append({
-                    'type': 'weight_gain',
-                    'title': '📈 Kilo Alma İçin Öneriler',
-                    'description': 'Yüksek kalorili, protein içeren besinler:',
-                    'foods': weight_gain_foods,
-                    'icon': '📈'
+                    'type': bucket_type,
+                    'title': title,
+                    'description': description,
+                    'foods': foods,
+                    'icon': icon
                 })
         
-        conn.close()
-        
         return jsonify({
             'recommendations': recommendations,
             'remaining': {
@@ -1175,8 +3158,60 @@ def get_smart_recommendations():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/meal-plan', methods=['GET'])
+@jwt_required()
+def get_meal_plan():
+    """Öğün planı - günün kalan kalori/makrolarını dolduran besin/tarif porsiyonları"""
+    try:
+        user_id = get_jwt_identity()
+        date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        try:
+            tolerance = float(request.args.get('tolerance', 0.1))
+            max_items = int(request.args.get('max_items', 6))
+        except ValueError:
+            return jsonify({'error': 'Geçersiz tolerance veya max_items değeri'}), 400
+        if not 0 < tolerance <= 1 or not 1 <= max_items <= 12:
+            return jsonify({'error': 'tolerance 0-1, max_items 1-12 arasında olmalıdır'}), 400
+        include_recipes = request.args.get('include_recipes', 'true').lower() != 'false'
+        
+        conn = get_db()
+        cursor = conn.cursor()
+        
+        # Kalan miktarlar (akıllı önerilerle aynı hesap)
+        result = get_remaining_targets(cursor, user_id, date)
+        if not result:
+            conn.close()
+            return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
+        goal, remaining = result
+        
+        pool = meal_plan_candidates.sync(cursor)
+        conn.close()
+        
+        if not include_recipes:
+            pool = [item for item in pool if item[0] == 'food']
+        
+        start = time.perf_counter()
+        plan = optimize_meal_plan(pool, (remaining['calories'], remaining['protein'],
+                                         remaining['carbs'], remaining['fat']),
+                                  tolerance=tolerance, max_items=max_items)
+        
+        return jsonify({
+            'date': date,
+            'goal': goal,
+            'remaining': remaining,
+            'plan': plan,
+            'candidates': len(pool),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        }), 200
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/recipes', methods=['GET'])
 @jwt_required()
+@conditional_get('user', lambda user_id: ['recipes', user_counter(user_id)])
 def get_recipes():
     """Tarif listesi - kullanıcı hedefine göre filtreleme"""
     try:
@@ -1190,8 +3225,7 @@ def get_recipes():
         
         # Kullanıcı hedefini al (eğer goal parametresi verilmediyse)
         if not goal:
-            cursor.execute('SELECT goal FROM users WHERE id = ?', (user_id,))
-            user = cursor.fetchone()
+            user = user_cache.get(user_id, cursor)
             if user:
                 goal = user['goal']
         
@@ -1231,6 +3265,7 @@ def get_recipes():
 
 @app.route('/api/recipes/<int:recipe_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('public', lambda user_id, recipe_id: ['recipes'])
 def get_recipe(recipe_id):
     """Tarif detayı"""
     try:
@@ -1252,6 +3287,7 @@ def get_recipe(recipe_id):
 # Favori besinler endpoint'leri
 @app.route('/api/favorites', methods=['GET'])
 @jwt_required()
+@conditional_get('user', lambda user_id: ['foods', user_counter(user_id)])
 def get_favorites():
     """Favori besinleri listele"""
     try:
@@ -1326,117 +3362,139 @@ def remove_favorite(food_id):
         return jsonify({'error': str(e)}), 500
 
 # İstatistikler endpoint'leri
+STATS_GRANULARITIES = ('day', 'week', 'month')
+STATS_MAX_DAYS = 1096  # En fazla ~3 yıllık aralık
+
+def parse_stats_range(default_days):
+    """from/to parametrelerinden tarih aralığı çıkar (varsayılan: son N gün, bugün hariç)"""
+    today = datetime.now().date()
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+
+    try:
+        start = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        end = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+    except ValueError:
+        raise ValueError('Geçersiz tarih formatı (YYYY-MM-DD)')
+
+    if start is None and end is None:
+        start = today - timedelta(days=default_days)
+        end = start + timedelta(days=default_days - 1)
+    elif start is None:
+        start = end - timedelta(days=default_days - 1)
+    elif end is None:
+        end = start + timedelta(days=default_days - 1)
+
+    if end < start:
+        raise ValueError('Bitiş tarihi başlangıç tarihinden önce olamaz')
+    if (end - start).days + 1 > STATS_MAX_DAYS:
+        raise ValueError(f'Tarih aralığı en fazla {STATS_MAX_DAYS} gün olabilir')
+    return start, end
+
+def parse_stats_granularity():
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in STATS_GRANULARITIES:
+        raise ValueError('Geçersiz granularity (day, week, month)')
+    return granularity
+
+def collect_daily_stats(cursor, user_id, start, end, fields):
+    """Aralıktaki günlük toplamları özet tablosundan tek sorguda getir, eksik günleri 0 ile doldur"""
+    cursor.execute('''
+        SELECT date, calories, protein, carbs, fat, water, exercise_calories, meal_count
+        FROM daily_summaries
+        WHERE user_id = ? AND date >= ? AND date <= ?
+    ''', (user_id, start.isoformat(), end.isoformat()))
+    totals = {row['date']: row for row in cursor.fetchall()}
+
+    daily_stats = []
+    for i in range((end - start).days + 1):
+        date = (start + timedelta(days=i)).strftime('%Y-%m-%d')
+        day = totals.get(date)
+        stat = {'date': date}
+        for field in fields:
+            stat[field] = (day[field] if day else 0) or 0
+        daily_stats.append(stat)
+    return daily_stats
+
+def bucket_stats(daily_stats, fields, granularity):
+    """Günlük istatistikleri hafta (pazartesi başlangıçlı) veya ay bazında topla"""
+    if granularity == 'day':
+        return daily_stats
+
+    buckets = {}
+    for stat in daily_stats:
+        day = datetime.strptime(stat['date'], '%Y-%m-%d').date()
+        if granularity == 'week':
+            key = (day - timedelta(days=day.weekday())).strftime('%Y-%m-%d')
+        else:
+            key = day.strftime('%Y-%m')
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {'date': key, 'days': 0, **{field: 0 for field in fields}}
+        bucket['days'] += 1
+        for field in fields:
+            bucket[field] += stat[field]
+    return list(buckets.values())
+
 @app.route('/api/statistics/weekly', methods=['GET'])
 @jwt_required()
 def get_weekly_statistics():
-    """Haftalık istatistikler"""
+    """Haftalık istatistikler (from/to ve granularity parametreleri opsiyonel)"""
     try:
         user_id = get_jwt_identity()
+        try:
+            start_date, end_date = parse_stats_range(7)
+            granularity = parse_stats_granularity()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         conn = get_db()
         cursor = conn.cursor()
-        
-        # Son 7 gün
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=7)
-        
-        # Günlük toplamlar
-        daily_stats = []
-        for i in range(7):
-            date = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-            
-            # Kalori toplamı
-            cursor.execute('''
-                SELECT SUM(calories) as total FROM daily_logs 
-                WHERE user_id = ? AND date = ?
-            ''', (user_id, date))
-            calories_result = cursor.fetchone()
-            total_calories = calories_result['total'] or 0
-            
-            # Makro toplamları
-            cursor.execute('''
-                SELECT 
-                    SUM(protein) as total_protein,
-                    SUM(carbs) as total_carbs,
-                    SUM(fat) as total_fat
-                FROM daily_logs 
-                WHERE user_id = ? AND date = ?
-            ''', (user_id, date))
-            macro_result = cursor.fetchone()
-            
-            # Su toplamı
-            cursor.execute('''
-                SELECT SUM(amount) as total FROM water_logs 
-                WHERE user_id = ? AND date = ?
-            ''', (user_id, date))
-            water_result = cursor.fetchone()
-            total_water = water_result['total'] or 0
-            
-            daily_stats.append({
-                'date': date,
-                'calories': total_calories,
-                'protein': macro_result['total_protein'] or 0,
-                'carbs': macro_result['total_carbs'] or 0,
-                'fat': macro_result['total_fat'] or 0,
-                'water': total_water,
-            })
-        
-        # Ortalama hesapla
-        avg_calories = sum(stat['calories'] for stat in daily_stats) / len(daily_stats)
-        avg_protein = sum(stat['protein'] for stat in daily_stats) / len(daily_stats)
-        avg_carbs = sum(stat['carbs'] for stat in daily_stats) / len(daily_stats)
-        avg_fat = sum(stat['fat'] for stat in daily_stats) / len(daily_stats)
-        avg_water = sum(stat['water'] for stat in daily_stats) / len(daily_stats)
-        
+
+        # Günlük toplamlar (tek sorgu)
+        fields = ('calories', 'protein', 'carbs', 'fat', 'water')
+        daily_stats = collect_daily_stats(cursor, user_id, start_date, end_date, fields)
+
         conn.close()
-        
+
+        # Ortalama hesapla (gün başına)
+        averages = {
+            field: round(sum(stat[field] for stat in daily_stats) / len(daily_stats), 2)
+            for field in fields
+        }
+
         return jsonify({
-            'daily_stats': daily_stats,
-            'averages': {
-                'calories': round(avg_calories, 2),
-                'protein': round(avg_protein, 2),
-                'carbs': round(avg_carbs, 2),
-                'fat': round(avg_fat, 2),
-                'water': round(avg_water, 2),
-            }
+            'daily_stats': bucket_stats(daily_stats, fields, granularity),
+            'averages': averages
         }), 200
-        
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/statistics/monthly', methods=['GET'])
 @jwt_required()
 def get_monthly_statistics():
-    """Aylık istatistikler"""
+    """Aylık istatistikler (from/to ve granularity parametreleri opsiyonel)"""
     try:
         user_id = get_jwt_identity()
+        try:
+            start_date, end_date = parse_stats_range(30)
+            granularity = parse_stats_granularity()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         conn = get_db()
         cursor = conn.cursor()
-        
-        # Son 30 gün
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        
-        # Günlük toplamlar (30 gün)
-        daily_stats = []
-        for i in range(30):
-            date = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-            
-            cursor.execute('''
-                SELECT SUM(calories) as total FROM daily_logs 
-                WHERE user_id = ? AND date = ?
-            ''', (user_id, date))
-            calories_result = cursor.fetchone()
-            total_calories = calories_result['total'] or 0
-            
-            daily_stats.append({
-                'date': date,
-                'calories': total_calories,
-            })
-        
+
+        # Günlük toplamlar (tek sorgu)
+        fields = ('calories',)
+        daily_stats = collect_daily_stats(cursor, user_id, start_date, end_date, fields)
+
         # Ortalama hesapla
         avg_calories = sum(stat['calories'] for stat in daily_stats) / len(daily_stats) if daily_stats else 0
-        
-        # En çok tüketilen besinler
+
+        # En çok tüketilen besinler (varsayılan aralıkta bugün de dahil)
+        top_foods_end = end_date if request.args.get('to') else max(end_date, datetime.now().date())
         cursor.execute('''
             SELECT food_name, SUM(calories) as total_calories, COUNT(*) as count
             FROM daily_logs
@@ -1444,16 +3502,93 @@ def get_monthly_statistics():
             GROUP BY food_name
             ORDER BY total_calories DESC
             LIMIT 10
-        ''', (user_id, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+        ''', (user_id, start_date.strftime('%Y-%m-%d'), top_foods_end.strftime('%Y-%m-%d')))
         top_foods = [dict(row) for row in cursor.fetchall()]
-        
+
         conn.close()
-        
+
         return jsonify({
-            'daily_stats': daily_stats,
+            'daily_stats': bucket_stats(daily_stats, fields, granularity),
             'average_calories': round(avg_calories, 2),
             'top_foods': top_foods,
         }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Veri dışa aktarma - kayıtlar fetchmany ile parça parça okunur ve akış (chunked) olarak gönderilir,
+# bellek kullanımı geçmişin uzunluğundan bağımsızdır
+EXPORT_BATCH_SIZE = 500
+EXPORT_SOURCES = (
+    ('daily_log', 'daily_logs', ('meal_type', 'food_id', 'food_name', 'calories', 'protein', 'carbs', 'fat', 'quantity')),
+    ('water', 'water_logs', ('amount',)),
+    ('exercise', 'exercise_logs', ('exercise_name', 'duration', 'calories_burned')),
+    ('weight', 'weight_logs', ('weight',)),
+)
+EXPORT_CSV_COLUMNS = ('type', 'id', 'date') + tuple(
+    dict.fromkeys(column for _, _, columns in EXPORT_SOURCES for column in columns)) + ('created_at',)
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def iter_user_export(user_id, export_format):
+    """Kullanıcının tüm log kayıtlarını NDJSON satırları veya CSV parçaları olarak üret"""
+    conn = get_db()
+    try:
+        # Tüm tablolar aynı anlık görüntüden okunur (WAL'da yazanları bloklamaz)
+        conn.execute('BEGIN')
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            buffer.write('\ufeff')  # Excel'in Türkçe karakterleri doğru açması için BOM
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            yield buffer.getvalue()
+
+        for entry_type, table, columns in EXPORT_SOURCES:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT id, date, {', '.join(columns)}, created_at FROM {table}
+                WHERE user_id = ?
+                ORDER BY date
+            ''', (user_id,))
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                if export_format == 'csv':
+                    buffer.seek(0)
+                    buffer.truncate()
+                    for row in rows:
+                        record = dict(row)
+                        writer.writerow([entry_type] + [record.get(column) for column in EXPORT_CSV_COLUMNS[1:]])
+                    yield buffer.getvalue()
+                else:
+                    yield ''.join(json.dumps({'type': entry_type, **dict(row)}, ensure_ascii=False) + '\n'
+                                  for row in rows)
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
+
+def export_response(user_id):
+    """Dışa aktarma yanıtı (?format=ndjson|csv) - generator istek bağlamı içinde çalışır"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Geçersiz format (ndjson, csv)'}), 400
+
+    filename = f"diyet-takip-{user_id}-{datetime.now().strftime('%Y%m%d')}.{export_format}"
+    response = app.response_class(stream_with_context(iter_user_export(user_id, export_format)),
+                                  content_type=f'{EXPORT_FORMATS[export_format]}; charset=utf-8')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # Proxy tamponlamasını kapat, ilk bayt hemen gitsin
+    return response
+
+@app.route('/api/export', methods=['GET'])
+@jwt_required()
+def export_user_data():
+    """Kullanıcının tüm kayıt geçmişini dışa aktar"""
+    try:
+        user_id = get_jwt_identity()
+        return export_response(user_id)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1464,11 +3599,7 @@ ADMIN_EMAIL = 'admin@diyettakip.com'
 def is_admin(user_id):
     """Kullanıcı admin mi kontrol et"""
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT is_admin, email FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        user = user_cache.get(user_id)
         if user:
             return user['is_admin'] == 1 or user['email'] == ADMIN_EMAIL
         return False
@@ -1501,7 +3632,7 @@ def admin_login():
             return jsonify({'error': 'Bu kullanıcı admin değil'}), 403
         
         # Şifre kontrolü
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        if not check_password(password, user['password']):
             return jsonify({'error': 'Email veya şifre hatalı'}), 401
         
         # JWT token oluştur
@@ -1518,107 +3649,587 @@ def admin_login():
             }
         }), 200
         
+    except PasswordHashBusy:
+        return password_busy_response()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/stats', methods=['GET'])
+@jwt_required()
+def admin_stats():
+    """Admin istatistikleri"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+        
+        conn = get_db()
+        cursor = conn.cursor()
+        
+        # Toplam kullanıcı sayısı
+        cursor.execute('SELECT COUNT(*) as total FROM users WHERE is_admin = 0')
+        total_users = cursor.fetchone()['total']
+        
+        # Aktif kullanıcı sayısı (son 30 günde giriş yapan)
+        cursor.execute('''
+            SELECT COUNT(DISTINCT user_id) as active FROM daily_logs 
+            WHERE date >= date('now', '-30 days')
+        ''')
+        active_users = cursor.fetchone()['active']
+        
+        # Toplam besin sayısı
+        cursor.execute('SELECT COUNT(*) as total FROM foods')
+        total_foods = cursor.fetchone()['total']
+        
+        # Toplam log sayısı
+        cursor.execute('SELECT COUNT(*) as total FROM daily_logs')
+        total_logs = cursor.fetchone()['total']
+        
+        # Bugünkü log sayısı
+        cursor.execute('SELECT COUNT(*) as total FROM daily_logs WHERE date = date("now")')
+        today_logs = cursor.fetchone()['total']
+        
+        # Son 7 günlük kullanıcı aktivitesi
+        cursor.execute('''
+            SELECT date, COUNT(DISTINCT user_id) as count 
+            FROM daily_logs 
+            WHERE date >= date('now', '-7 days')
+            GROUP BY date
+            ORDER BY date
+        ''')
+        activity_data = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        
+        return jsonify({
+            'total_users': total_users,
+            'active_users': active_users,
+            'total_foods': total_foods,
+            'total_logs': total_logs,
+            'today_logs': today_logs,
+            'activity_data': activity_data,
+            'performance': request_metrics.summary(limit=5)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/db/pool', methods=['GET'])
+@jwt_required()
+def admin_db_pool_stats():
+    """Veritabanı bağlantı havuzu sayaçları (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+
+        return jsonify({'pool': db_pool.stats(), 'pid': os.getpid()}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/auth/hashing', methods=['GET'])
+@jwt_required()
+def admin_password_hash_stats():
+    """Şifre hash havuzu sayaçları: kuyruk, reddedilen istekler, hash gecikmesi (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+
+        return jsonify({'hashing': password_hasher.stats(), 'pid': os.getpid()}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@jwt_required()
+def admin_request_metrics():
+    """Route bazında istek süresi, SQL sorgu sayısı ve yanıt boyutu özeti (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+
+        return jsonify(request_metrics.summary()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/cache', methods=['GET'])
+@jwt_required()
+def admin_cache_stats():
+    """Worker içi önbellek sayaçları (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+
+        return jsonify({
+            'food_catalog': food_catalog.stats(),
+            'barcode': barcode_cache.stats(),
+            'user': user_cache.stats(),
+            'recommendations': recommendation_content.stats(),
+            'pid': os.getpid()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/db/slow-queries', methods=['GET', 'DELETE'])
+@jwt_required()
+def admin_slow_queries():
+    """Yavaş sorgu kaydı: son kayıtlar ve SQL metni bazında toplamlar; DELETE ile temizlenir (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+
+        if request.method == 'DELETE':
+            slow_query_log.clear()
+            return jsonify({'message': 'Yavaş sorgu kaydı temizlendi', 'pid': os.getpid()}), 200
+
+        limit = min(max(int(request.args.get('limit', 50)), 1), SLOW_QUERY_MAX_SHAPES)
+        report = slow_query_log.report(limit)
+        report['pid'] = os.getpid()
+        return jsonify(report), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/db/query-plans', methods=['GET'])
+@jwt_required()
+def admin_query_plans():
+    """Sık sorguların EXPLAIN QUERY PLAN raporu (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+
+        conn = get_db()
+        schema_version = conn.execute('PRAGMA user_version').fetchone()[0]
+        report = explain_hot_queries(conn)
+        conn.close()
+
+        return jsonify({
+            'schema_version': schema_version,
+            'queries': report,
+            'full_scans': [name for name, item in report.items() if item['full_scan']]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/db/rebuild-summaries', methods=['POST'])
+@jwt_required()
+def admin_rebuild_summaries():
+    """Günlük özet tablosunu ham loglardan yeniden oluştur (admin)"""
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        target_user_id = data.get('user_id')
+        
+        conn = get_db()
+        total = rebuild_daily_summaries(conn, target_user_id)
+        conn.close()
+        
+        return jsonify({'message': 'Günlük özetler yeniden oluşturuldu', 'total_summaries': total}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Hedef yeniden hesaplama işi - formül / çarpan değişikliklerinden sonra tüm kullanıcıların bmr, tdee ve
+# günlük hedeflerini id sırasıyla parça parça günceller. Her parça kısa bir yazma transaction'ıdır ve
+# kaldığı yer (last_user_id) aynı transaction'da kaydedilir; süreç ölürse iş bu noktadan devam eder.
+RECALC_CHUNK_SIZE = int(os.getenv('RECALC_CHUNK_SIZE', 500))
+RECALC_MAX_CHUNK_SIZE = 5000
+RECALC_CHUNK_PAUSE = float(os.getenv('RECALC_CHUNK_PAUSE', 0.05))    # parçalar arası bekleme (sn) - yazma kilidi isteklere kalsın
+RECALC_STALE_SECONDS = int(os.getenv('RECALC_STALE_SECONDS', 120))   # bu süredir ilerlemeyen "running" iş ölü sayılır
+RECALC_ACTIVE_STATUSES = ('running', 'cancelling')
+RECALC_RESUMABLE_STATUSES = ('running', 'cancelling', 'cancelled', 'failed')
+
+class RecalculationJobBusy(Exception):
+    """Canlı (heartbeat'i güncel) bir yeniden hesaplama işi zaten var"""
+
+    def __init__(self, job):
+        super().__init__('Zaten çalışan bir yeniden hesaplama işi var')
+        self.job = job
+
+def recalculation_job_dict(row):
+    """recalculation_jobs satırı -> API çıktısı (ilerleme yüzdesi; stale: sahibi ölmüş, devam ettirilebilir)"""
+    job = dict(row)
+    job.pop('owner', None)
+    job['stale'] = job['status'] in RECALC_ACTIVE_STATUSES and not _recalculation_job_is_live(row, datetime.now())
+    if job['total']:
+        job['progress'] = round(min(job['processed'] * 100 / job['total'], 100), 1)
+    else:
+        job['progress'] = 100.0 if job['status'] == 'completed' else 0.0
+    return job
+
+def _recalculation_job_is_live(row, now):
+    if row['status'] not in RECALC_ACTIVE_STATUSES:
+        return False
+    return (now - datetime.fromisoformat(row['heartbeat_at'])).total_seconds() < RECALC_STALE_SECONDS
+
+def start_recalculation_job(conn, chunk_size=RECALC_CHUNK_SIZE, restart=False):
+    """
+    Yeni iş oluştur veya yarım kalan (durdurulmuş, hata almış ya da sahibi ölmüş) son işi kaldığı yerden
+    devam ettir; restart=True baştan başlatır. Dönüş: (iş satırı, sahip token'ı, devam mı).
+    Canlı bir iş varsa RecalculationJobBusy.
+    """
+    cursor = conn.cursor()
+    owner = f'{os.getpid()}-{time.time_ns()}'
+    now = datetime.now()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        placeholders = ','.join('?' * len(RECALC_RESUMABLE_STATUSES))
+        cursor.execute(f'SELECT * FROM recalculation_jobs WHERE status IN ({placeholders}) ORDER BY id DESC LIMIT 1',
+                       RECALC_RESUMABLE_STATUSES)
+        latest = cursor.fetchone()
+        if latest is not None and _recalculation_job_is_live(latest, now):
+            raise RecalculationJobBusy(recalculation_job_dict(latest))
+
+        resumed = latest is not None and not restart
+        if resumed:
+            # Kalan kullanıcılar yeniden sayılır (iş dururken eklenenler dahil)
+            cursor.execute('SELECT COUNT(*) FROM users WHERE id > ?', (latest['last_user_id'],))
+            remaining = cursor.fetchone()[0]
+            cursor.execute('''
+                UPDATE recalculation_jobs
+                SET status = 'running', owner = ?, error = NULL, chunk_size = ?, total = processed + ?,
+                    heartbeat_at = ?, finished_at = NULL
+                WHERE id = ?
+            ''', (owner, chunk_size, remaining, now.isoformat(), latest['id']))
+            job_id = latest['id']
+        else:
+            if latest is not None:
+                cursor.execute('''
+                    UPDATE recalculation_jobs SET status = 'cancelled', owner = NULL, finished_at = ? WHERE id = ?
+                ''', (now.isoformat(), latest['id']))
+            cursor.execute('SELECT COUNT(*) FROM users')
+            total = cursor.fetchone()[0]
+            cursor.execute('''
+                INSERT INTO recalculation_jobs (status, total, chunk_size, owner, created_at, heartbeat_at)
+                VALUES ('running', ?, ?, ?, ?, ?)
+            ''', (total, chunk_size, owner, now.isoformat(), now.isoformat()))
+            job_id = cursor.lastrowid
+        cursor.execute('SELECT * FROM recalculation_jobs WHERE id = ?', (job_id,))
+        job = cursor.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return job, owner, resumed
+
+def _is_positive_number(value):
+    return isinstance(value, (int, float)) and value > 0
+
+def recalculate_user_chunk(cursor, after_id, limit):
+    """
+    id > after_id olan en fazla limit kullanıcının hedeflerini calculate_nutrition_batch ile hesapla.
+    admin_update_user ile aynı kurallar: kilo, boy, yaş veya cinsiyet yoksa atlanır; aktivite yoksa
+    'sedentary', hedef yoksa 'kilo koruma'. Dönüş: (son id, okunan, atlanan, UPDATE parametreleri).
+    Sadece değeri değişen kullanıcılar için UPDATE parametresi üretilir.
+    """
+    cursor.execute('''
+        SELECT id, weight, height, age, gender, activity_level, goal,
+               bmr, tdee, daily_calories, daily_protein, daily_carbs, daily_fat
+        FROM users WHERE id > ? ORDER BY id LIMIT ?
+    ''', (after_id, limit))
+    rows = cursor.fetchall()
+    if not rows:
+        return after_id, 0, 0, []
+
+    eligible = [row for row in rows
+                if _is_positive_number(row['weight']) and _is_positive_number(row['height'])
+                and _is_positive_number(row['age']) and isinstance(row['gender'], str) and row['gender']
+                and isinstance(row['activity_level'] or '', str) and isinstance(row['goal'] or '', str)]
+    targets = calculate_nutrition_batch(
+        [row['weight'] for row in eligible],
+        [row['height'] for row in eligible],
+        [row['age'] for row in eligible],
+        [row['gender'] for row in eligible],
+        [row['activity_level'] or 'sedentary' for row in eligible],
+        [row['goal'] or 'kilo koruma' for row in eligible],
+    )
+    updates = []
+    for row, values in zip(eligible, zip(*(targets[name] for name in NUTRITION_BATCH_FIELDS))):
+        current = (row['bmr'], row['tdee'], row['daily_calories'], row['daily_protein'],
+                   row['daily_carbs'], row['daily_fat'])
+        if current != values:
+            # WHERE'deki girdiler: okunduktan sonra profil değiştiyse satır bu işte atlanır
+            updates.append(values + (row['id'], row['weight'], row['height'], row['age'], row['gender'],
+                                     row['activity_level'], row['goal']))
+    return rows[-1]['id'], len(rows), len(rows) - len(eligible), updates
+
+def run_recalculation_job(job_id, owner, pause=RECALC_CHUNK_PAUSE, on_progress=None):
+    """
+    İşi bitene, durdurulana ya da başka bir süreç devralana kadar parça parça çalıştır.
+    Okumalar transaction dışında; her parçanın UPDATE'leri ve checkpoint tek kısa BEGIN IMMEDIATE içinde.
+    Havuz dışında kendi bağlantısını kullanır (istek thread'lerinin bağlantı slotunu tutmaz).
+    """
+    conn = sqlite3.connect(DB_NAME, factory=PooledConnection)
+    conn.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT last_user_id, chunk_size FROM recalculation_jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        last_user_id, chunk_size = row['last_user_id'], row['chunk_size']
+        while True:
+            next_id, read, skipped, updates = recalculate_user_chunk(cursor, last_user_id, chunk_size)
+            finished = read < chunk_size
+            now = datetime.now().isoformat()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                updated = 0
+                if updates:
+                    cursor.executemany('''
+                        UPDATE users
+                        SET bmr = ?, tdee = ?, daily_calories = ?, daily_protein = ?, daily_carbs = ?, daily_fat = ?
+                        WHERE id = ? AND weight IS ? AND height IS ? AND age IS ? AND gender IS ?
+                          AND activity_level IS ? AND goal IS ?
+                    ''', updates)
+                    updated = cursor.rowcount
+                cursor.execute('''
+                    UPDATE recalculation_jobs
+                    SET last_user_id = ?, processed = processed + ?, updated = updated + ?, skipped = skipped + ?,
+                        heartbeat_at = ?,
+                        status = CASE WHEN ? AND status = 'running' THEN 'completed' ELSE status END,
+                        finished_at = CASE WHEN ? AND status = 'running' THEN ? ELSE finished_at END
+                    WHERE id = ? AND owner = ?
+                ''', (next_id, read, updated, skipped, now, finished, finished, now, job_id, owner))
+                if cursor.rowcount == 0:
+                    # İş yeniden başlatıldı / başka süreç devraldı; bu parçanın yazdıkları geri alınır
+                    conn.rollback()
+                    return
+                cursor.execute('SELECT * FROM recalculation_jobs WHERE id = ?', (job_id,))
+                job = cursor.fetchone()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            for update in updates:
+                user_cache.invalidate(update[6])
+            last_user_id = next_id
+            if on_progress is not None:
+                on_progress(recalculation_job_dict(job))
+
+            if job['status'] == 'cancelling':
+                cursor.execute('''
+                    UPDATE recalculation_jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND owner = ?
+                ''', (now, job_id, owner))
+                conn.commit()
+                return
+            if job['status'] != 'running':
+                return
+            if pause:
+                time.sleep(pause)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        if conn.in_transaction:
+            conn.rollback()
+        cursor.execute('''
+            UPDATE recalculation_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND owner = ?
+        ''', (str(e), datetime.now().isoformat(), job_id, owner))
+        conn.commit()
+        print(f"Hedef yeniden hesaplama hatasi (is {job_id}): {e}")
+    finally:
+        conn.close()
 
-@app.route('/api/admin/stats', methods=['GET'])
+@app.route('/api/admin/jobs/recalculate-targets', methods=['GET', 'POST', 'DELETE'])
 @jwt_required()
-def admin_stats():
-    """Admin istatistikleri"""
+def admin_recalculate_targets():
+    """
+    Kullanıcı hedeflerini güncel formüllerle yeniden hesaplayan arka plan işi (admin).
+    POST başlatır veya yarım kalan işi devam ettirir ({"restart": true} baştan, {"chunk_size": n}),
+    GET son işlerin ilerlemesini döndürür, DELETE çalışan işi durdurur (sonra POST ile devam edilir).
+    """
     try:
         user_id = get_jwt_identity()
         if not is_admin(user_id):
             return jsonify({'error': 'Yetkisiz erişim'}), 403
-        
+
         conn = get_db()
         cursor = conn.cursor()
-        
-        # Toplam kullanıcı sayısı
-        cursor.execute('SELECT COUNT(*) as total FROM users WHERE is_admin = 0')
-        total_users = cursor.fetchone()['total']
-        
-        # Aktif kullanıcı sayısı (son 30 günde giriş yapan)
-        cursor.execute('''
-            SELECT COUNT(DISTINCT user_id) as active FROM daily_logs 
-            WHERE date >= date('now', '-30 days')
-        ''')
-        active_users = cursor.fetchone()['active']
-        
-        # Toplam besin sayısı
-        cursor.execute('SELECT COUNT(*) as total FROM foods')
-        total_foods = cursor.fetchone()['total']
-        
-        # Toplam log sayısı
-        cursor.execute('SELECT COUNT(*) as total FROM daily_logs')
-        total_logs = cursor.fetchone()['total']
-        
-        # Bugünkü log sayısı
-        cursor.execute('SELECT COUNT(*) as total FROM daily_logs WHERE date = date("now")')
-        today_logs = cursor.fetchone()['total']
-        
-        # Son 7 günlük kullanıcı aktivitesi
-        cursor.execute('''
-            SELECT date, COUNT(DISTINCT user_id) as count 
-            FROM daily_logs 
-            WHERE date >= date('now', '-7 days')
-            GROUP BY date
-            ORDER BY date
-        ''')
-        activity_data = [dict(row) for row in cursor.fetchall()]
-        
+
+        if request.method == 'GET':
+            cursor.execute('SELECT * FROM recalculation_jobs ORDER BY id DESC LIMIT 10')
+            jobs = [recalculation_job_dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return jsonify({'job': jobs[0] if jobs else None, 'jobs': jobs}), 200
+
+        if request.method == 'DELETE':
+            cursor.execute("UPDATE recalculation_jobs SET status = 'cancelling' WHERE status = 'running'")
+            stopping = cursor.rowcount
+            conn.commit()
+            conn.close()
+            if not stopping:
+                return jsonify({'error': 'Çalışan yeniden hesaplama işi yok'}), 404
+            return jsonify({'message': 'Yeniden hesaplama işi durduruluyor'}), 200
+
+        data = request.get_json(silent=True) or {}
+        try:
+            chunk_size = int(data.get('chunk_size', RECALC_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Geçersiz chunk_size'}), 400
+        if not 1 <= chunk_size <= RECALC_MAX_CHUNK_SIZE:
+            return jsonify({'error': f'chunk_size 1 ile {RECALC_MAX_CHUNK_SIZE} arasında olmalı'}), 400
+
+        try:
+            job, owner, resumed = start_recalculation_job(conn, chunk_size, restart=bool(data.get('restart')))
+        except RecalculationJobBusy as e:
+            conn.close()
+            return jsonify({'error': str(e), 'job': e.job}), 409
         conn.close()
-        
+
+        threading.Thread(target=run_recalculation_job, args=(job['id'], owner),
+                         name=f"recalculate-targets-{job['id']}", daemon=True).start()
         return jsonify({
-            'total_users': total_users,
-            'active_users': active_users,
-            'total_foods': total_foods,
-            'total_logs': total_logs,
-            'today_logs': today_logs,
-            'activity_data': activity_data
-        }), 200
-        
+            'message': 'Yeniden hesaplama kaldığı yerden devam ediyor' if resumed else 'Yeniden hesaplama başlatıldı',
+            'job': recalculation_job_dict(job)
+        }), 202
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Admin listeleri için imleç (keyset) sayfalama yardımcıları
+ADMIN_PAGE_MAX_LIMIT = 200
+
+def encode_page_cursor(*values):
+    """Sıralama anahtarını opak sayfa imlecine çevir"""
+    raw = json.dumps(values, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_page_cursor(token, size):
+    """encode_page_cursor çıktısını çöz - bozuk imleçte ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except ValueError:
+        raise ValueError('Geçersiz cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Geçersiz cursor')
+    return values
+
+def parse_page_limit(default):
+    """limit parametresi (1..ADMIN_PAGE_MAX_LIMIT)"""
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        raise ValueError('Geçersiz limit')
+    if not 1 <= limit <= ADMIN_PAGE_MAX_LIMIT:
+        raise ValueError(f'limit 1 ile {ADMIN_PAGE_MAX_LIMIT} arasında olmalı')
+    return limit
+
+def parse_page_number():
+    """Eski page parametresi (1'den başlar)"""
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        raise ValueError('Geçersiz page')
+    if page < 1:
+        raise ValueError('Geçersiz page')
+    return page
+
+def keyset_page(rows, limit, *columns):
+    """limit+1 satırdan sayfayı ayır; devamı varsa son satırın sıralama anahtarından imleç üret"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_page_cursor(*(rows[-1][column] for column in columns)) if has_more else None
+    return rows, has_more, next_cursor
+
+class CountCache:
+    """Sayfalamadan ayrı, kısa süreli önbelleğe alınan toplam sayılar (COUNT(*) her sayfada çalışmaz)"""
+
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+admin_count_cache = CountCache(ttl=float(os.getenv('ADMIN_COUNT_CACHE_TTL', 30)))
+
 @app.route('/api/admin/users', methods=['GET'])
 @jwt_required()
 def admin_get_users():
-    """Kullanıcı listesi"""
+    """
+    Kullanıcı listesi - imleç tabanlı sayfalama (created_at DESC, id DESC).
+    Sonraki sayfa için yanıttaki next_cursor gönderilir; eski page parametresi de desteklenir.
+    """
     try:
         user_id = get_jwt_identity()
         if not is_admin(user_id):
             return jsonify({'error': 'Yetkisiz erişim'}), 403
         
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 20))
-        offset = (page - 1) * limit
+        try:
+            limit = parse_page_limit(20)
+            page = parse_page_number()
+            after = None
+            if request.args.get('cursor'):
+                after = decode_page_cursor(request.args['cursor'], 2)
+                if not isinstance(after[0], str) or not isinstance(after[1], int):
+                    raise ValueError('Geçersiz cursor')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        offset = 0 if after else (page - 1) * limit
         
         conn = get_db()
         cursor = conn.cursor()
         
-        # Toplam kullanıcı sayısı
-        cursor.execute('SELECT COUNT(*) as total FROM users WHERE is_admin = 0')
-        total = cursor.fetchone()['total']
+        # Toplam kullanıcı sayısı (her sayfada COUNT yerine kısa süreli önbellekten)
+        def count_users():
+            cursor.execute('SELECT COUNT(*) as total FROM users WHERE is_admin = 0')
+            return cursor.fetchone()['total']
+        total = admin_count_cache.get(('users',), count_users)
         
-        # Kullanıcıları getir
-        cursor.execute('''
+        # Kullanıcıları getir - (is_admin, created_at) indeksinde imleçten devam eder
+        where = 'is_admin = 0'
+        params = []
+        if after:
+            where += ' AND (created_at, id) < (?, ?)'
+            params.extend(after)
+        cursor.execute(f'''
             SELECT id, email, name, age, gender, weight, target_weight, goal, 
                    daily_calories, created_at
             FROM users 
-            WHERE is_admin = 0
-            ORDER BY created_at DESC
+            WHERE {where}
+            ORDER BY created_at DESC, id DESC
             LIMIT ? OFFSET ?
-        ''', (limit, offset))
-        users = [dict(row) for row in cursor.fetchall()]
+        ''', params + [limit + 1, offset])
+        users, has_more, next_cursor = keyset_page([dict(row) for row in cursor.fetchall()], limit,
+                                                   'created_at', 'id')
         
         conn.close()
         
-        return jsonify({
+        result = {
             'users': users,
             'total': total,
-            'page': page,
-            'limit': limit
-        }), 200
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+        if not after:
+            result['page'] = page
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1657,10 +4268,9 @@ def admin_get_user(user_id):
         
         # Son aktiviteler
         cursor.execute('''
-            SELECT date, SUM(calories) as total_calories, COUNT(*) as meal_count
-            FROM daily_logs 
-            WHERE user_id = ?
-            GROUP BY date
+            SELECT date, calories as total_calories, meal_count
+            FROM daily_summaries 
+            WHERE user_id = ? AND meal_count > 0
             ORDER BY date DESC
             LIMIT 7
         ''', (user_id,))
@@ -1895,6 +4505,7 @@ def admin_update_user(user_id):
         
         conn.commit()
         conn.close()
+        user_cache.invalidate(user_id)
         
         return jsonify({'message': 'Kullanıcı güncellendi'}), 200
         
@@ -1931,7 +4542,7 @@ def admin_update_user_password(user_id):
             return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
         
         # Şifreyi hashle
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = hash_password(new_password)
         
         # Şifreyi güncelle
         cursor.execute('UPDATE users SET password = ? WHERE id = ?', (hashed_password, user_id))
@@ -1941,6 +4552,8 @@ def admin_update_user_password(user_id):
         
         return jsonify({'message': 'Şifre güncellendi'}), 200
         
+    except PasswordHashBusy:
+        return password_busy_response()
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1970,69 +4583,105 @@ def admin_delete_user(user_id):
         cursor.execute('DELETE FROM exercise_logs WHERE user_id = ?', (user_id,))
         cursor.execute('DELETE FROM weight_logs WHERE user_id = ?', (user_id,))
         cursor.execute('DELETE FROM favorite_foods WHERE user_id = ?', (user_id,))
+        cursor.execute('DELETE FROM daily_summaries WHERE user_id = ?', (user_id,))
+        cursor.execute('DELETE FROM sync_requests WHERE user_id = ?', (user_id,))
         cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
+        # Silme tetikleyicilerinin bıraktığı tombstone'lar dahil değişiklik günlüğünü temizle
+        cursor.execute('DELETE FROM sync_changes WHERE user_id = ?', (user_id,))
         
         conn.commit()
         conn.close()
+        user_cache.invalidate(user_id)
         
         return jsonify({'message': 'Kullanıcı silindi'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/users/<int:user_id>/export', methods=['GET'])
+@jwt_required()
+def admin_export_user(user_id):
+    """Kullanıcının tüm kayıt geçmişini dışa aktar (admin)"""
+    try:
+        admin_id = get_jwt_identity()
+        if not is_admin(admin_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+        
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
+        conn.close()
+        
+        if not user:
+            return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
+        
+        return export_response(user_id)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/admin/foods', methods=['GET'])
 @jwt_required()
 def admin_get_foods():
-    """Besin listesi (admin)"""
+    """
+    Besin listesi (admin) - isme göre sıralı, imleç tabanlı sayfalama (name, id).
+    Sonraki sayfa için yanıttaki next_cursor gönderilir; eski page parametresi de desteklenir.
+    """
     try:
         user_id = get_jwt_identity()
         if not is_admin(user_id):
             return jsonify({'error': 'Yetkisiz erişim'}), 403
         
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
-        offset = (page - 1) * limit
         search = request.args.get('search', '')
         category = request.args.get('category', '')
+        try:
+            limit = parse_page_limit(50)
+            page = parse_page_number()
+            after = None
+            if request.args.get('cursor'):
+                after = decode_page_cursor(request.args['cursor'], 2)
+                if not isinstance(after[0], str) or not isinstance(after[1], int):
+                    raise ValueError('Geçersiz cursor')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        offset = 0 if after else (page - 1) * limit
         
         conn = get_db()
         cursor = conn.cursor()
         
-        query = 'SELECT * FROM foods WHERE 1=1'
-        params = []
-        
-        if search:
-            query += ' AND name LIKE ?'
-            params.append(f'%{search}%')
-        
-        if category:
-            query += ' AND category = ?'
-            params.append(category)
-        
-        # Toplam sayı
-        count_query = query.replace('SELECT *', 'SELECT COUNT(*) as total')
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
-        
-        # Besinleri getir
-        query += ' ORDER BY name LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        foods = [dict(row) for row in cursor.fetchall()]
-        
-        # Kategoriler
-        cursor.execute('SELECT DISTINCT category FROM foods WHERE category IS NOT NULL ORDER BY category')
-        categories = [row['category'] for row in cursor.fetchall()]
+        catalog = food_catalog.sync(cursor)
+        from_sql, params, _ = food_search_clause(cursor, search, category)
+        
+        # Toplam sayı - besin versiyonuna bağlı önbellek (katalog değişmedikçe COUNT tekrar çalışmaz)
+        def count_foods():
+            cursor.execute(f'SELECT COUNT(*) as total {from_sql}', params)
+            return cursor.fetchone()['total']
+        total = admin_count_cache.get(('foods', catalog.version, search, category), count_foods)
+        
+        # Besinleri getir - aramasız listede idx_foods_name indeksinden imleçten devam eder
+        query_params = list(params)
+        if after:
+            from_sql += ' AND (foods.name, foods.id) > (?, ?)'
+            query_params.extend(after)
+        cursor.execute(f'SELECT foods.* {from_sql} ORDER BY foods.name, foods.id LIMIT ? OFFSET ?',
+                       query_params + [limit + 1, offset])
+        foods, has_more, next_cursor = keyset_page([dict(row) for row in cursor.fetchall()], limit,
+                                                   'name', 'id')
         
         conn.close()
         
-        return jsonify({
+        result = {
             'foods': foods,
-            'categories': categories,
+            'categories': catalog.categories,
             'total': total,
-            'page': page,
-            'limit': limit
-        }), 200
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+        if not after:
+            result['page'] = page
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2047,6 +4696,11 @@ def admin_add_food():
             return jsonify({'error': 'Yetkisiz erişim'}), 403
         
         data = request.json
+        try:
+            barcode = parse_barcode_field(data.get('barcode'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         conn = get_db()
         cursor = conn.cursor()
         
@@ -2054,15 +4708,18 @@ def admin_add_food():
             INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (data.get('name'), data.get('calories'), data.get('protein'), data.get('carbs'),
-              data.get('fat'), data.get('serving_size'), data.get('barcode'), data.get('category', 'Diğer'), 
+              data.get('fat'), data.get('serving_size'), barcode, data.get('category', 'Diğer'), 
               datetime.now().isoformat()))
         
         food_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        food_catalog.invalidate()
         
         return jsonify({'message': 'Besin eklendi', 'food_id': food_id}), 201
         
+    except sqlite3.IntegrityError:
+        return jsonify({'error': 'Bu barkod başka bir besinde kayıtlı'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2076,6 +4733,11 @@ def admin_update_food(food_id):
             return jsonify({'error': 'Yetkisiz erişim'}), 403
         
         data = request.json
+        try:
+            barcode = parse_barcode_field(data.get('barcode'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         conn = get_db()
         cursor = conn.cursor()
         
@@ -2085,14 +4747,17 @@ def admin_update_food(food_id):
                 serving_size = ?, barcode = ?, category = ?
             WHERE id = ?
         ''', (data.get('name'), data.get('calories'), data.get('protein'), data.get('carbs'),
-              data.get('fat'), data.get('serving_size'), data.get('barcode'), data.get('category'),
+              data.get('fat'), data.get('serving_size'), barcode, data.get('category'),
               food_id))
         
         conn.commit()
         conn.close()
+        food_catalog.invalidate()
         
         return jsonify({'message': 'Besin güncellendi'}), 200
         
+    except sqlite3.IntegrityError:
+        return jsonify({'error': 'Bu barkod başka bir besinde kayıtlı'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2113,40 +4778,385 @@ def admin_delete_food(food_id):
         
         conn.commit()
         conn.close()
+        food_catalog.invalidate()
         
         return jsonify({'message': 'Besin silindi'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Toplu besin içe aktarma - CSV / NDJSON / JSON dosyası satır satır okunur, pydantic ile doğrulanır,
+# (barkod) veya (isim, porsiyon) eşleşmesine göre executemany parçalarıyla tek transaction'da upsert edilir
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100  # Yanıtta gösterilecek en fazla hata satırı
+IMPORT_FORMATS = ('csv', 'ndjson', 'json')
+FOOD_IMPORT_COLUMNS = ('name', 'calories', 'protein', 'carbs', 'fat', 'serving_size', 'barcode', 'category')
+FOOD_IMPORT_DEFAULT_SERVING = '100g'
+
+def food_import_key(name, serving_size):
+    """(isim, porsiyon) eşleşme anahtarı - porsiyonu boş (NULL) mevcut besinler varsayılan porsiyonla eşleşir"""
+    return name, serving_size or FOOD_IMPORT_DEFAULT_SERVING
+
+class FoodImportRow(BaseModel):
+    """İçe aktarılan tek besin satırı (boş alanlar varsayılan değeri alır)"""
+    model_config = ConfigDict(str_strip_whitespace=True, extra='ignore')
+
+    name: str = Field(min_length=1, max_length=200)
+    calories: float = Field(ge=0, le=10000)
+    protein: float = Field(0, ge=0, le=1000)
+    carbs: float = Field(0, ge=0, le=1000)
+    fat: float = Field(0, ge=0, le=1000)
+    serving_size: str = Field(FOOD_IMPORT_DEFAULT_SERVING, min_length=1, max_length=50)
+    barcode: Optional[str] = None
+    category: str = Field('Diğer', min_length=1, max_length=50)
+
+    @model_validator(mode='before')
+    @classmethod
+    def drop_empty(cls, data):
+        # CSV'deki boş hücreler ve null değerler "alan yok" sayılır
+        if isinstance(data, dict):
+            values = data.values()
+            if None in values or '' in values:
+                return {key: value for key, value in data.items() if value is not None and value != ''}
+        return data
+
+    @field_validator('barcode', mode='before')
+    @classmethod
+    def check_barcode(cls, value):
+        # JSON'da sayı olarak gelen barkodlar da kabul edilir
+        if isinstance(value, int) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str):
+            raise ValueError('Geçersiz barkod')
+        return parse_barcode_field(value)
+
+def detect_import_format(filename, content_type):
+    """Dosya uzantısı veya Content-Type'tan içe aktarma formatı"""
+    filename = (filename or '').lower()
+    for extension, import_format in (('.csv', 'csv'), ('.ndjson', 'ndjson'), ('.jsonl', 'ndjson'), ('.json', 'json')):
+        if filename.endswith(extension):
+            return import_format
+    content_type = (content_type or '').lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    if 'json' in content_type:
+        return 'json'
+    return None
+
+def iter_food_import_records(text_stream, import_format):
+    """(satır numarası, kayıt veya ValueError) üret - CSV ve NDJSON akış olarak okunur"""
+    if import_format == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif import_format == 'ndjson':
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, ValueError('Geçersiz JSON satırı')
+    else:
+        # Düz JSON dizisi bütün halinde okunur (büyük dosyalar için NDJSON önerilir)
+        try:
+            records = json.load(text_stream)
+        except ValueError:
+            yield 0, ValueError('Geçersiz JSON')
+            return
+        if isinstance(records, dict):
+            records = records.get('foods', [])
+        if not isinstance(records, list):
+            yield 0, ValueError('JSON bir dizi olmalı')
+            return
+        for index, record in enumerate(records, start=1):
+            yield index, record
+
+def _import_food_batch(cursor, batch, updated_ids, now, counts, food_barcodes, reject):
+    """
+    Bir parçayı (satır numarası, satır) mevcut besinlerle eşleştir ve executemany ile yaz.
+    food_barcodes: bu içe aktarmada besinlere atanan barkodlar (besin id -> barkod); aynı besine
+    ikinci bir barkod atayan satır, benzersiz barkod indeksine takılmadan önce reddedilir.
+    """
+    barcodes = [row.barcode for _, row in batch if row.barcode]
+    barcode_ids = {}
+    if barcodes:
+        placeholders = ','.join('?' * len(barcodes))
+        cursor.execute(f'SELECT barcode, id FROM foods WHERE barcode IN ({placeholders})', barcodes)
+        barcode_ids = dict(cursor.fetchall())
+
+    names = list({row.name for _, row in batch})
+    placeholders = ','.join('?' * len(names))
+    cursor.execute(f'SELECT id, name, serving_size FROM foods WHERE name IN ({placeholders})', names)
+    name_ids = {food_import_key(name, serving_size): food_id for food_id, name, serving_size in cursor.fetchall()}
+
+    updates = []
+    inserts = []
+    for line_number, row in batch:
+        food_id = barcode_ids.get(row.barcode) if row.barcode else None
+        if food_id is None:
+            food_id = name_ids.get(food_import_key(row.name, row.serving_size))
+        if food_id is not None and row.barcode:
+            assigned = food_barcodes.setdefault(food_id, row.barcode)
+            if assigned != row.barcode:
+                reject(line_number, f"Barkod çakışması: '{row.name}' besinine bu dosyada {assigned} barkodu atandı")
+                continue
+        values = (row.name, row.calories, row.protein, row.carbs, row.fat, row.serving_size, row.barcode, row.category)
+        if food_id is None:
+            inserts.append(values + (now,))
+        else:
+            updates.append(values + (food_id,))
+            updated_ids.add(food_id)
+
+    if updates:
+        cursor.executemany('''
+            UPDATE foods SET name = ?, calories = ?, protein = ?, carbs = ?, fat = ?, serving_size = ?,
+                             barcode = COALESCE(?, barcode), category = ?
+            WHERE id = ?
+        ''', updates)
+    if inserts:
+        cursor.executemany('''
+            INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', inserts)
+    counts['updated'] += len(updates)
+    counts['inserted'] += len(inserts)
+
+def _sync_food_search_bulk(cursor, first_new_id, updated_ids):
+    """Tetikleyicisiz toplu yazımdan sonra FTS indeksini tek seferde güncelle"""
+    fold_name = TR_FOLD_SQL.format('name')
+    fold_category = TR_FOLD_SQL.format('category')
+    updated_ids = sorted(updated_ids)
+    for start in range(0, len(updated_ids), IMPORT_BATCH_SIZE):
+        chunk = updated_ids[start:start + IMPORT_BATCH_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'DELETE FROM foods_fts WHERE rowid IN ({placeholders})', chunk)
+        cursor.execute(f'''
+            INSERT INTO foods_fts (rowid, name, category)
+            SELECT id, {fold_name}, {fold_category} FROM foods WHERE id IN ({placeholders})
+        ''', chunk)
+    cursor.execute(f'''
+        INSERT INTO foods_fts (rowid, name, category)
+        SELECT id, {fold_name}, {fold_category} FROM foods WHERE id >= ?
+    ''', (first_new_id,))
+
+def import_foods(conn, records, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    records: (satır numarası, kayıt veya ValueError) - iter_food_import_records çıktısı.
+    Tüm dosya tek transaction'dır; dry_run'da doğrulanır, yazılanlar geri alınır.
+    Dosya içinde aynı anahtar birden fazla geçerse son satır geçerlidir. Barkod çakışmaları (aynı barkod
+    farklı isim / porsiyonla veya aynı besine iki farklı barkod) satır bazında reddedilir, kalan satırlar yazılır.
+    """
+    start = time.perf_counter()
+    counts = {'inserted': 0, 'updated': 0, 'rejected': 0, 'duplicates': 0}
+    errors = []
+
+    def reject(line_number, message):
+        counts['rejected'] += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({'line': line_number, 'error': message})
+
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        updated_ids = set()
+        now = datetime.now().isoformat()
+
+        # Satır başına FTS tetikleyicisi toplu yüklemede ~8 kat yavaş: tetikleyiciler bu transaction
+        # içinde kaldırılır, indeks sonda toplu güncellenir ve tetikleyiciler commit'ten önce geri gelir
+        # (yazma kilidi tutulduğu için diğer bağlantılar ara durumu hiç görmez)
+        bulk_search = food_search_enabled(cursor)
+        if bulk_search:
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'foods'")
+            row = cursor.fetchone()
+            first_new_id = (row[0] if row else 0) + 1
+            for name in food_search_triggers():
+                if name != 'foods_fts_delete':
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+        batch = OrderedDict()
+        file_barcodes = {}  # barkod -> dosyada ilk geçtiği (isim, porsiyon)
+        food_barcodes = {}
+        for line_number, record in records:
+            if isinstance(record, ValueError):
+                reject(line_number, str(record))
+                continue
+            if not isinstance(record, dict):
+                reject(line_number, 'Satır bir nesne olmalı')
+                continue
+            try:
+                row = FoodImportRow.model_validate(record)
+            except ValidationError as e:
+                reject(line_number, '; '.join(f"{'.'.join(str(part) for part in error['loc']) or 'satir'}: {error['msg']}"
+                                              for error in e.errors()))
+                continue
+
+            if row.barcode:
+                product = file_barcodes.setdefault(row.barcode, food_import_key(row.name, row.serving_size))
+                if product != food_import_key(row.name, row.serving_size):
+                    reject(line_number, f"Barkod çakışması: {row.barcode} dosyada "
+                                        f"'{product[0]}' ({product[1]}) için de kullanılmış")
+                    continue
+                key = ('barcode', row.barcode)
+            else:
+                key = ('name',) + food_import_key(row.name, row.serving_size)
+            if key in batch:
+                counts['duplicates'] += 1
+                del batch[key]
+            batch[key] = (line_number, row)
+            if len(batch) >= batch_size:
+                _import_food_batch(cursor, list(batch.values()), updated_ids, now, counts, food_barcodes, reject)
+                batch.clear()
+        if batch:
+            _import_food_batch(cursor, list(batch.values()), updated_ids, now, counts, food_barcodes, reject)
+
+        if bulk_search:
+            _sync_food_search_bulk(cursor, first_new_id, updated_ids)
+            for sql in food_search_triggers().values():
+                cursor.execute(sql)
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if not dry_run:
+        food_catalog.invalidate()
+    return {
+        **counts,
+        'errors': errors,
+        'dry_run': dry_run,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+@app.route('/api/admin/foods/import', methods=['POST'])
+@jwt_required()
+def admin_import_foods():
+    """
+    Besin kataloğunu toplu içe aktar (admin).
+    Dosya multipart 'file' alanında veya doğrudan istek gövdesinde gönderilir;
+    format uzantıdan / Content-Type'tan anlaşılır veya ?format=csv|ndjson|json ile verilir.
+    ?dry_run=1 yalnızca doğrular.
+    """
+    try:
+        user_id = get_jwt_identity()
+        if not is_admin(user_id):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+        
+        upload = request.files.get('file')
+        if upload is not None:
+            stream = upload.stream
+            import_format = request.args.get('format') or detect_import_format(upload.filename, upload.mimetype)
+        else:
+            stream = request.stream
+            import_format = request.args.get('format') or detect_import_format(None, request.content_type)
+        if import_format not in IMPORT_FORMATS:
+            return jsonify({'error': 'Geçersiz format (csv, ndjson, json)'}), 400
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true')
+        
+        # utf-8-sig: Excel'in eklediği BOM başlık satırını bozmasın
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        conn = get_db()
+        try:
+            result = import_foods(conn, iter_food_import_records(text_stream, import_format), dry_run=dry_run)
+        except UnicodeDecodeError:
+            conn.close()
+            return jsonify({'error': 'Dosya UTF-8 olmalı'}), 400
+        conn.close()
+        
+        return jsonify(result), 200
+        
+    except sqlite3.IntegrityError as e:
+        return jsonify({'error': f'Barkod çakışması, içe aktarma geri alındı: {e}'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Admin Logs Endpoints
+# Admin log akışı - her tablo (created_at DESC, id DESC) sırasıyla okunur ve heap ile birleştirilir
+# Sıra (tür sırası) eşit created_at değerlerinde tablolar arası sabit bir sıralama sağlar
+ADMIN_LOG_SOURCES = (
+    ('daily', 'daily_logs', 'l.meal_type, l.food_name, l.calories, l.protein, l.carbs, l.fat, l.quantity'),
+    ('water', 'water_logs', 'l.amount'),
+    ('exercise', 'exercise_logs', 'l.exercise_name, l.duration, l.calories_burned'),
+    ('weight', 'weight_logs', 'l.weight'),
+)
+ADMIN_LOG_RANKS = {source[0]: rank for rank, source in enumerate(ADMIN_LOG_SOURCES)}
+
+def _admin_log_rows(conn, rank, source, conditions, params, after, fetch):
+    """Tek tablonun log satırları (created_at DESC, id DESC) - tembel okunur, imleçten sonrası"""
+    log_type, table, columns = source
+    where = list(conditions)
+    args = list(params)
+    if after is not None:
+        created_at, after_rank, after_id = after
+        if rank < after_rank:
+            where.append('l.created_at < ?')
+            args.append(created_at)
+        elif rank > after_rank:
+            where.append('l.created_at <= ?')
+            args.append(created_at)
+        else:
+            where.append('(l.created_at, l.id) < (?, ?)')
+            args.extend([created_at, after_id])
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT l.id, l.user_id, u.email, u.name, l.date, {columns}, l.created_at, '{log_type}' AS log_type
+        FROM {table} l
+        LEFT JOIN users u ON l.user_id = u.id
+        WHERE {' AND '.join(where) or '1=1'}
+        ORDER BY l.created_at DESC, l.id DESC
+        LIMIT ?
+    ''', args + [fetch])
+    for row in cursor:
+        yield (row['created_at'], -rank, row['id']), row
+
 @app.route('/api/admin/logs', methods=['GET'])
 @jwt_required()
 def admin_get_logs():
-    """Tüm logları listele (admin)"""
+    """
+    Tüm logları listele (admin) - imleç (cursor) tabanlı sayfalama.
+    İlk sayfa cursor'sız istenir, sonraki sayfalar yanıttaki next_cursor ile.
+    Eski page parametresi de desteklenir (derin sayfalarda yavaştır).
+    Toplam sayı yalnızca include_total=1 ile döner ve kısa süreli önbelleğe alınır.
+    """
     try:
         user_id = get_jwt_identity()
         if not is_admin(user_id):
             return jsonify({'error': 'Yetkisiz erişim'}), 403
-        
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
-        offset = (page - 1) * limit
+
         log_type = request.args.get('type', 'all')  # all, daily, water, exercise, weight
         user_id_filter = request.args.get('user_id', None)
         date_from = request.args.get('date_from', None)
         date_to = request.args.get('date_to', None)
-        
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        logs = []
-        total = 0
-        
+        token = request.args.get('cursor')
+        include_total = request.args.get('include_total', '').lower() in ('1', 'true')
+
+        try:
+            limit = parse_page_limit(50)
+            page = parse_page_number()
+            after = None
+            if token:
+                created_at, after_type, after_id = decode_page_cursor(token, 3)
+                if after_type not in ADMIN_LOG_RANKS or not isinstance(after_id, int) \
+                        or not isinstance(created_at, str):
+                    raise ValueError('Geçersiz cursor')
+                after = (created_at, ADMIN_LOG_RANKS[after_type], after_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        sources = [(rank, source) for rank, source in enumerate(ADMIN_LOG_SOURCES)
+                   if log_type in ('all', source[0])] or list(enumerate(ADMIN_LOG_SOURCES))
+
         # Filtre koşulları (güvenli parametreli sorgu)
         filter_conditions = []
         filter_params = []
-        
+
         if user_id_filter:
             filter_conditions.append('user_id = ?')
             filter_params.append(user_id_filter)
@@ -2156,203 +5166,52 @@ def admin_get_logs():
         if date_to:
             filter_conditions.append('date <= ?')
             filter_params.append(date_to)
-        
-        # Log tipine göre sorgu oluştur
-        if log_type == 'daily':
-            # Sadece besin logları
-            where_parts = ['dl.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    dl.id, dl.user_id, u.email, u.name, dl.date, dl.meal_type,
-                    dl.food_name, dl.calories, dl.protein, dl.carbs, dl.fat, dl.quantity,
-                    dl.created_at, 'daily' as log_type
-                FROM daily_logs dl
-                LEFT JOIN users u ON dl.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY dl.created_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            cursor.execute(query, filter_params + [limit, offset])
-            logs = [dict(row) for row in cursor.fetchall()]
-            
-            # Toplam sayı
-            count_where_parts = ['daily_logs.' + cond for cond in filter_conditions] if filter_conditions else []
-            count_where = ' AND '.join(count_where_parts) if count_where_parts else '1=1'
-            count_query = 'SELECT COUNT(*) as total FROM daily_logs WHERE ' + count_where
-            cursor.execute(count_query, filter_params)
-            total = cursor.fetchone()['total']
-            
-        elif log_type == 'water':
-            # Sadece su logları
-            where_parts = ['wl.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    wl.id, wl.user_id, u.email, u.name, wl.date, wl.amount,
-                    wl.created_at, 'water' as log_type
-                FROM water_logs wl
-                LEFT JOIN users u ON wl.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY wl.created_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            cursor.execute(query, filter_params + [limit, offset])
-            logs = [dict(row) for row in cursor.fetchall()]
-            
-            # Toplam sayı
-            count_where_parts = ['water_logs.' + cond for cond in filter_conditions] if filter_conditions else []
-            count_where = ' AND '.join(count_where_parts) if count_where_parts else '1=1'
-            count_query = 'SELECT COUNT(*) as total FROM water_logs WHERE ' + count_where
-            cursor.execute(count_query, filter_params)
-            total = cursor.fetchone()['total']
-            
-        elif log_type == 'exercise':
-            # Sadece egzersiz logları
-            where_parts = ['el.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    el.id, el.user_id, u.email, u.name, el.date, el.exercise_name,
-                    el.duration, el.calories_burned, el.created_at, 'exercise' as log_type
-                FROM exercise_logs el
-                LEFT JOIN users u ON el.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY el.created_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            cursor.execute(query, filter_params + [limit, offset])
-            logs = [dict(row) for row in cursor.fetchall()]
-            
-            # Toplam sayı
-            count_where_parts = ['exercise_logs.' + cond for cond in filter_conditions] if filter_conditions else []
-            count_where = ' AND '.join(count_where_parts) if count_where_parts else '1=1'
-            count_query = 'SELECT COUNT(*) as total FROM exercise_logs WHERE ' + count_where
-            cursor.execute(count_query, filter_params)
-            total = cursor.fetchone()['total']
-            
-        elif log_type == 'weight':
-            # Sadece kilo logları
-            where_parts = ['wl.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    wl.id, wl.user_id, u.email, u.name, wl.date, wl.weight,
-                    wl.created_at, 'weight' as log_type
-                FROM weight_logs wl
-                LEFT JOIN users u ON wl.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY wl.created_at DESC
-                LIMIT ? OFFSET ?
-            '''
-            cursor.execute(query, filter_params + [limit, offset])
-            logs = [dict(row) for row in cursor.fetchall()]
-            
-            # Toplam sayı
-            count_where_parts = ['weight_logs.' + cond for cond in filter_conditions] if filter_conditions else []
-            count_where = ' AND '.join(count_where_parts) if count_where_parts else '1=1'
-            count_query = 'SELECT COUNT(*) as total FROM weight_logs WHERE ' + count_where
-            cursor.execute(count_query, filter_params)
-            total = cursor.fetchone()['total']
-            
-        else:  # log_type == 'all'
-            # Tüm logları birleştir - her tablodan son 200 kaydı getir, sonra birleştir ve sırala
-            all_logs = []
-            fetch_limit = 200  # Her tablodan son 200 kayıt (sayfalama için yeterli)
-            
-            # Besin logları
-            where_parts = ['dl.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    dl.id, dl.user_id, u.email, u.name, dl.date, dl.meal_type,
-                    dl.food_name, dl.calories, dl.protein, dl.carbs, dl.fat, dl.quantity,
-                    dl.created_at, 'daily' as log_type
-                FROM daily_logs dl
-                LEFT JOIN users u ON dl.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY dl.created_at DESC
-                LIMIT ''' + str(fetch_limit)
-            cursor.execute(query, filter_params)
-            all_logs.extend([dict(row) for row in cursor.fetchall()])
-            
-            # Su logları
-            where_parts = ['wl.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    wl.id, wl.user_id, u.email, u.name, wl.date, wl.amount,
-                    wl.created_at, 'water' as log_type
-                FROM water_logs wl
-                LEFT JOIN users u ON wl.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY wl.created_at DESC
-                LIMIT ''' + str(fetch_limit)
-            cursor.execute(query, filter_params)
-            all_logs.extend([dict(row) for row in cursor.fetchall()])
-            
-            # Egzersiz logları
-            where_parts = ['el.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    el.id, el.user_id, u.email, u.name, el.date, el.exercise_name,
-                    el.duration, el.calories_burned, el.created_at, 'exercise' as log_type
-                FROM exercise_logs el
-                LEFT JOIN users u ON el.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY el.created_at DESC
-                LIMIT ''' + str(fetch_limit)
-            cursor.execute(query, filter_params)
-            all_logs.extend([dict(row) for row in cursor.fetchall()])
-            
-            # Kilo logları
-            where_parts = ['wl.' + cond for cond in filter_conditions] if filter_conditions else []
-            where_clause = ' AND '.join(where_parts) if where_parts else '1=1'
-            
-            query = '''
-                SELECT 
-                    wl.id, wl.user_id, u.email, u.name, wl.date, wl.weight,
-                    wl.created_at, 'weight' as log_type
-                FROM weight_logs wl
-                LEFT JOIN users u ON wl.user_id = u.id
-                WHERE ''' + where_clause + '''
-                ORDER BY wl.created_at DESC
-                LIMIT ''' + str(fetch_limit)
-            cursor.execute(query, filter_params)
-            all_logs.extend([dict(row) for row in cursor.fetchall()])
-            
-            # Toplam sayı (tüm loglar için)
-            total = 0
-            for table in ['daily_logs', 'water_logs', 'exercise_logs', 'weight_logs']:
-                count_where_parts = [table + '.' + cond for cond in filter_conditions] if filter_conditions else []
-                count_where = ' AND '.join(count_where_parts) if count_where_parts else '1=1'
-                count_query = 'SELECT COUNT(*) as total FROM ' + table + ' WHERE ' + count_where
-                cursor.execute(count_query, filter_params)
-                total += cursor.fetchone()['total']
-            
-            # Tarihe göre sırala
-            all_logs.sort(key=lambda x: x.get('created_at', '') or '', reverse=True)
-            
-            # Pagination uygula
-            logs = all_logs[offset:offset + limit]
-        
-        conn.close()
-        
-        return jsonify({
+
+        # İmleç varsa her tablodan en fazla limit+1 satır; eski page modunda offset kadar fazlası
+        offset = 0 if after is not None else (page - 1) * limit
+        fetch = offset + limit + 1
+
+        conn = get_db()
+        streams = [
+            _admin_log_rows(conn, rank, source, ['l.' + cond for cond in filter_conditions],
+                            filter_params, after, fetch)
+            for rank, source in sources
+        ]
+        merged = heapq.merge(*streams, key=operator.itemgetter(0), reverse=True)
+        page_rows = list(itertools.islice(merged, offset, offset + limit + 1))
+        for stream in streams:
+            stream.close()
+
+        logs, has_more, next_cursor = keyset_page([dict(row) for _, row in page_rows], limit,
+                                                  'created_at', 'log_type', 'id')
+
+        result = {
             'logs': logs,
-            'total': total,
-            'page': page,
-            'limit': limit
-        }), 200
-        
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+        }
+        if after is None:
+            result['page'] = page
+
+        if include_total:
+            def count_logs():
+                cursor = conn.cursor()
+                total = 0
+                where = ' AND '.join(filter_conditions) or '1=1'
+                for _, (_, table, _) in sources:
+                    cursor.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', filter_params)
+                    total += cursor.fetchone()[0]
+                return total
+
+            result['total'] = admin_count_cache.get(
+                ('logs', tuple(source[0] for _, source in sources), user_id_filter, date_from, date_to),
+                count_logs)
+
+        conn.close()
+
+        return jsonify(result), 200
+
     except Exception as e:
         import traceback
         traceback.print_exc()
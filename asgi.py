@@ -0,0 +1,189 @@
+"""
+ASGI entry point (opsiyonel) - mevcut Flask route'larını ASGI sunucusunda (uvicorn) çalıştırır
+Kullanım: uvicorn asgi:application --workers 2 --limit-concurrency 256
+      veya: gunicorn asgi:application -k asgi.LimitedUvicornWorker -w 2
+Bağlantılar event loop'ta beklenir; her istek (SQLite I/O dahil) sınırlı bir thread havuzunda
+çalışır, bcrypt ise app.py'deki ayrı CPU havuzunda (PASSWORD_HASH_THREADS).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Proje dizinini Python path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Environment variables yükle (varsa)
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # python-dotenv yüklü değilse devam et
+
+from app import app, init_db, password_hasher, DB_POOL_SIZE
+
+# İstekleri çalıştıran thread sayısı (worker başına). Her thread havuzdan kendi SQLite bağlantısını
+# tuttuğu için DB_POOL_SIZE'dan fazlası sadece bağlantı beklemeye yol açar.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', DB_POOL_SIZE))
+# Hash kuyruğu sınırı istek thread'lerinin yarısı (THREADS gunicorn gthread içindir)
+if 'PASSWORD_HASH_MAX_PENDING' not in os.environ:
+    password_hasher.max_pending = max(1, ASGI_THREADS // 2)
+# Bu boyuttan büyük istek gövdeleri (ör. besin içe aktarma) bellekte değil geçici dosyada tutulur
+ASGI_SPOOL_BYTES = int(os.getenv('ASGI_SPOOL_BYTES', 1024 * 1024))
+# Worker başına eşzamanlı bağlantı / istek sınırı; aşılınca uvicorn 503 döner (0: sınırsız)
+ASGI_LIMIT_CONCURRENCY = int(os.getenv('ASGI_LIMIT_CONCURRENCY', 0)) or None
+
+def build_environ(scope, body):
+    """ASGI http scope'undan WSGI environ oluştur (PEP 3333)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(body.tell()),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    body.seek(0)
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-length':
+            continue
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+            continue
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+class FlaskASGI:
+    """
+    WSGI uygulamasını ASGI'ye saran adaptör.
+    Bir istek baştan sona tek bir havuz thread'inde çalışır: SQLite bağlantıları thread'e ait olduğu için
+    stream_with_context ile akan yanıtlar (export) da aynı thread'de üretilir. Her parça event loop'a
+    gönderilip tamamlanması beklenir, böylece yavaş istemci üreticiyi doğal olarak yavaşlatır.
+    """
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS, spool_bytes=ASGI_SPOOL_BYTES):
+        self.wsgi_app = wsgi_app
+        self.spool_bytes = spool_bytes
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f"Desteklenmeyen ASGI scope: {scope['type']}")
+
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body', False):
+                    break
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self._run, scope, body, send, loop)
+        finally:
+            body.close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Süren istekler event loop'a yazmaya devam ettiği için burada beklenmez
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _run(self, scope, body, send, loop):
+        """Havuz thread'inde: WSGI uygulamasını çağır, yanıtı event loop üzerinden gönder"""
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        state = {'start': None, 'sent': False}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and state['sent']:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            }
+            return write
+
+        def write(data):
+            if data:
+                flush(data, more_body=True)
+
+        def flush(data, more_body):
+            if not state['sent']:
+                emit(state['start'])
+                state['sent'] = True
+            emit({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        iterable = self.wsgi_app(build_environ(scope, body), start_response)
+        try:
+            # Bir parça geride kal: tek parçalı (normal JSON) yanıtlar tek mesajda gider
+            pending = None
+            for chunk in iterable:
+                if not chunk:
+                    continue
+                if pending is not None:
+                    flush(pending, more_body=True)
+                pending = chunk
+            flush(pending or b'', more_body=False)
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+
+# Veritabanını başlat (sadece ilk çalıştırmada)
+try:
+    print("Veritabani baslatiliyor...")
+    init_db()
+    print("Veritabani baslatildi!")
+except Exception as e:
+    print(f"Veritabani baslatma hatasi (normal olabilir): {e}")
+    import traceback
+    traceback.print_exc()
+
+# ASGI application (uvicorn / gunicorn UvicornWorker bunu kullanır)
+application = FlaskASGI(app)
+
+# Gunicorn worker'ı: UvicornWorker + ASGI_LIMIT_CONCURRENCY (uvicorn yüklü değilse tanımlanmaz)
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:
+    UvicornWorker = None
+
+if UvicornWorker is not None:
+    class LimitedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = dict(UvicornWorker.CONFIG_KWARGS, limit_concurrency=ASGI_LIMIT_CONCURRENCY)
+
+# Development modu (eğer doğrudan çalıştırılırsa)
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.getenv('PORT', 5000))
+    host = os.getenv('HOST', '0.0.0.0')
+    uvicorn.run(application, host=host, port=port, limit_concurrency=ASGI_LIMIT_CONCURRENCY)
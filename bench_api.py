@@ -0,0 +1,488 @@
+"""
+API yük testi ve benchmark paketi - sentetik veri seti üzerinde gerçek akışların gecikmesini ölçer
+Kullanım: python bench_api.py [--users 50] [--years 1] [--foods 5000] [--mode client,http]
+                              [--requests 3000] [--duration 20] [--processes 4] [--concurrency 8]
+                              [--output sonuc.json] [--compare onceki.json]
+Geçici bir veritabanı kullanır, gerçek veritabanına dokunmaz. Veri seti (init_db şeması ile) ve istek
+karışımı --seed ile belirlenir; aynı parametrelerle farklı commit'lerde karşılaştırılabilir sonuç üretir.
+  client: Flask test client ile süreç içinde, sıralı (ağ / sunucu olmadan uygulama + SQLite maliyeti)
+  http:   gunicorn (WORKERS / THREADS) + çok süreçli HTTP yük üreticisi (--processes x --concurrency)
+Rapor endpoint başına istek sayısı, hata, req/s ve p50/p95/p99 içerir (JSON). --compare ile önceki
+rapora göre farklar yazdırılır; p95 --max-regression yüzdesinden fazla kötüleşirse çıkış kodu 1 olur.
+Giriş / kayıt akışları bcrypt maliyetini içerir; sadece uygulama yolunu ölçmek için BCRYPT_ROUNDS düşürülebilir.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla. JWT anahtarı sabitlenir: token'lar bu süreçte
+# üretilir ve http modunda başlatılan gunicorn süreci de aynı anahtarla doğrular.
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+os.environ.setdefault('JWT_SECRET_KEY', 'diyet-takip-benchmark-secret-key-0001')
+
+from flask_jwt_extended import create_access_token
+
+from app import (app, init_db, get_db, import_foods, hash_password, rebuild_daily_summaries,
+                 calculate_bmr, calculate_tdee, calculate_macros)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = '127.0.0.1'
+PORT = int(os.getenv('BENCH_PORT', 5056))
+WORKERS = os.getenv('WORKERS', '4')
+THREADS = os.getenv('THREADS', '1')
+PASSWORD = 'bench123'
+ADMIN_EMAIL = 'admin@diyettakip.com'
+
+MEAL_TYPES = ('Kahvaltı', 'Öğle', 'Akşam', 'Ara Öğün')
+EXERCISES = (('Yürüyüş', 4), ('Koşu', 10), ('Bisiklet', 8), ('Yüzme', 9), ('Fitness', 6))
+ACTIVITY_LEVELS = ('sedentary', 'light', 'moderate', 'active', 'very_active')
+GOALS = ('kilo verme', 'kilo koruma', 'kilo alma')
+
+# (ağırlık, ad) - istek karışımı: mobil uygulamanın okuma ağırlıklı kullanımı + admin paneli
+MIX = [
+    (4, 'register'),
+    (6, 'login'),
+    (14, 'log_food'),
+    (6, 'log_water'),
+    (16, 'daily_log'),
+    (10, 'foods_search'),
+    (8, 'statistics_weekly'),
+    (5, 'statistics_monthly'),
+    (5, 'statistics_range'),
+    (8, 'recommendations'),
+    (6, 'smart_recommendations'),
+    (4, 'profile'),
+    (3, 'admin_stats'),
+    (3, 'admin_users'),
+    (2, 'admin_logs'),
+]
+
+def generate_dataset(conn, users, years, foods, end_date, seed):
+    """
+    Sentetik veri seti: besin kataloğu, kullanıcılar ve her kullanıcı için `years` yıllık günlük
+    besin / su / egzersiz / kilo geçmişi. Aynı seed ve parametreler aynı satırları üretir.
+    """
+    rng = random.Random(seed)
+    counts = {}
+
+    records = []
+    for i in range(foods):
+        protein = round(rng.uniform(0, 30), 1)
+        carbs = round(rng.uniform(0, 70), 1)
+        fat = round(rng.uniform(0, 35), 1)
+        records.append((i, {'name': f'Besin {i}', 'calories': round(protein * 4 + carbs * 4 + fat * 9, 1),
+                            'protein': protein, 'carbs': carbs, 'fat': fat, 'serving_size': '100g',
+                            'category': f'Kategori {i % 12}'}))
+    import_foods(conn, records)
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name, calories, protein, carbs, fat FROM foods ORDER BY id')
+    catalog = [tuple(row) for row in cursor.fetchall()]
+    counts['foods'] = len(catalog)
+
+    hashed = hash_password(PASSWORD)
+    profiles = []
+    for i in range(users):
+        gender = rng.choice(('erkek', 'kadın'))
+        age = rng.randint(18, 65)
+        height = rng.randint(150, 195)
+        weight = round(rng.uniform(50, 120), 1)
+        activity_level = rng.choice(ACTIVITY_LEVELS)
+        goal = rng.choice(GOALS)
+        bmr = calculate_bmr(weight, height, age, gender)
+        tdee = calculate_tdee(bmr, activity_level)
+        macros = calculate_macros(tdee, goal, weight)
+        profiles.append((f'bench{i}@test.com', hashed, f'Bench {i}', age, gender, height, weight,
+                         round(weight + rng.uniform(-10, 5), 1), activity_level, goal, bmr, tdee,
+                         macros['daily_calories'], macros['protein'], macros['carbs'], macros['fat'],
+                         '2024-01-01T00:00:00'))
+    cursor.executemany('''
+        INSERT INTO users (email, password, name, age, gender, height, weight, target_weight,
+                           activity_level, goal, bmr, tdee, daily_calories, daily_protein,
+                           daily_carbs, daily_fat, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', profiles)
+    conn.commit()
+    cursor.execute('SELECT id, weight FROM users WHERE email LIKE ? ORDER BY id', ('bench%@test.com',))
+    user_rows = cursor.fetchall()
+    counts['users'] = len(user_rows)
+
+    days = [end_date - timedelta(days=offset) for offset in range(int(years * 365) - 1, -1, -1)]
+    totals = {'daily_logs': 0, 'water_logs': 0, 'exercise_logs': 0, 'weight_logs': 0}
+    for user_id, weight in user_rows:
+        daily_logs, water_logs, exercise_logs, weight_logs = [], [], [], []
+        for day in days:
+            day_text = day.isoformat()
+            for meal_index, meal_type in enumerate(MEAL_TYPES):
+                if meal_index == 3 and rng.random() < 0.5:
+                    continue
+                for _ in range(rng.randint(1, 2)):
+                    food_id, name, calories, protein, carbs, fat = rng.choice(catalog)
+                    quantity = rng.choice((0.5, 1, 1, 1.5, 2))
+                    daily_logs.append((user_id, day_text, meal_type, food_id, name,
+                                       round(calories * quantity, 1), round(protein * quantity, 1),
+                                       round(carbs * quantity, 1), round(fat * quantity, 1), quantity,
+                                       f'{day_text}T{8 + meal_index * 4:02d}:{rng.randrange(60):02d}:00'))
+            for glass in range(rng.randint(1, 4)):
+                water_logs.append((user_id, day_text, rng.choice((200, 250, 300, 500)),
+                                   f'{day_text}T{9 + glass * 3:02d}:00:00'))
+            if rng.random() < 0.4:
+                exercise, per_minute = rng.choice(EXERCISES)
+                duration = rng.randint(15, 90)
+                exercise_logs.append((user_id, day_text, exercise, duration, duration * per_minute,
+                                      f'{day_text}T19:00:00'))
+            if day.weekday() == 0:
+                weight = round(weight + rng.uniform(-0.6, 0.4), 1)
+                weight_logs.append((user_id, day_text, weight, f'{day_text}T07:30:00'))
+
+        cursor.executemany('''
+            INSERT INTO daily_logs (user_id, date, meal_type, food_id, food_name, calories, protein, carbs, fat,
+                                    quantity, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', daily_logs)
+        cursor.executemany('INSERT INTO water_logs (user_id, date, amount, created_at) VALUES (?, ?, ?, ?)',
+                           water_logs)
+        cursor.executemany('''
+            INSERT INTO exercise_logs (user_id, date, exercise_name, duration, calories_burned, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', exercise_logs)
+        cursor.executemany('INSERT INTO weight_logs (user_id, date, weight, created_at) VALUES (?, ?, ?, ?)',
+                           weight_logs)
+        cursor.execute('UPDATE users SET weight = ? WHERE id = ?', (weight, user_id))
+        conn.commit()
+        totals['daily_logs'] += len(daily_logs)
+        totals['water_logs'] += len(water_logs)
+        totals['exercise_logs'] += len(exercise_logs)
+        totals['weight_logs'] += len(weight_logs)
+
+    counts.update(totals)
+    counts['daily_summaries'] = rebuild_daily_summaries(conn)
+    return counts
+
+def issue_tokens(user_ids):
+    """Kullanıcı token'ları doğrudan üretilir; ölçülen giriş akışı 'login' isteklerindedir"""
+    with app.app_context():
+        return [create_access_token(identity=str(user_id)) for user_id in user_ids]
+
+class Scenario:
+    """
+    İstek karışımından sıradaki isteği üretir: (ad, method, path, body, token).
+    Her istemci kendi seed'i ile oluşturulur; aynı seed aynı istek dizisini verir.
+    """
+
+    def __init__(self, seed, tokens, admin_token, end_date, days, prefix):
+        self.rng = random.Random(seed)
+        self.tokens = tokens
+        self.admin_token = admin_token
+        self.end_date = end_date
+        self.days = days
+        self.prefix = prefix
+        self.registered = 0
+        self.names = [name for weight, name in MIX for _ in range(weight)]
+
+    def _day(self):
+        return (self.end_date - timedelta(days=self.rng.randrange(self.days))).isoformat()
+
+    def next(self):
+        rng = self.rng
+        name = rng.choice(self.names)
+        user = rng.randrange(len(self.tokens))
+        token = self.tokens[user]
+        if name == 'register':
+            self.registered += 1
+            body = {'email': f'{self.prefix}-{self.registered}@yeni.test', 'password': PASSWORD,
+                    'name': 'Yeni Kullanıcı', 'age': rng.randint(18, 65), 'gender': rng.choice(('erkek', 'kadın')),
+                    'height': rng.randint(150, 195), 'weight': rng.randint(50, 120), 'target_weight': 70,
+                    'activity_level': rng.choice(ACTIVITY_LEVELS), 'goal': rng.choice(GOALS)}
+            return name, 'POST', '/api/register', body, None
+        if name == 'login':
+            return name, 'POST', '/api/login', {'email': f'bench{user}@test.com', 'password': PASSWORD}, None
+        if name == 'log_food':
+            body = {'date': self.end_date.isoformat(), 'meal_type': rng.choice(MEAL_TYPES),
+                    'food_name': 'Ölçüm Besini', 'calories': 250, 'protein': 12, 'carbs': 30, 'fat': 8}
+            return name, 'POST', '/api/daily-log', body, token
+        if name == 'log_water':
+            return name, 'POST', '/api/water', {'date': self.end_date.isoformat(), 'amount': 250}, token
+        if name == 'daily_log':
+            return name, 'GET', f'/api/daily-log/{self._day()}', None, token
+        if name == 'foods_search':
+            return name, 'GET', f"/api/foods?search={quote(f'besin {rng.randrange(1000)}')}", None, token
+        if name == 'statistics_weekly':
+            return name, 'GET', '/api/statistics/weekly', None, token
+        if name == 'statistics_monthly':
+            return name, 'GET', '/api/statistics/monthly', None, token
+        if name == 'statistics_range':
+            start = self.end_date - timedelta(days=min(self.days, 365) - 1)
+            return (name, 'GET', f'/api/statistics/monthly?from={start.isoformat()}&to={self.end_date.isoformat()}'
+                                 f'&granularity=month', None, token)
+        if name == 'recommendations':
+            return name, 'GET', '/api/recommendations', None, token
+        if name == 'smart_recommendations':
+            return name, 'GET', f'/api/smart-recommendations?date={self._day()}', None, token
+        if name == 'profile':
+            return name, 'GET', '/api/user/profile', None, token
+        if name == 'admin_stats':
+            return name, 'GET', '/api/admin/stats', None, self.admin_token
+        if name == 'admin_users':
+            return name, 'GET', f"/api/admin/users?search={quote(f'bench{rng.randrange(100)}')}", None, self.admin_token
+        return name, 'GET', f'/api/admin/logs?type=all&limit=50&date_from={self._day()}', None, self.admin_token
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+def summarize(results, elapsed):
+    """(ad, status, ms) listesinden endpoint bazında rapor; hata = 2xx / 304 dışındaki yanıtlar"""
+    by_name = {}
+    for name, status, duration in results:
+        by_name.setdefault(name, []).append((status, duration))
+    endpoints = {}
+    for name in sorted(by_name):
+        samples = by_name[name]
+        ok = [duration for status, duration in samples if 200 <= status < 300 or status == 304]
+        statuses = {}
+        for status, _ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        endpoints[name] = {
+            'requests': len(samples),
+            'errors': len(samples) - len(ok),
+            'statuses': statuses,
+            'rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            'mean_ms': round(sum(ok) / len(ok), 3) if ok else 0.0,
+            'p50_ms': round(percentile(ok, 0.50), 3),
+            'p95_ms': round(percentile(ok, 0.95), 3),
+            'p99_ms': round(percentile(ok, 0.99), 3),
+            'max_ms': round(max(ok), 3) if ok else 0.0,
+        }
+    ok = [duration for _, status, duration in results if 200 <= status < 300 or status == 304]
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(ok, 0.50), 3),
+        'p95_ms': round(percentile(ok, 0.95), 3),
+        'p99_ms': round(percentile(ok, 0.99), 3),
+        'endpoints': endpoints,
+    }
+
+def run_client(total, tokens, admin_token, end_date, days, seed):
+    """Test client modu: istekler süreç içinde sırayla çalışır"""
+    client = app.test_client()
+    scenario = Scenario(seed, tokens, admin_token, end_date, days, f'client{seed}')
+    results = []
+    start = time.perf_counter()
+    for _ in range(total):
+        name, method, path, body, token = scenario.next()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        request_start = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        results.append((name, response.status_code, (time.perf_counter() - request_start) * 1000))
+    return summarize(results, time.perf_counter() - start)
+
+def http_request(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+def http_load_process(args):
+    """Yük üreticisi süreci: `concurrency` thread, her biri kalıcı bir HTTP bağlantısı ile"""
+    index, concurrency, duration, tokens, admin_token, end_date, days, seed = args
+    results = []
+    stop_at = time.time() + duration
+
+    def worker(thread_index):
+        client_seed = seed * 1000 + index * 100 + thread_index
+        scenario = Scenario(client_seed, tokens, admin_token, end_date, days, f'http{client_seed}')
+        conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+        while time.time() < stop_at:
+            name, method, path, body, token = scenario.next()
+            start = time.perf_counter()
+            try:
+                status = http_request(conn, method, path, body, token)
+            except (OSError, http.client.HTTPException):
+                status = 0
+                conn.close()
+                conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+            results.append((name, status, (time.perf_counter() - start) * 1000))
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def wait_ready(process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=2)
+            if http_request(conn, 'GET', '/api/health') == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def run_http(duration, processes, concurrency, tokens, admin_token, end_date, days, seed):
+    """HTTP modu: gunicorn başlatılır, yük ayrı süreçlerden üretilir (istemci GIL'i sunucuyu etkilemez)"""
+    command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'{HOST}:{PORT}', '--workers', WORKERS,
+               '--log-level', 'warning', '--chdir', BASE_DIR]
+    if int(THREADS) > 1:
+        command += ['--worker-class', 'gthread', '--threads', THREADS]
+    process = subprocess.Popen(command, env=dict(os.environ, PYTHONUNBUFFERED='1'),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        if not wait_ready(process):
+            output = process.stderr.read().decode(errors='replace')[-500:] if process.poll() is not None else 'zaman asimi'
+            raise RuntimeError(f"gunicorn baslatilamadi: {output}")
+        jobs = [(index, concurrency, duration, tokens, admin_token, end_date, days, seed)
+                for index in range(processes)]
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            results = [result for chunk in pool.map(http_load_process, jobs) for result in chunk]
+        return summarize(results, time.perf_counter() - start)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def print_report(mode, report):
+    print(f"\n[{mode}] {report['requests']} istek, {report['elapsed_s']:.1f} sn, {report['rps']:.1f} req/s, "
+          f"p50={report['p50_ms']:.1f} p95={report['p95_ms']:.1f} p99={report['p99_ms']:.1f} ms, hata={report['errors']}")
+    print(f"  {'endpoint':<22} {'istek':>7} {'hata':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in report['endpoints'].items():
+        print(f"  {name:<22} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+def compare_reports(baseline, current, max_regression):
+    """Önceki rapora göre endpoint bazında p95 / req/s farkı; eşiği aşan p95 artışlarını döndür"""
+    regressions = []
+    print(f"\nKarsilastirma: {baseline.get('git_revision') or '?'} -> {current.get('git_revision') or '?'}")
+    for mode, report in current['modes'].items():
+        previous = baseline.get('modes', {}).get(mode)
+        if previous is None:
+            print(f"[{mode}] onceki raporda yok")
+            continue
+        print(f"[{mode}] {'endpoint':<22} {'p95 once':>9} {'p95 simdi':>9} {'fark':>8} {'req/s fark':>10}")
+        for name, stats in report['endpoints'].items():
+            old = previous['endpoints'].get(name)
+            if old is None or not old['p95_ms']:
+                continue
+            change = (stats['p95_ms'] - old['p95_ms']) * 100 / old['p95_ms']
+            rps_change = (stats['rps'] - old['rps']) * 100 / old['rps'] if old['rps'] else 0.0
+            flag = ' !' if change > max_regression else ''
+            print(f"       {name:<22} {old['p95_ms']:>9.2f} {stats['p95_ms']:>9.2f} {change:>+7.1f}% "
+                  f"{rps_change:>+9.1f}%{flag}")
+            if change > max_regression:
+                regressions.append((mode, name, round(change, 1)))
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='API yük testi ve benchmark paketi')
+    parser.add_argument('--users', type=int, default=50, help='Sentetik kullanıcı sayısı')
+    parser.add_argument('--years', type=float, default=1, help='Kullanıcı başına geçmiş (yıl)')
+    parser.add_argument('--foods', type=int, default=5000, help='Besin kataloğu boyutu')
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date.today(),
+                        help='Geçmişin son günü (varsayılan: bugün, istatistik uçları bu güne göre çalışır)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mode', default='client,http', help='client, http veya ikisi (virgülle)')
+    parser.add_argument('--requests', type=int, default=3000, help='client modu istek sayısı')
+    parser.add_argument('--duration', type=float, default=20, help='http modu süresi (sn)')
+    parser.add_argument('--processes', type=int, default=4, help='http modu yük üreticisi süreç sayısı')
+    parser.add_argument('--concurrency', type=int, default=8, help='Süreç başına eşzamanlı bağlantı')
+    parser.add_argument('--output', help='JSON raporun yazılacağı dosya')
+    parser.add_argument('--compare', help='Karşılaştırılacak önceki JSON rapor')
+    parser.add_argument('--max-regression', type=float, default=20, help='İzin verilen p95 artışı (%%)')
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.mode.split(',') if mode.strip()]
+    for mode in modes:
+        if mode not in ('client', 'http'):
+            parser.error(f'Bilinmeyen mod: {mode}')
+
+    print(f"Veri seti olusturuluyor: {args.users} kullanici, {args.years:g} yil, {args.foods} besin...")
+    init_db()
+    conn = get_db()
+    seed_start = time.perf_counter()
+    counts = generate_dataset(conn, args.users, args.years, args.foods, args.end_date, args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM users WHERE email LIKE ? ORDER BY id', ('bench%@test.com',))
+    user_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM users WHERE email = ?', (ADMIN_EMAIL,))
+    admin_id = cursor.fetchone()[0]
+    conn.close()
+    print(f"  {', '.join(f'{name}={count}' for name, count in counts.items())} ({seed_seconds:.1f} sn, "
+          f"{os.path.getsize(os.environ['DB_PATH']) / 1024 / 1024:.1f} MB)")
+
+    tokens = issue_tokens(user_ids)
+    admin_token = issue_tokens([admin_id])[0]
+    days = max(1, int(args.years * 365))
+
+    report = {
+        'git_revision': git_revision(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'users': args.users, 'years': args.years, 'foods': args.foods, 'seed': args.seed,
+            'end_date': args.end_date.isoformat(), 'requests': args.requests, 'duration': args.duration,
+            'processes': args.processes, 'concurrency': args.concurrency, 'workers': WORKERS, 'threads': THREADS,
+            'bcrypt_rounds': os.getenv('BCRYPT_ROUNDS', '12'),
+        },
+        'dataset': dict(counts, seed_seconds=round(seed_seconds, 2)),
+        'modes': {},
+    }
+    for mode in modes:
+        if mode == 'client':
+            result = run_client(args.requests, tokens, admin_token, args.end_date, days, args.seed)
+        else:
+            result = run_http(args.duration, args.processes, args.concurrency, tokens, admin_token,
+                              args.end_date, days, args.seed)
+        report['modes'][mode] = result
+        print_report(mode, result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nRapor yazildi: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.max_regression)
+        if regressions:
+            print(f"\nUYARI: {len(regressions)} endpoint'te p95 %{args.max_regression:g} sinirini asti")
+            sys.exit(1)
@@ -0,0 +1,75 @@
+"""
+Barkod araması benchmark'ı - /api/foods/barcode/<kod> gecikmesini ölçer (önbellekli ve önbelleksiz)
+Kullanım: python bench_barcode.py [besin_sayisi] [istek_sayisi]
+Geçici bir veritabanı kullanır, gerçek veritabanına dokunmaz.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+
+from app import app, init_db, get_db, import_foods, barcode_cache
+
+def ean13(number):
+    """12 haneli gövdeye kontrol hanesi ekle"""
+    body = f'{number:012d}'
+    total = sum(int(digit) * (1 if index % 2 == 0 else 3) for index, digit in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+def seed(count):
+    records = ((i, {'name': f'Urun {i}', 'calories': 100, 'barcode': ean13(869000000000 + i)})
+               for i in range(count))
+    conn = get_db()
+    result = import_foods(conn, records)
+    conn.close()
+    return result
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def run(label, client, headers, codes):
+    timings = []
+    for code in codes:
+        start = time.perf_counter()
+        response = client.get(f'/api/foods/barcode/{code}', headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code in (200, 404), response.status_code
+    print(f"{label:<22} p50={percentile(timings, 0.50):6.3f} ms  p95={percentile(timings, 0.95):6.3f} ms  "
+          f"p99={percentile(timings, 0.99):6.3f} ms  max={max(timings):6.3f} ms")
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    requests_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    init_db()
+    print(f"{count} barkodlu besin ekleniyor...")
+    result = seed(count)
+    print(f"Eklendi: {result['inserted']} ({result['elapsed_ms'] / 1000:.1f} sn)")
+
+    client = app.test_client()
+    token = client.post('/api/admin/login', json={'email': 'admin@diyettakip.com', 'password': 'admin123'}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    rng = random.Random(42)
+    # Önbelleği aşan rastgele kodlar (her istek indeks araması) ve okuyucu patlaması (aynı kod tekrar tekrar)
+    cold = [ean13(869000000000 + rng.randrange(count)) for _ in range(requests_count)]
+    burst = [code for code in cold[:requests_count // 20] for _ in range(20)]
+    unknown = [ean13(400000000000 + rng.randrange(10 ** 6)) for _ in range(requests_count // 5)]
+
+    barcode_cache.size = 0
+    run('indeks (onbelleksiz)', client, headers, cold)
+    barcode_cache.size = 4096
+    run('okuyucu patlamasi', client, headers, burst)
+    run('bilinmeyen kod', client, headers, unknown)
+    print(barcode_cache.stats())
@@ -0,0 +1,84 @@
+"""
+Besin arama benchmark'ı - LIKE '%terim%' taraması ile FTS5 indeksini karşılaştırır
+Kullanım: python bench_food_search.py [besin_sayisi] [tekrar]
+Geçici bir veritabanı kullanır, gerçek veritabanına dokunmaz.
+Besin isimleri ortak kelimeler + rastgele marka/ürün adlarından üretilir (gerçek kataloglara benzer).
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+
+from app import init_db, get_db, food_search_query
+
+WORDS = ['Tavuk', 'Göğsü', 'Izgara', 'Pilav', 'Şeftali', 'Çilek', 'Ispanak', 'Kırmızı', 'Mercimek',
+         'Çorbası', 'Yoğurt', 'Ayran', 'İncir', 'Kuru', 'Fasulye', 'Peynir', 'Börek', 'Köfte', 'Balık',
+         'Somon', 'Zeytin', 'Ekmek', 'Tam', 'Buğday', 'Bulgur', 'Nohut', 'Üzüm', 'Elma', 'Armut', 'Süt']
+CATEGORIES = ['Et', 'Sebze', 'Meyve', 'Tahıl', 'Süt Ürünleri', 'Bakliyat', 'Çorba', 'Atıştırmalık']
+SYLLABLES = ['ka', 'ra', 'mi', 'şe', 'lo', 'tü', 'ba', 'ğa', 'zi', 'no', 'çe', 'pı', 'dö', 'ye', 'su', 'gü']
+QUERIES = ['tav', 'tavuk göğ', 'şef', 'incir', 'kırmızı mer', 'karami', 'şelo', 'tüba zi', 'nopı', 'xyz']
+
+def brand(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+def seed(count):
+    rng = random.Random(42)
+    conn = get_db()
+    cursor = conn.cursor()
+    rows = []
+    for i in range(count):
+        name = f"{brand(rng)} {' '.join(rng.sample(WORDS, rng.randint(1, 2)))} {brand(rng)}"
+        rows.append((name, rng.uniform(10, 900), rng.uniform(0, 40), rng.uniform(0, 80), rng.uniform(0, 60),
+                     '100g', None, rng.choice(CATEGORIES), '2024-01-01T00:00:00'))
+    cursor.executemany('''
+        INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def run(label, sql_builder, repeat):
+    conn = get_db()
+    cursor = conn.cursor()
+    timings = []
+    for _ in range(repeat):
+        for term in QUERIES:
+            sql, params = sql_builder(cursor, term)
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    print(f"{label:<8} p50={percentile(timings, 0.50):8.3f} ms  p95={percentile(timings, 0.95):8.3f} ms  "
+          f"max={max(timings):8.3f} ms")
+
+def like_query(cursor, term):
+    return 'SELECT * FROM foods WHERE name LIKE ? ORDER BY name LIMIT 200', [f'%{term}%']
+
+def fts_query(cursor, term):
+    return food_search_query(cursor, term, '', 200)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    init_db()
+    print(f"{count} besin ekleniyor...")
+    seed(count)
+    print(f"{len(QUERIES)} sorgu x {repeat} tekrar")
+    run('LIKE', like_query, repeat)
+    run('FTS5', fts_query, repeat)
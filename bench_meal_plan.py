@@ -0,0 +1,77 @@
+"""
+Öğün planı optimizasyonu benchmark'ı - /api/meal-plan gecikme bütçesini doğrular
+Kullanım: python bench_meal_plan.py [besin_sayisi] [deneme]
+Geçici bir veritabanı kullanır, gerçek veritabanına dokunmaz.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+
+from app import app, init_db, get_db, meal_plan_candidates, optimize_meal_plan, MEAL_PLAN_BUDGET_MS
+
+def seed(count):
+    """Makrolarla tutarlı kalorili rastgele besinler (100g / porsiyon)"""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        protein = rng.choice([rng.uniform(0, 5), rng.uniform(5, 30)])
+        carbs = rng.choice([rng.uniform(0, 10), rng.uniform(10, 80)])
+        fat = rng.choice([rng.uniform(0, 5), rng.uniform(5, 40)])
+        calories = protein * 4 + carbs * 4 + fat * 9
+        rows.append((f'Besin {i}', round(calories, 1), round(protein, 1), round(carbs, 1), round(fat, 1),
+                     '100g', None, 'Test', '2024-01-01T00:00:00'))
+    conn = get_db()
+    conn.executemany('''
+        INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    trials = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    init_db()
+    print(f"{count} besin ekleniyor...")
+    seed(count)
+
+    with app.app_context():
+        conn = get_db()
+        start = time.perf_counter()
+        pool = meal_plan_candidates.sync(conn.cursor())
+        build_ms = (time.perf_counter() - start) * 1000
+        conn.close()
+    print(f"Aday havuzu: {len(pool)} aday ({build_ms:.1f} ms, katalog versiyonu basina bir kez)")
+
+    rng = random.Random(7)
+    timings = []
+    hits = 0
+    for _ in range(trials):
+        calories = rng.uniform(300, 2500)
+        target = (calories, calories * rng.uniform(0.15, 0.35) / 4,
+                  calories * rng.uniform(0.3, 0.55) / 4, calories * rng.uniform(0.2, 0.35) / 9)
+        start = time.perf_counter()
+        plan = optimize_meal_plan(pool, target)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += plan['within_tolerance']
+
+    print(f"{trials} hedef, butce {MEAL_PLAN_BUDGET_MS:.0f} ms")
+    print(f"p50={percentile(timings, 0.50):.2f} ms  p95={percentile(timings, 0.95):.2f} ms  "
+          f"p99={percentile(timings, 0.99):.2f} ms  max={max(timings):.2f} ms")
+    print(f"Tolerans icinde: {hits}/{trials} ({hits * 100 / trials:.1f}%)")
@@ -0,0 +1,106 @@
+"""
+Beslenme hesaplama çekirdeği micro-benchmark'ı - tekil fonksiyon döngüsü ile toplu (batch) yolu karşılaştırır
+Kullanım: python bench_nutrition.py [kullanici_sayisi] [deneme]
+  örnek: python bench_nutrition.py 1000000 3
+Veritabanı kullanılmaz. Sonuçların bit düzeyinde aynı olduğu da doğrulanır.
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla (import sırasında gerçek veritabanı açılmasın)
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+
+from app import (calculate_bmr, calculate_tdee, calculate_macros, calculate_nutrition_batch,
+                 ACTIVITY_MULTIPLIERS, GOAL_CALORIE_ADJUSTMENTS, NUTRITION_BATCH_FIELDS as FIELDS)
+
+# Sıfır çevresi: batch yolu sonuçları ham BMR anahtarıyla önbelleğe aldığı için 0.0 / -0.0 işaretinin
+# tekil yolla aynı kaldığı ayrıca doğrulanır
+EDGE_CASES = [
+    (0.0, 0.0, 1, 'erkek', 'sedentary', 'kilo koruma'),      # ham BMR: 0 + 0 - 5 + 5 = 0.0
+    (-0.0004, 0.0, 1, 'erkek', 'sedentary', 'kilo koruma'),  # ham BMR -0.004 -> round -> -0.0 (tüm zincir -0.0)
+    (0.0004, 0.0, 1, 'erkek', 'sedentary', 'kilo koruma'),   # ham BMR 0.004 -> round -> 0.0
+    (-0.0, -0.0, 1, 'erkek', 'moderate', 'kilo koruma'),     # -0.0 girdiler: ham BMR yine 0.0
+    (-0.0004, 0.0, 1, 'erkek', 'sedentary', 'kilo verme'),   # -0.0 BMR + hedef farkı
+]
+
+def generate(count, seed=42):
+    """Kayıtlı kullanıcılara benzer girdiler (kilo ve boy ondalıklı, yaş tam sayı)"""
+    rng = random.Random(seed)
+    genders = ('erkek', 'kadın', 'Erkek', 'male', 'female')
+    activity_levels = tuple(ACTIVITY_MULTIPLIERS) + ('Moderate',)
+    goals = tuple(GOAL_CALORIE_ADJUSTMENTS) + ('kilo koruma',)
+    return (
+        array('d', (round(rng.uniform(45, 140), 1) for _ in range(count))),
+        array('d', (round(rng.uniform(145, 205), 1) for _ in range(count))),
+        array('q', (rng.randint(16, 80) for _ in range(count))),
+        [rng.choice(genders) for _ in range(count)],
+        [rng.choice(activity_levels) for _ in range(count)],
+        [rng.choice(goals) for _ in range(count)],
+    )
+
+def with_edge_cases(inputs):
+    """Girdilerin sonuna EDGE_CASES satırlarını ekle"""
+    for column, values in zip(inputs, zip(*EDGE_CASES)):
+        column.extend(values)
+    return inputs
+
+def scalar(weights, heights, ages, genders, activity_levels, goals):
+    """Bugünkü yol: kullanıcı başına calculate_bmr -> calculate_tdee -> calculate_macros"""
+    result = {field: array('d') for field in FIELDS}
+    for weight, height, age, gender, activity_level, goal in zip(weights, heights, ages, genders,
+                                                                  activity_levels, goals):
+        bmr = calculate_bmr(weight, height, age, gender)
+        tdee = calculate_tdee(bmr, activity_level)
+        macros = calculate_macros(tdee, goal, weight)
+        result['bmr'].append(bmr)
+        result['tdee'].append(tdee)
+        result['daily_calories'].append(macros['daily_calories'])
+        result['protein'].append(macros['protein'])
+        result['carbs'].append(macros['carbs'])
+        result['fat'].append(macros['fat'])
+    return result
+
+def best_of(trials, function, inputs):
+    timings = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        result = function(*inputs)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    trials = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{count} kullanici icin girdiler olusturuluyor...")
+    inputs = with_edge_cases(generate(count))
+
+    scalar_seconds, expected = best_of(trials, scalar, inputs)
+    batch_seconds, actual = best_of(trials, calculate_nutrition_batch, inputs)
+
+    # Bit düzeyinde karşılaştırma (tobytes: -0.0 / NaN farkları da yakalanır)
+    mismatched = [field for field in FIELDS if expected[field].tobytes() != actual[field].tobytes()]
+    print(f"En iyi {trials} deneme:")
+    print(f"  tekil dongu: {scalar_seconds:7.3f} sn  ({count / scalar_seconds / 1e6:.2f} M kullanici/sn)")
+    print(f"  batch:       {batch_seconds:7.3f} sn  ({count / batch_seconds / 1e6:.2f} M kullanici/sn)  "
+          f"x{scalar_seconds / batch_seconds:.2f}")
+    if mismatched:
+        print(f"HATA: Sonuclar farkli: {', '.join(mismatched)}")
+        sys.exit(1)
+    # Örneklerin gerçekten -0.0 ürettiğini de kontrol et (aksi halde karşılaştırma işareti sınamaz)
+    negative_zeros = sum(1 for value in actual['bmr'][count:] if value == 0 and math.copysign(1, value) < 0)
+    if negative_zeros != 2:
+        print(f"HATA: Sifir ornekleri beklenen -0.0 degerlerini uretmedi ({negative_zeros})")
+        sys.exit(1)
+    print("OK: Sonuclar bit duzeyinde ayni (0.0 / -0.0 ornekleri dahil)")
@@ -0,0 +1,127 @@
+"""
+Akıllı öneri benchmark'ı - eski kova başına SQL sorgularını (ORDER BY ... LIMIT 5) bellekteki besin matrisiyle karşılaştırır
+Kullanım: python bench_recommendations.py [besin_sayisi] [tekrar]
+  örnek: python bench_recommendations.py 100000 50
+Geçici bir veritabanı kullanır, gerçek veritabanına dokunmaz. İki yolun aynı besinleri seçtiği de doğrulanır.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+
+from app import init_db, get_db, NutrientMatrix
+
+# get_smart_recommendations'ın kurduğu kovalar: (senaryo, kalan kalori, [(isim, filtreler, sıralama)])
+SCENARIOS = [
+    ('kilo verme', 1200, [
+        ('protein', [('protein', '>', 10), ('calories', '<=', 500)], [('protein', 'desc'), ('calories', 'asc')]),
+        ('carbs', [('carbs', '>', 15), ('calories', '<=', 500)], [('carbs', 'desc'), ('calories', 'asc')]),
+        ('fat', [('fat', '>', 5), ('calories', '<=', 500)], [('fat', 'desc'), ('calories', 'asc')]),
+        ('low_calorie', [('calories', '<', 150), ('calories', '<=', 300)], [('calories', 'asc'), ('protein', 'desc')]),
+        ('weight_loss', [('protein', '>', 15), ('calories', '<', 200), ('calories', '<=', 400)],
+         [('protein', 'desc'), ('calories', 'asc')]),
+    ]),
+    ('kilo alma', 900, [
+        ('protein', [('protein', '>', 10), ('calories', '<=', 500)], [('protein', 'desc'), ('calories', 'asc')]),
+        ('high_calorie', [('calories', '>', 200), ('calories', '<=', 800)], [('calories', 'desc')]),
+        ('weight_gain', [('protein', '>', 10), ('calories', '>', 200), ('calories', '<=', 800)],
+         [('calories', 'desc'), ('protein', 'desc')]),
+    ]),
+    # Günün sonu: kalan kalori az, filtrelerden çok az besin geçer (en kötü durum)
+    ('gun sonu', 40, [
+        ('protein', [('protein', '>', 10), ('calories', '<=', 40)], [('protein', 'desc'), ('calories', 'asc')]),
+        ('weight_loss', [('protein', '>', 15), ('calories', '<', 200), ('calories', '<=', 40)],
+         [('protein', 'desc'), ('calories', 'asc')]),
+    ]),
+]
+
+def seed(count):
+    """Makrolarla tutarlı kalorili rastgele besinler; bir kısmının makroları boş (NULL)"""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        protein = rng.choice([rng.uniform(0, 5), rng.uniform(5, 35)])
+        carbs = rng.choice([rng.uniform(0, 10), rng.uniform(10, 80)])
+        fat = rng.choice([rng.uniform(0, 5), rng.uniform(5, 40)])
+        calories = round(protein * 4 + carbs * 4 + fat * 9, 1)
+        if rng.random() < 0.02:
+            protein = None
+        rows.append((f'Besin {i}', calories, protein, round(carbs, 1), round(fat, 1),
+                     '100g', None, 'Test', '2024-01-01T00:00:00'))
+    conn = get_db()
+    conn.executemany('''
+        INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, barcode, category, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+def sql_top_k(cursor, buckets, k=5):
+    """Eski yol: kova başına bir SELECT * ... ORDER BY ... LIMIT k (eşitlikte id sırası eklenir)"""
+    result = {}
+    for name, filters, order in buckets:
+        where = ' AND '.join(f'{column} {op} ?' for column, op, _ in filters)
+        order_by = ', '.join(f'{column} {direction.upper()}' for column, direction in order)
+        cursor.execute(f'SELECT * FROM foods WHERE {where} ORDER BY {order_by}, id LIMIT {k}',
+                       [value for _, _, value in filters])
+        result[name] = [dict(row) for row in cursor.fetchall()]
+    return result
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    init_db()
+    print(f"{count} besin ekleniyor...")
+    seed(count)
+
+    conn = get_db()
+    cursor = conn.cursor()
+    engine = NutrientMatrix()
+    start = time.perf_counter()
+    engine.sync(cursor)
+    sync_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _, _, buckets in SCENARIOS:
+        engine.top_k(cursor, buckets)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Matris kurulumu: {sync_ms:.1f} ms, siralamalar: {build_ms:.1f} ms (katalog versiyonu basina bir kez)")
+
+    failed = False
+    for label, _, buckets in SCENARIOS:
+        sql_timings, expected = measure(lambda: sql_top_k(cursor, buckets), repeat)
+        engine_timings, actual = measure(lambda: engine.top_k(cursor, buckets), repeat)
+        print(f"{label:<11} SQL    p50={percentile(sql_timings, 0.50):8.3f} ms  p95={percentile(sql_timings, 0.95):8.3f} ms")
+        print(f"{'':<11} matris p50={percentile(engine_timings, 0.50):8.3f} ms  "
+              f"p95={percentile(engine_timings, 0.95):8.3f} ms  "
+              f"x{percentile(sql_timings, 0.50) / percentile(engine_timings, 0.50):.1f}")
+        for name in expected:
+            if [row['id'] for row in expected[name]] != [row['id'] for row in actual[name]]:
+                print(f"HATA: {label} / {name} kovasi farkli")
+                failed = True
+    conn.close()
+    if failed:
+        sys.exit(1)
+    print("OK: Tum kovalar SQL ile ayni")
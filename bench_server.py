@@ -0,0 +1,165 @@
+"""
+Sunucu modu yük testi - sync (gunicorn), gthread ve asgi (uvicorn worker) modlarında req/s ve p99 karşılaştırır
+Kullanım: python bench_server.py [sure_sn] [eszamanli_istemci] [modlar]
+  örnek: python bench_server.py 15 32 sync,gthread,asgi
+Geçici bir veritabanı kullanır, gerçek veritabanına dokunmaz. Her mod ayrı bir gunicorn süreci olarak
+başlatılır (WORKERS / THREADS / ASGI_THREADS environment variable'ları ile ayarlanabilir).
+İstek karışımı mobil uygulamanın sabah açılışına benzer: okumalar, log yazma ve giriş (bcrypt).
+"""
+import http.client
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# app import edilmeden önce geçici veritabanı yolunu ayarla
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_bench_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'bench.db')
+
+from app import init_db, get_db, import_foods, hash_password
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = '127.0.0.1'
+PORT = int(os.getenv('BENCH_PORT', 5055))
+USERS = 50
+PASSWORD = 'bench123'
+WORKERS = os.getenv('WORKERS', '4')
+THREADS = os.getenv('THREADS', '8')
+
+MODES = {
+    'sync': ['app:app', '--workers', WORKERS],
+    'gthread': ['app:app', '--workers', WORKERS, '--worker-class', 'gthread', '--threads', THREADS],
+    'asgi': ['asgi:application', '--workers', WORKERS, '--worker-class', 'asgi.LimitedUvicornWorker'],
+}
+
+# (ağırlık, ad) - istek karışımı
+MIX = [(40, 'foods'), (25, 'daily_log'), (10, 'health'), (15, 'water'), (10, 'login')]
+
+def seed():
+    init_db()
+    conn = get_db()
+    records = ((i, {'name': f'Besin {i}', 'calories': 50 + i % 400, 'protein': i % 30, 'category': f'K{i % 8}'})
+               for i in range(5000))
+    import_foods(conn, records)
+    hashed = hash_password(PASSWORD)
+    conn.executemany('''
+        INSERT INTO users (email, password, name, age, gender, height, weight, target_weight, activity_level, goal,
+                           daily_calories, daily_protein, daily_carbs, daily_fat, created_at)
+        VALUES (?, ?, ?, 30, 'erkek', 180, 80, 75, 'moderate', 'kilo verme', 2000, 150, 200, 66, '2024-01-01T00:00:00')
+    ''', [(f'bench{i}@test.com', hashed, f'Bench {i}') for i in range(USERS)])
+    conn.commit()
+    conn.close()
+
+def request(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, data
+
+def wait_ready(process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=2)
+            if request(conn, 'GET', '/api/health')[0] == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def client(results, tokens, stop_at, seed_value):
+    rng = random.Random(seed_value)
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+    user = rng.randrange(USERS)
+    token = tokens[user]
+    names = [name for weight, name in MIX for _ in range(weight)]
+    while time.time() < stop_at:
+        kind = rng.choice(names)
+        if kind == 'foods':
+            args = ('GET', f"/api/foods?search={quote(f'besin {rng.randrange(500)}')}")
+        elif kind == 'daily_log':
+            args = ('GET', '/api/daily-log/2024-06-01')
+        elif kind == 'health':
+            args = ('GET', '/api/health')
+        elif kind == 'water':
+            args = ('POST', '/api/water', {'date': '2024-06-01', 'amount': 200})
+        else:
+            args = ('POST', '/api/login', {'email': f'bench{user}@test.com', 'password': PASSWORD})
+        start = time.perf_counter()
+        try:
+            status, _ = request(conn, *args, token=token)
+        except (OSError, http.client.HTTPException):
+            status = 0
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+        results.append((kind, status, (time.perf_counter() - start) * 1000))
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+def run_mode(mode, duration, concurrency):
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'{HOST}:{PORT}', '--log-level', 'warning',
+               '--chdir', BASE_DIR] + MODES[mode]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        if not wait_ready(process):
+            print(f"{mode:<8} baslatilamadi: {process.stderr.read().decode(errors='replace')[-500:] if process.poll() is not None else 'zaman asimi'}")
+            return
+        conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+        tokens = []
+        for i in range(USERS):
+            status, data = request(conn, 'POST', '/api/login', {'email': f'bench{i}@test.com', 'password': PASSWORD})
+            tokens.append(json.loads(data)['token'])
+
+        results = []
+        stop_at = time.time() + duration
+        threads = [threading.Thread(target=client, args=(results, tokens, stop_at, i)) for i in range(concurrency)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+
+        ok = [r for r in results if 200 <= r[1] < 300]
+        errors = len(results) - len(ok)
+        print(f"{mode:<8} {len(ok) / elapsed:8.1f} req/s  p50={percentile([r[2] for r in ok], 0.50):7.1f} ms  "
+              f"p99={percentile([r[2] for r in ok], 0.99):7.1f} ms  hata={errors}")
+        for kind in ('health', 'foods', 'login'):
+            samples = [r[2] for r in ok if r[0] == kind]
+            print(f"         {kind:<10} p50={percentile(samples, 0.50):7.1f} ms  p99={percentile(samples, 0.99):7.1f} ms")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+if __name__ == '__main__':
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 15
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    modes = sys.argv[3].split(',') if len(sys.argv) > 3 else list(MODES)
+    if 'asgi' in modes and importlib.util.find_spec('uvicorn') is None:
+        print("uvicorn yuklu degil, asgi modu atlaniyor (pip install uvicorn)")
+        modes.remove('asgi')
+    print("Veritabani hazirlaniyor...")
+    seed()
+    print(f"{duration:.0f} sn, {concurrency} eszamanli istemci, WORKERS={WORKERS} THREADS={THREADS}")
+    for mode in modes:
+        run_mode(mode, duration, concurrency)
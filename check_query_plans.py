@@ -0,0 +1,38 @@
+"""
+Sık sorguların EXPLAIN QUERY PLAN kontrolü
+Tam tablo taraması (SCAN) yapan sorgu varsa çıkış kodu 1 olur
+"""
+import sys
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from app import init_db, get_db, explain_hot_queries
+
+def check_query_plans():
+    """Migration'ları uygula ve her sorgunun planını yazdır"""
+    init_db()
+    conn = get_db()
+    report = explain_hot_queries(conn)
+    conn.close()
+
+    failed = []
+    for name, item in report.items():
+        status = 'SCAN!' if item['full_scan'] else 'OK'
+        print(f"[{status}] {name}")
+        for step in item['plan']:
+            print(f"    {step}")
+        if item['full_scan']:
+            failed.append(name)
+
+    if failed:
+        print(f"HATA: {len(failed)} sorgu tam tablo taramasi yapiyor: {', '.join(failed)}")
+    else:
+        print("OK: Tum sorgular indeks kullaniyor")
+    return not failed
+
+if __name__ == '__main__':
+    sys.exit(0 if check_query_plans() else 1)
@@ -0,0 +1,41 @@
+"""
+Besin kataloğunu dosyadan toplu içe aktarma scripti (CSV / NDJSON / JSON)
+Kullanım: python import_foods.py <dosya> [--dry-run] [--format csv|ndjson|json]
+Satırlar barkod veya (isim, porsiyon) eşleşmesine göre güncellenir, eşleşmeyenler eklenir.
+CSV başlıkları: name, calories, protein, carbs, fat, serving_size, barcode, category
+"""
+import argparse
+import sys
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from app import init_db, get_db, import_foods, iter_food_import_records, detect_import_format, IMPORT_FORMATS
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Besin kataloğunu toplu içe aktar')
+    parser.add_argument('path', help='CSV, NDJSON veya JSON dosyası')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='Varsayılan: dosya uzantısından')
+    parser.add_argument('--dry-run', action='store_true', help='Sadece doğrula, veritabanına yazma')
+    args = parser.parse_args()
+
+    import_format = args.format or detect_import_format(args.path, None)
+    if import_format is None:
+        print("HATA: Format anlasilamadi, --format ile belirtin")
+        sys.exit(2)
+
+    init_db()
+    conn = get_db()
+    with open(args.path, encoding='utf-8-sig', newline='') as source:
+        result = import_foods(conn, iter_food_import_records(source, import_format), dry_run=args.dry_run)
+    conn.close()
+
+    for error in result['errors']:
+        print(f"  satir {error['line']}: {error['error']}")
+    print(f"{'DRY RUN - ' if result['dry_run'] else ''}Eklenen: {result['inserted']}, Guncellenen: {result['updated']}, "
+          f"Reddedilen: {result['rejected']}, Dosyada tekrar eden: {result['duplicates']} "
+          f"({result['elapsed_ms'] / 1000:.2f} sn)")
+    sys.exit(1 if result['rejected'] else 0)
@@ -0,0 +1,24 @@
+"""
+Günlük özet tablosunu (daily_summaries) ham log tablolarından yeniden oluşturma scripti
+Kullanım: python rebuild_summaries.py [user_id]
+"""
+import sys
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from app import init_db, get_db, rebuild_daily_summaries
+
+if __name__ == '__main__':
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    init_db()
+    conn = get_db()
+    total = rebuild_daily_summaries(conn, user_id)
+    conn.close()
+    if user_id is None:
+        print(f"OK: Tum ozetler yeniden olusturuldu ({total} kayit)")
+    else:
+        print(f"OK: Kullanici {user_id} icin ozetler yeniden olusturuldu (toplam {total} kayit)")
@@ -0,0 +1,51 @@
+"""
+Kullanıcı hedeflerini (bmr, tdee, günlük kalori / makro) güncel formüllerle yeniden hesaplama scripti
+Kullanım: python recalculate_targets.py [--chunk-size 500] [--restart] [--pause 0]
+Yarım kalan iş varsa kaldığı yerden devam eder (--restart ile baştan başlar). Admin paneli /
+API üzerinden çalışan canlı bir iş varsa başlamaz.
+"""
+import argparse
+import sys
+
+# UTF-8 encoding ayarla (Windows icin)
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from app import (init_db, get_db, start_recalculation_job, run_recalculation_job, recalculation_job_dict,
+                 RecalculationJobBusy, RECALC_CHUNK_SIZE, RECALC_MAX_CHUNK_SIZE)
+
+def print_progress(job):
+    print(f"  %{job['progress']:5.1f}  islenen={job['processed']}/{job['total']}  guncellenen={job['updated']}  "
+          f"atlanan={job['skipped']}  son_id={job['last_user_id']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Kullanıcı hedeflerini yeniden hesapla')
+    parser.add_argument('--chunk-size', type=int, default=RECALC_CHUNK_SIZE,
+                        help=f'Parça başına kullanıcı (1-{RECALC_MAX_CHUNK_SIZE})')
+    parser.add_argument('--restart', action='store_true', help='Yarım kalan işi yok say, baştan başla')
+    parser.add_argument('--pause', type=float, default=0, help='Parçalar arası bekleme (sn)')
+    args = parser.parse_args()
+    if not 1 <= args.chunk_size <= RECALC_MAX_CHUNK_SIZE:
+        parser.error(f'--chunk-size 1 ile {RECALC_MAX_CHUNK_SIZE} arasında olmalı')
+
+    init_db()
+    conn = get_db()
+    try:
+        job, owner, resumed = start_recalculation_job(conn, args.chunk_size, restart=args.restart)
+    except RecalculationJobBusy as e:
+        print(f"HATA: {e} (is {e.job['id']}, %{e.job['progress']})")
+        sys.exit(1)
+    print(f"Is {job['id']} {'kaldigi yerden devam ediyor' if resumed else 'baslatildi'} "
+          f"(son_id={job['last_user_id']}, parca={job['chunk_size']})")
+    run_recalculation_job(job['id'], owner, pause=args.pause, on_progress=print_progress)
+
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM recalculation_jobs WHERE id = ?', (job['id'],))
+    job = recalculation_job_dict(cursor.fetchone())
+    conn.close()
+    if job['status'] != 'completed':
+        print(f"HATA: Is {job['id']} durumu: {job['status']} {job['error'] or ''}")
+        sys.exit(1)
+    print(f"OK: {job['processed']} kullanici islendi, {job['updated']} guncellendi, {job['skipped']} atlandi")
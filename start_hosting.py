@@ -2,6 +2,27 @@
 """
 Hosting için basit başlatma scripti
 Bu script hosting'de uygulamayı başlatmak için kullanılabilir
+
+Sunucu modları (SERVER_MODE):
+  sync  (varsayılan) Gunicorn gthread worker'ları, THREADS=4 (THREADS=1 ise sync) - Procfile ile aynı
+  asgi  Gunicorn + uvicorn worker'ları, asgi.py üzerinden (pip install uvicorn gerekir)
+
+Worker / thread boyutlandırma (N = CPU çekirdek sayısı):
+  sync   WORKERS = 2N+1. Her worker aynı anda tek istek işler; bir bcrypt girişi (~250 ms)
+         worker'ı tamamen bloklar, bu yüzden giriş yoğunluğunda WORKERS'ı artırmak gerekir.
+  gthread WORKERS = N, THREADS = 4-8. SQLite okumaları WAL sayesinde paraleldir, yazmalar tek
+         yazıcıyla sıraya girer; THREADS, DB_POOL_SIZE'dan büyük olmamalı.
+  asgi   WORKERS = N (worker başına bir event loop), ASGI_THREADS = DB_POOL_SIZE (varsayılan 16).
+         Bekleyen bağlantılar thread tutmaz; ASGI_LIMIT_CONCURRENCY ayarlanırsa worker başına
+         bu sayının üzerindeki bağlantı / istekler 503 alır (varsayılan: sınırsız).
+  bcrypt Her worker'da ayrı havuz: WORKERS x PASSWORD_HASH_THREADS toplamı N'i geçmemeli
+         (ör. 4 çekirdek, 4 worker -> PASSWORD_HASH_THREADS=1). Kuyruk PASSWORD_HASH_MAX_PENDING'i
+         (varsayılan: THREADS / 2, asgi'de ASGI_THREADS / 2) aşınca giriş istekleri 503 + Retry-After
+         alır ve kalan thread'ler sağlık / okuma isteklerine kalır. THREADS=1 (sync) ile worker başına
+         tek istek işlendiğinden kuyruk hiç dolmaz; giriş yoğunluğunda sync kullanmayın.
+         Maliyet BCRYPT_ROUNDS ile ayarlanır (varsayılan 12, her +1 süreyi ikiye katlar).
+  Bellek üst sınırı kabaca WORKERS x DB_POOL_SIZE x DB_CACHE_SIZE_KB kadardır.
+Karşılaştırma için: python bench_server.py
 """
 import os
 import sys
@@ -16,16 +37,23 @@ try:
 except ImportError:
     pass  # python-dotenv yüklü değilse devam et
 
+server_mode = os.getenv('SERVER_MODE', 'sync').lower()
+
 # Flask uygulamasını import et
 from app import app, init_db
 
-# Veritabanını başlat (sadece ilk çalıştırmada)
-try:
-    print("Veritabani baslatiliyor...")
-    init_db()
-    print("Veritabani baslatildi!")
-except Exception as e:
-    print(f"Veritabani baslatma hatasi (normal olabilir): {e}")
+if server_mode == 'asgi':
+    # asgi.py veritabanını kendisi başlatır
+    from asgi import application, ASGI_THREADS, ASGI_LIMIT_CONCURRENCY
+else:
+    application = app
+    # Veritabanını başlat (sadece ilk çalıştırmada)
+    try:
+        print("Veritabani baslatiliyor...")
+        init_db()
+        print("Veritabani baslatildi!")
+    except Exception as e:
+        print(f"Veritabani baslatma hatasi (normal olabilir): {e}")
 
 # Gunicorn ile başlat (eğer gunicorn yüklüyse)
 try:
@@ -33,14 +61,20 @@ try:
     port = int(os.getenv('PORT', 5000))
     host = os.getenv('HOST', '0.0.0.0')
     workers = int(os.getenv('WORKERS', 4))
+    threads = int(os.getenv('THREADS', 4))
     timeout = int(os.getenv('TIMEOUT', 120))
     
     print("=" * 60)
-    print("Diyet Takip - Backend API (Gunicorn)")
+    print(f"Diyet Takip - Backend API (Gunicorn, {server_mode})")
     print("=" * 60)
     print(f"Host: {host}")
     print(f"Port: {port}")
     print(f"Workers: {workers}")
+    if server_mode == 'asgi':
+        print(f"ASGI threads: {ASGI_THREADS}")
+        print(f"Limit concurrency: {ASGI_LIMIT_CONCURRENCY or 'sinirsiz'}")
+    else:
+        print(f"Threads: {threads}")
     print(f"Timeout: {timeout}")
     print("=" * 60)
     print("Backend baslatildi! Mobil uygulamayi baslatabilirsiniz.")
@@ -69,8 +103,13 @@ try:
         'accesslog': '-',
         'errorlog': '-',
     }
+    if server_mode == 'asgi':
+        options['worker_class'] = 'asgi.LimitedUvicornWorker'
+    elif threads > 1:
+        options['worker_class'] = 'gthread'
+        options['threads'] = threads
     
-    StandaloneApplication(app, options).run()
+    StandaloneApplication(application, options).run()
 except ImportError:
     # Gunicorn yüklü değilse Flask'ın kendi server'ını kullan
     print("=" * 60)
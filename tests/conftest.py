@@ -0,0 +1,24 @@
+"""
+Test ortamı - app import edilmeden önce geçici veritabanı yolu ayarlanır
+Kullanım: python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+TEMP_DIR = tempfile.mkdtemp(prefix='diyet_test_')
+os.environ['DB_PATH'] = os.path.join(TEMP_DIR, 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+
+app_module.init_db()
+
+@pytest.fixture
+def conn():
+    """Havuz dışı tek seferlik bağlantı (CLI scriptleri gibi)"""
+    conn = app_module.get_db()
+    yield conn
+    conn.close()
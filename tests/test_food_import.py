@@ -0,0 +1,39 @@
+"""Toplu besin içe aktarma - porsiyon eşleşmesi ve barkod çakışmaları"""
+from app import import_foods
+
+def count_foods(conn, name):
+    return conn.execute('SELECT COUNT(*) FROM foods WHERE name = ?', (name,)).fetchone()[0]
+
+def test_reimport_without_serving_size_updates_existing(conn):
+    # Admin panelinden porsiyonsuz eklenmiş besin (serving_size NULL)
+    conn.execute("INSERT INTO foods (name, calories, created_at) VALUES ('Porsiyonsuz Elma', 50, '2026-01-01')")
+    conn.commit()
+
+    for calories in (52, 53):
+        result = import_foods(conn, [(1, {'name': 'Porsiyonsuz Elma', 'calories': calories})])
+        assert result['inserted'] == 0
+        assert result['updated'] == 1
+
+    assert count_foods(conn, 'Porsiyonsuz Elma') == 1
+    assert conn.execute("SELECT calories FROM foods WHERE name = 'Porsiyonsuz Elma'").fetchone()[0] == 53
+
+def test_barcode_conflicts_are_rejected_per_row(conn):
+    conn.execute("INSERT INTO foods (name, calories, created_at) VALUES ('Cakisma D', 5, '2026-01-01')")
+    conn.commit()
+    records = [
+        (1, {'name': 'Cakisma A', 'calories': 10, 'barcode': '4006381333931'}),
+        # Aynı barkod farklı bir üründe
+        (2, {'name': 'Cakisma B', 'calories': 20, 'barcode': '4006381333931'}),
+        (3, {'name': 'Cakisma C', 'calories': 30}),
+        (4, {'name': 'Cakisma D', 'calories': 1, 'barcode': '5901234123457'}),
+        # Aynı mevcut besine ikinci bir barkod
+        (5, {'name': 'Cakisma D', 'calories': 2, 'barcode': '96385074'}),
+    ]
+
+    result = import_foods(conn, records)
+
+    assert (result['inserted'], result['updated'], result['rejected']) == (2, 1, 2)
+    assert sorted(error['line'] for error in result['errors']) == [2, 5]
+    assert count_foods(conn, 'Cakisma A') == 1
+    assert count_foods(conn, 'Cakisma B') == 0
+    assert conn.execute("SELECT barcode FROM foods WHERE name = 'Cakisma D'").fetchone()[0] == '5901234123457'
@@ -0,0 +1,37 @@
+"""Prometheus /metrics - varsayılan olarak kimlik doğrulaması ister"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+import app as app_module
+
+def bearer(user_id):
+    with app_module.app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+def test_metrics_requires_auth_by_default(client):
+    assert client.get('/metrics').status_code == 403
+
+def test_metrics_accepts_token(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'gizli')
+    assert client.get('/metrics', headers={'Authorization': 'Bearer yanlis'}).status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer gizli'}).status_code == 200
+
+def test_metrics_accepts_admin_jwt_only(client, conn):
+    admin_id = conn.execute('SELECT id FROM users WHERE email = ?', (app_module.ADMIN_EMAIL,)).fetchone()[0]
+    cursor = conn.execute("INSERT INTO users (email, password, name, created_at) "
+                          "VALUES ('metrik@test.com', 'x', 'Metrik', '2026-01-01')")
+    conn.commit()
+    try:
+        assert client.get('/metrics', headers=bearer(admin_id)).status_code == 200
+        assert client.get('/metrics', headers=bearer(cursor.lastrowid)).status_code == 403
+    finally:
+        conn.execute('DELETE FROM users WHERE id = ?', (cursor.lastrowid,))
+        conn.commit()
+
+def test_metrics_public_opt_out(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'METRICS_PUBLIC', True)
+    assert client.get('/metrics').status_code == 200
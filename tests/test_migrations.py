@@ -0,0 +1,18 @@
+"""Şema göçleri - barkod normalizasyonu (göç 9)"""
+import sqlite3
+
+from app import migrate_food_barcodes
+
+def test_duplicate_barcodes_report_affected_food_ids(capsys):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE foods (id INTEGER PRIMARY KEY, name TEXT, barcode TEXT)')
+    # Aynı EAN-13, biri UPC-A / baştaki sıfırla yazılmış
+    conn.executemany('INSERT INTO foods (id, name, barcode) VALUES (?, ?, ?)',
+                     [(1, 'Süt', '4006381333931'), (2, 'Ayran', '04006381333931'), (3, 'Kefir', ' 4006381333931 ')])
+    migrate_food_barcodes(conn.cursor())
+
+    rows = dict(conn.execute('SELECT id, barcode FROM foods').fetchall())
+    assert rows == {1: '4006381333931', 2: None, 3: None}
+    output = capsys.readouterr().out
+    assert "besin #2: barkod '04006381333931' kaldirildi (besin #1 ile ayni)" in output
+    assert "besin #3: barkod ' 4006381333931 ' kaldirildi (besin #1 ile ayni)" in output
@@ -0,0 +1,45 @@
+"""Şifre hash kuyruğu - sınır aşılınca giriş istekleri 503 + Retry-After almalı"""
+import threading
+
+import bcrypt
+import pytest
+
+import app as app_module
+from app import PasswordHasher
+
+@pytest.fixture
+def user(conn):
+    # Maliyet hash'ten okunur: ~50-100 ms'lik doğrulama istekleri kuyrukta üst üste biner
+    hashed = bcrypt.hashpw(b'sifre123', bcrypt.gensalt(11)).decode('utf-8')
+    conn.execute('INSERT INTO users (email, password, name, created_at) VALUES (?, ?, ?, ?)',
+                 ('kuyruk@test.com', hashed, 'Kuyruk', '2026-01-01'))
+    conn.commit()
+    yield 'kuyruk@test.com'
+    conn.execute("DELETE FROM users WHERE email = 'kuyruk@test.com'")
+    conn.commit()
+
+def test_login_burst_gets_503_when_hash_queue_is_full(user, monkeypatch):
+    hasher = PasswordHasher(threads=1, max_pending=2)
+    monkeypatch.setattr(app_module, 'password_hasher', hasher)
+    client = app_module.app.test_client()
+    barrier = threading.Barrier(8)
+    responses = []
+
+    def login():
+        barrier.wait()
+        responses.append(client.post('/api/login', json={'email': user, 'password': 'sifre123'}))
+
+    threads = [threading.Thread(target=login) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    statuses = sorted(response.status_code for response in responses)
+    assert 200 in statuses
+    assert 503 in statuses
+    busy = [response for response in responses if response.status_code == 503]
+    assert all(response.headers['Retry-After'] == str(app_module.PASSWORD_HASH_RETRY_AFTER) for response in busy)
+    stats = hasher.stats()
+    assert stats['rejected'] == len(busy)
+    assert stats['max_pending_seen'] == 2
@@ -0,0 +1,43 @@
+"""Akıllı öneri matrisi - kova sonuçları eski ORDER BY ... LIMIT sorgularıyla aynı olmalı"""
+import random
+
+import pytest
+
+from app import NutrientMatrix
+
+BUCKETS = [
+    ('protein', [('protein', '>', 10), ('calories', '<=', 500)], [('protein', 'desc'), ('calories', 'asc')]),
+    ('low_calorie', [('calories', '<', 150), ('calories', '<=', 300)], [('calories', 'asc'), ('protein', 'desc')]),
+    ('weight_gain', [('protein', '>', 10), ('calories', '>', 200), ('calories', '<=', 800)],
+     [('calories', 'desc'), ('protein', 'desc')]),
+    # Seçici kalori filtresi: sıralamada yürümek yerine kalori aralığındaki adaylar kullanılır
+    ('weight_loss', [('protein', '>', 15), ('calories', '<', 200), ('calories', '<=', 40)],
+     [('protein', 'desc'), ('calories', 'asc')]),
+]
+
+@pytest.fixture
+def foods(conn):
+    rng = random.Random(7)
+    rows = []
+    for i in range(2000):
+        protein = None if i % 50 == 0 else round(rng.uniform(0, 35), 1)
+        rows.append((f'Oneri {i}', round(rng.uniform(5, 900)), protein, round(rng.uniform(0, 80), 1),
+                     round(rng.uniform(0, 40), 1), '100g', 'Test', '2026-01-01'))
+    conn.executemany('''
+        INSERT INTO foods (name, calories, protein, carbs, fat, serving_size, category, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    yield conn
+    conn.execute("DELETE FROM foods WHERE name LIKE 'Oneri %'")
+    conn.commit()
+
+def test_top_k_matches_sql(foods):
+    cursor = foods.cursor()
+    top = NutrientMatrix().sync(cursor).top_k(cursor, BUCKETS, 5)
+    for name, filters, order in BUCKETS:
+        where = ' AND '.join(f'{column} {op} ?' for column, op, _ in filters)
+        order_by = ', '.join(f'{column} {direction.upper()}' for column, direction in order)
+        cursor.execute(f'SELECT id FROM foods WHERE {where} ORDER BY {order_by}, id LIMIT 5',
+                       [value for _, _, value in filters])
+        assert [row['id'] for row in top[name]] == [row[0] for row in cursor.fetchall()], name
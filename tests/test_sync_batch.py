@@ -0,0 +1,41 @@
+"""Toplu senkronizasyon - idempotency anahtarları saklama süresi"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import app as app_module
+
+@pytest.fixture
+def user_id(conn):
+    cursor = conn.execute("INSERT INTO users (email, password, name, created_at) "
+                          "VALUES ('sync@test.com', 'x', 'Sync', '2026-01-01')")
+    conn.commit()
+    yield cursor.lastrowid
+    conn.execute('DELETE FROM water_logs WHERE user_id = ?', (cursor.lastrowid,))
+    conn.execute('DELETE FROM sync_requests WHERE user_id = ?', (cursor.lastrowid,))
+    conn.execute('DELETE FROM users WHERE id = ?', (cursor.lastrowid,))
+    conn.commit()
+
+def post_batch(user_id, entries):
+    with app_module.app.app_context():
+        token = create_access_token(identity=str(user_id))
+    return app_module.app.test_client().post('/api/sync/batch', json={'entries': entries},
+                                             headers={'Authorization': f'Bearer {token}'})
+
+def test_expired_keys_are_pruned_on_write(conn, user_id):
+    expired = (datetime.now() - timedelta(days=app_module.SYNC_KEY_RETENTION_DAYS + 1)).isoformat()
+    conn.execute("INSERT INTO sync_requests (user_id, idempotency_key, entry_type, created_at) "
+                 "VALUES (?, 'eski', 'water', ?)", (user_id, expired))
+    conn.commit()
+
+    response = post_batch(user_id, [{'key': 'yeni', 'type': 'water', 'amount': 200}])
+    assert response.status_code == 200
+    assert response.get_json()['key_retention_days'] == app_module.SYNC_KEY_RETENTION_DAYS
+    keys = {row[0] for row in conn.execute('SELECT idempotency_key FROM sync_requests WHERE user_id = ?', (user_id,))}
+    assert keys == {'yeni'}
+
+    # Saklama süresi içindeki tekrar deneme hâlâ çift kayıt üretmez
+    response = post_batch(user_id, [{'key': 'yeni', 'type': 'water', 'amount': 200}])
+    assert response.get_json()['duplicate'] == 1
+    assert conn.execute('SELECT COUNT(*) FROM water_logs WHERE user_id = ?', (user_id,)).fetchone()[0] == 1